@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - end-to-end serial -> Shop-Flow -> ack pipeline
+
+Runs the real SerialToWinForms handler (framing, giftbox decode, duplicate
+index, journal, transforms, injection, NG detection, ack) between:
+  - a fake scanner on a pseudo-terminal (serial_standin.PtyDevice)
+  - a simulated Shop-Flow window with configurable delays (shopflow_standin)
+The device sends one frame, waits for its OK/NG, then sends the next.
+
+Reports frames/s, the ack round trip and per-stage latency percentiles
+(read, inject, result, end_to_end as recorded by the handler), CPU ms and RSS
+growth per frame. Also checks that every frame is acknowledged, that a
+repeated box gets NG without reaching Shop-Flow and, with a checksum
+profile, that a corrupted frame is dropped without an ack (counted in
+framing_errors) and the next frame is answered again.
+
+Baseline: --save-baseline stores the results per scenario in
+benchmarks/baseline_e2e.json; later runs of the same scenario compare
+against it and exit with status 1 when frames/s or a p95 is worse by more
+than --tolerance. The numbers depend on the machine, so the file is not
+committed: a scenario without a baseline also fails, until --save-baseline
+has been run on that machine (e.g. on the CI runner from a known-good
+commit).
+
+Needs pyserial and a POSIX pty (Linux, macOS or WSL).
+
+Usage: python benchmarks/bench_e2e.py --suite [--save-baseline]
+       python benchmarks/bench_e2e.py [--frames N] [--mode items|frame] [--items 20]
+           [--process-delay s] [--set-text-delay s] [--ng-rate r] [--framing profile]
+           [--save-baseline] [--baseline path] [--tolerance 0.25]
+"""
+
+import argparse
+import json
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+import serial
+from serial_to_winforms_bk6 import SerialToWinForms
+from bridge_metrics import BridgeMetrics
+from framing import FramingProfile
+from serial_standin import PtyDevice
+from shopflow_standin import ShopFlowStandIn
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline_e2e.json")
+STAGES = ("read", "inject", "result", "end_to_end")
+ACK_TIMEOUT = 10.0
+DROP_WAIT = 1.0  # seconds to wait for an ack that must not come
+WARMUP_FRAMES = 5
+
+# --suite: overrides applied to the command line arguments
+SUITE = [
+    {"mode": "items", "framing": "ascii"},
+    {"mode": "items", "framing": "stx_etx_crc16"},
+    {"mode": "items", "framing": "ascii", "ng_rate": 0.02},
+    {"mode": "items", "framing": "ascii", "process_delay": 0.03, "set_text_delay": 0.002},
+    {"mode": "frame", "framing": "ascii", "frames": 10},
+]
+
+
+class RecordingMetrics(BridgeMetrics):
+    """BridgeMetrics that also keeps every sample for exact percentiles"""
+    def __init__(self):
+        super().__init__()
+        self.samples = {}
+
+    def observe(self, stage, seconds):
+        super().observe(stage, seconds)
+        self.samples.setdefault(stage, []).append(seconds)
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def percentiles_ms(samples):
+    """p50/p95/p99 in ms; None for a stage this scenario does not record"""
+    if not samples:
+        return None
+    return {f"p{q}": percentile(samples, q / 100) * 1000 for q in (50, 95, 99)}
+
+
+def rss_kb():
+    """Current resident memory in KB (None if unavailable)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / 1024
+    except ImportError:
+        pass
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024
+    except (OSError, ValueError):
+        return None
+
+
+def make_payload(number, items):
+    rng = random.Random(number)
+    return ";".join(f"{number * items + n:017d}I44HK24AZCK{rng.randrange(1000, 9999)}DKR{rng.uniform(1, 99):08.2f}"
+                    for n in range(items))
+
+
+def scenario_key(args):
+    return (f"{args.mode}/{args.items} items/{args.framing}/process {args.process_delay * 1000:g} ms/"
+            f"set_text {args.set_text_delay * 1000:g} ms/ng {args.ng_rate:g}")
+
+
+def write_config(work, args, port):
+    config = {
+        "port": port,
+        "baudrate": 115200,
+        "target_app_title": "Shop-Flow Bench",
+        "textbox_auto_id": "DEVICEID_AUTO",
+        "submit_mode": args.mode,
+        "item_timeout": 2.0,
+        "item_poll_interval": 0.001,
+        "framing": args.framing,
+        "journal_enabled": True,
+        "journal_path": "journal/frames.db",
+        "serial_index_enabled": True,
+        "serial_index_path": "journal/serials.db",
+    }
+    path = os.path.join(work, "config.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(config, f)
+    return path
+
+
+def run(args, work):
+    """Drive the pipeline; returns (results, checks) where checks is a list of (ok, message)"""
+    profile = FramingProfile(args.framing)
+    device = PtyDevice(profile)
+    shopflow = ShopFlowStandIn(args.process_delay, args.set_text_delay, args.ng_rate)
+    handler = SerialToWinForms(config_path=write_config(work, args, device.port), show_dialogs=False)
+    handler.metrics = RecordingMetrics()
+    handler.serial_conn = serial.Serial(device.port, 115200, timeout=1)
+    handler.window, handler.textbox = shopflow.window, shopflow.textbox
+    handler.start_reader()
+    checks = []
+    try:
+        for number in range(WARMUP_FRAMES):
+            device.send(profile.encode(make_payload(10 ** 6 + number, args.items)))
+            device.wait_ack(ACK_TIMEOUT)
+        handler.metrics.samples.clear()
+        submitted_before = shopflow.submitted
+
+        round_trips = []
+        acks = {b"OK": 0, b"NG": 0}
+        timeouts = 0
+        cpu_start = time.process_time()
+        rss_start = rss_kb()
+        start = time.perf_counter()
+        for number in range(args.frames):
+            sent_at = device.send(profile.encode(make_payload(number, args.items)))
+            ack, arrived = device.wait_ack(ACK_TIMEOUT)
+            if ack is None:
+                timeouts += 1
+                continue
+            acks[ack] = acks.get(ack, 0) + 1
+            round_trips.append(arrived - sent_at)
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        rss_end = rss_kb()
+
+        expected_submissions = args.frames * (args.items if args.mode == "items" else 1)
+        checks.append((timeouts == 0, f"{timeouts} frames without an ack"))
+        if not args.ng_rate:
+            checks.append((acks[b"NG"] == 0, f"{acks[b'NG']} NG acks with no NG simulated"))
+            checks.append((shopflow.submitted - submitted_before == expected_submissions,
+                           f"Shop-Flow saw {shopflow.submitted - submitted_before} submissions, "
+                           f"expected {expected_submissions}"))
+
+            # Same box again: NG from the duplicate index, Shop-Flow never sees it
+            submitted = shopflow.submitted
+            device.send(profile.encode(make_payload(0, args.items)))
+            ack, _ = device.wait_ack(ACK_TIMEOUT)
+            checks.append((ack == b"NG" and shopflow.submitted == submitted, f"repeated box answered {ack}"))
+        if profile.checksum.size:
+            wire = bytearray(profile.encode(make_payload(2 * 10 ** 6, args.items)))
+            wire[len(wire) // 2] ^= 0x01
+            errors_before = handler.get_framing_errors()
+            device.send(bytes(wire))
+            ack, _ = device.wait_ack(DROP_WAIT)
+            checks.append((ack is None, f"corrupted frame answered {ack}"))
+            checks.append((handler.get_framing_errors() == errors_before + 1, "corrupted frame not counted"))
+            device.send(profile.encode(make_payload(2 * 10 ** 6 + 1, args.items)))
+            ack, _ = device.wait_ack(ACK_TIMEOUT)
+            checks.append((ack is not None, "no ack for the frame after a corrupted one"))
+
+        samples = handler.metrics.samples
+        frames = max(len(round_trips), 1)
+        results = {
+            "frames": len(round_trips),
+            "frames_per_second": len(round_trips) / elapsed,
+            "items_per_second": len(round_trips) * args.items / elapsed,
+            "ack_ms": percentiles_ms(round_trips),
+            "stages_ms": {stage: percentiles_ms(samples.get(stage, [])) for stage in STAGES},
+            "cpu_ms_per_frame": cpu / frames * 1000,
+            "rss_kb_per_frame": (rss_end - rss_start) / frames if rss_start is not None else None,
+            "ok": acks[b"OK"],
+            "ng": acks[b"NG"],
+        }
+    finally:
+        handler.stop()
+        device.close()
+    return results, checks
+
+
+def report(results):
+    print(f"  {results['frames']} frames: {results['frames_per_second']:.2f} frames/s, "
+          f"{results['items_per_second']:.1f} items/s, OK {results['ok']} / NG {results['ng']}")
+    print(f"  {'stage':12s} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    rows = [("ack", results["ack_ms"])] + list(results["stages_ms"].items())
+    for stage, values in rows:
+        if values is None:
+            print(f"  {stage:12s} {'-':>8} {'-':>8} {'-':>8}")
+            continue
+        print(f"  {stage:12s} {values['p50']:8.2f} {values['p95']:8.2f} {values['p99']:8.2f}")
+    rss = results["rss_kb_per_frame"]
+    print(f"  CPU {results['cpu_ms_per_frame']:.2f} ms per frame, "
+          f"RSS {'n/a' if rss is None else f'{rss:+.2f} KB'} per frame")
+
+
+def compare(results, baseline, tolerance):
+    """Regressions against a saved baseline as a list of messages"""
+    regressions = []
+    base_fps = baseline["frames_per_second"]
+    if results["frames_per_second"] < base_fps * (1 - tolerance):
+        regressions.append(f"frames/s {results['frames_per_second']:.2f} vs baseline {base_fps:.2f}")
+    pairs = [("ack", results["ack_ms"], baseline["ack_ms"])]
+    pairs += [(stage, results["stages_ms"][stage], baseline["stages_ms"][stage]) for stage in STAGES]
+    for stage, values, base in pairs:
+        if values is None or base is None:
+            continue
+        # 1 ms slack so sub-millisecond stages do not flap
+        now, before = values["p95"], base["p95"]
+        if now > before * (1 + tolerance) + 1.0:
+            regressions.append(f"{stage} p95 {now:.2f} ms vs baseline {before:.2f} ms")
+    base_cpu = baseline["cpu_ms_per_frame"]
+    if results["cpu_ms_per_frame"] > base_cpu * (1 + tolerance) + 0.5:
+        regressions.append(f"CPU {results['cpu_ms_per_frame']:.2f} ms per frame vs baseline {base_cpu:.2f} ms")
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="End-to-end pipeline benchmark against a fake device and Shop-Flow")
+    parser.add_argument('--suite', action='store_true', help="run the standard scenarios (SUITE) instead of one")
+    parser.add_argument('--frames', type=int, default=None, help="measured frames (default 200, 20 in frame mode)")
+    parser.add_argument('--mode', choices=['items', 'frame'], default='items', help="submit_mode of the handler")
+    parser.add_argument('--items', type=int, default=20, help="giftbox items per frame")
+    parser.add_argument('--process-delay', type=float, default=0.005, help="Shop-Flow time per submission (s)")
+    parser.add_argument('--set-text-delay', type=float, default=0.0, help="time spent in set_text() (s)")
+    parser.add_argument('--ng-rate', type=float, default=0.0, help="share of submissions Shop-Flow rejects")
+    parser.add_argument('--framing', default='ascii', help="framing profile (see framing.py)")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="store these results as the baseline")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument('-v', '--verbose', action='store_true', help="handler log on the console too")
+    return parser.parse_args(argv)
+
+
+def scenarios(args):
+    """Argument sets to run: the command line, or the suite with the command line as defaults"""
+    overrides = SUITE if args.suite else [{}]
+    result = []
+    for override in overrides:
+        scenario = argparse.Namespace(**dict(vars(args), **override))
+        if scenario.frames is None:
+            scenario.frames = 200 if scenario.mode == 'items' else 20
+        result.append(scenario)
+    return result
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    failed = False
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baselines = json.load(f)
+    except (OSError, ValueError):
+        baselines = {}
+
+    for scenario in scenarios(args):
+        key = scenario_key(scenario)
+        with tempfile.TemporaryDirectory() as work:
+            # The handler logs as in production, to a file (console only with -v)
+            handlers = [logging.FileHandler(os.path.join(work, "bridge.txt"), encoding='utf-8')]
+            if args.verbose:
+                handlers.append(logging.StreamHandler())
+            logging.basicConfig(level=logging.INFO, handlers=handlers,
+                                format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+            print(f"Scenario: {key}")
+            results, checks = run(scenario, work)
+            logging.shutdown()
+        report(results)
+        for ok, message in checks:
+            if not ok:
+                print(f"FAIL: {message}")
+                failed = True
+        if args.save_baseline:
+            baselines[key] = results
+        elif key in baselines:
+            regressions = compare(results, baselines[key], args.tolerance)
+            for message in regressions:
+                print(f"REGRESSION: {message}")
+            failed = failed or bool(regressions)
+            if not regressions:
+                print(f"  within {args.tolerance:.0%} of the baseline")
+        else:
+            print(f"FAIL: no baseline for this scenario in {args.baseline} (run with --save-baseline)")
+            failed = True
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {args.baseline}")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
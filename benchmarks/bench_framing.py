@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - serial framing profiles and checksums
+
+  checksums : MB/s of each checksum on a 20-record payload, table-driven
+              CRC-16/MODBUS against a bit-by-bit loop
+  profiles  : frames/s through Deframer for every profile, stream fed in
+              64-byte reads like the serial port
+  noise     : one random byte flipped in `noisy`% of the frames; counts
+              frames delivered, corrupted, malformed and corrupted payloads
+              that got through
+Checks the standard check values ("123456789"), that every profile round
+trips, and that no corrupted payload passes a CRC profile. Exits with status
+1 if a check fails.
+
+Usage: python benchmarks/bench_framing.py [frames] [noisy %]
+"""
+
+import os
+import random
+import sys
+import time
+from functools import reduce
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from framing import CHECKSUMS, PROFILES, FramingProfile, Deframer, crc16_modbus, xor8
+
+CHECK_VALUES = {"xor": 0x31, "lrc": 0x23, "sum8": 0xDD, "crc16_modbus": 0x4B37,
+                "crc16_ccitt": 0x29B1, "crc32": 0xCBF43926}
+READ_SIZE = 64
+
+
+def crc16_modbus_bitwise(data, crc=0xFFFF):
+    for byte in data:
+        crc ^= byte
+        for _ in range(8):
+            crc = (crc >> 1) ^ 0xA001 if crc & 1 else crc >> 1
+    return crc
+
+
+def xor_loop(data):
+    return reduce(lambda a, b: a ^ b, data, 0)
+
+
+def make_payload(rng):
+    return ";".join(f"0146{rng.randrange(10 ** 12, 10 ** 13)}I44HK24AZCK{rng.randrange(1000, 9999)}DKR"
+                    f"{rng.uniform(1, 99):08.2f}" for _ in range(20))
+
+
+def mb_per_second(function, data, seconds=0.2):
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        function(data)
+        count += 1
+    return count * len(data) / (time.perf_counter() - start) / 1e6
+
+
+def feed_stream(profile, stream):
+    deframer = Deframer(profile)
+    payloads = []
+    start = time.perf_counter()
+    for i in range(0, len(stream), READ_SIZE):
+        payloads += deframer.feed(stream[i:i + READ_SIZE])[0]
+    return payloads, deframer, time.perf_counter() - start
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    noisy = float(sys.argv[2]) if len(sys.argv) > 2 else 5.0
+    failed = False
+
+    def check(ok, message):
+        nonlocal failed
+        if not ok:
+            print(f"FAIL: {message}")
+            failed = True
+
+    for name, expected in CHECK_VALUES.items():
+        value = CHECKSUMS[name].function(b"123456789")
+        check(value == expected, f"{name}('123456789') = 0x{value:X}, expected 0x{expected:X}")
+    data = bytes(random.Random(1).randrange(256) for _ in range(4099))
+    check(crc16_modbus(data) == crc16_modbus_bitwise(data), "table CRC differs from the bitwise CRC")
+    check(xor8(data) == xor_loop(data), "folded XOR differs from the byte loop")
+    for spec in ({"profile": "stx_etx", "checksum": "crc16_modbus", "checksum_format": "hex"},
+                 {"start": "\u0002", "end": "\u0003", "checksum": "lrc", "checksum_format": "hex"}):
+        profile = FramingProfile(spec)
+        wire = profile.encode("A01;A02")
+        wire = wire[:-profile.checksum_width] + wire[-profile.checksum_width:].lower()
+        check(Deframer(profile).feed(wire)[0] == ["A01;A02"], f"{spec} did not accept lower-case hex")
+    for bad in ("nope", {"profile": "stx_etx", "checksum": "md5"}, {"checksum": "lrc"}, {"start": 2},
+                {"profile": "stx_etx", "start": 300}):
+        try:
+            FramingProfile(bad)
+            check(False, f"invalid framing {bad} accepted")
+        except ValueError:
+            pass
+
+    rng = random.Random(9)
+    payloads = [make_payload(rng) for _ in range(frame_count)]
+    frame = payloads[0].encode('utf-8')
+    print(f"checksums on a {len(frame)}-byte frame")
+    print(f"  {'crc16_modbus bitwise':22s} {mb_per_second(crc16_modbus_bitwise, frame):8.2f} MB/s")
+    print(f"  {'xor byte loop':22s} {mb_per_second(xor_loop, frame):8.2f} MB/s")
+    for name, checksum in CHECKSUMS.items():
+        if checksum.function:
+            print(f"  {name:22s} {mb_per_second(checksum.function, frame):8.2f} MB/s")
+
+    print(f"\n{frame_count} frames x 20 records, {READ_SIZE}-byte reads; {noisy:g}% of frames with one flipped byte")
+    print(f"  {'profile':14s} {'frames/s':>10} {'MB/s':>6}   {'delivered':>9} {'corrupted':>9} {'malformed':>9} "
+          f"{'bad passed':>10}")
+    originals = set(payloads)
+    for name in PROFILES:
+        profile = FramingProfile(name)
+        stream = b"".join(profile.encode(payload) for payload in payloads)
+        received, _, seconds = feed_stream(profile, stream)
+        check(received == payloads, f"{name}: clean stream did not round trip")
+
+        noise = random.Random(4)
+        frames = []
+        for payload in payloads:
+            wire = bytearray(profile.encode(payload))
+            if noise.random() * 100 < noisy:
+                wire[noise.randrange(len(wire))] ^= 1 << noise.randrange(8)
+            frames.append(bytes(wire))
+        received, deframer, _ = feed_stream(profile, b"".join(frames))
+        passed = sum(1 for payload in received if payload not in originals)
+        print(f"  {name:14s} {frame_count / seconds:10,.0f} {len(stream) / seconds / 1e6:6.1f}   "
+              f"{len(received):9d} {deframer.corrupted:9d} {deframer.malformed:9d} {passed:10d}")
+        if profile.checksum_name.startswith("crc"):
+            check(passed == 0, f"{name}: {passed} corrupted payloads passed the CRC")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
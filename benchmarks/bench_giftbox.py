@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - giftbox payload decoding
+
+Decodes synthetic 20-item giftbox frames and compares:
+  dicts   : split into one dict per item, then separate passes for the
+            total weight, models and duplicates
+  columns : giftbox.decode(), fixed-width columns and one-pass summary
+Reports records/s and the memory held by 1000 decoded frames, and checks
+the decoded fields, summaries, duplicate / malformed detection and a custom
+layout. Exits with status 1 if a check fails.
+
+Usage: python benchmarks/bench_giftbox.py [frames]
+"""
+
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from giftbox import decode, RecordLayout, format_summary
+
+SAMPLE = "01462008114854321I44HK24AZCK5240DKR00009.00"
+MODELS = ["I44HK24AZCK", "I42IDHL03HQ", "I50QNED80SR"]
+
+
+def make_record(rng, serial=None):
+    serial = serial or f"{rng.randrange(10 ** 16, 10 ** 17):017d}"
+    return f"{serial}{rng.choice(MODELS)}{rng.randrange(1000, 9999)}DKR{rng.uniform(1, 99):08.2f}"
+
+
+def make_frames(count, seed=7):
+    rng = random.Random(seed)
+    return [";".join(make_record(rng) for _ in range(20)) for _ in range(count)]
+
+
+def decode_dicts(payload):
+    """Per-item dicts plus one pass per summary value"""
+    items = []
+    for record in payload.split(";"):
+        if len(record) != 43:
+            continue
+        items.append({"serial": record[:17], "model": record[17:28], "lot": record[28:35],
+                      "weight": float(record[35:43])})
+    total = sum(item["weight"] for item in items)
+    models = {}
+    for item in items:
+        models[item["model"]] = models.get(item["model"], 0) + 1
+    serials = [item["serial"] for item in items]
+    duplicates = [s for i, s in enumerate(serials) if s in serials[:i]]
+    return items, total, models, duplicates
+
+
+def rate(function, frames):
+    start = time.perf_counter()
+    for frame in frames:
+        function(frame)
+    elapsed = time.perf_counter() - start
+    return len(frames) * 20 / elapsed
+
+
+def retained(function, frames):
+    tracemalloc.start()
+    kept = [function(frame) for frame in frames]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return size
+
+
+def main():
+    frame_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    failed = False
+
+    def check(ok, message):
+        nonlocal failed
+        if not ok:
+            print(f"FAIL: {message}")
+            failed = True
+
+    batch = decode(SAMPLE)
+    check(batch.item(0) == ("01462008114854321", "I44HK24AZCK", "5240DKR", 9.0), f"sample decoded as {batch.item(0)}")
+
+    rng = random.Random(1)
+    records = [make_record(rng) for _ in range(18)]
+    records += [records[3], "TOO_SHORT"]
+    batch = decode(";".join(records) + ";")
+    summary = batch.summary
+    check(batch.count == 19 and summary.items == 19, f"{batch.count} items decoded, expected 19")
+    check(summary.duplicates == (records[3][:17],), f"duplicates {summary.duplicates}")
+    check(summary.malformed == 1, f"{summary.malformed} malformed, expected 1")
+    check(abs(summary.total_weight - sum(float(r[35:]) for r in records[:19])) < 1e-6, "total weight mismatch")
+    check(sum(summary.models.values()) == 19, "model counts do not add up")
+    check(batch.column("serial") == [r[:17] for r in records[:19]], "serial column out of order")
+    check(decode(SAMPLE.replace("00009.00", "0000X.00")).summary.malformed == 1, "bad weight accepted")
+    print(f"  summary : {format_summary(summary)}")
+
+    # Same record read with a different split of the first fields
+    custom = RecordLayout([["model", 4], ["serial", 13], ["lot", 18], ["weight", 8]])
+    check(decode(SAMPLE, custom).field("model", 0) == "0146", "custom layout not applied")
+    try:
+        RecordLayout([["serial", 17], ["weight", 8]])
+        check(False, "layout without model/lot accepted")
+    except ValueError:
+        pass
+
+    frames = make_frames(frame_count)
+    for _ in range(2):  # warm up, keep the second run
+        dict_rate = rate(decode_dicts, frames)
+        column_rate = rate(decode, frames)
+    dict_bytes = retained(decode_dicts, frames[:1000])
+    column_bytes = retained(decode, frames[:1000])
+    print(f"{frame_count} frames x 20 records")
+    print(f"  dicts   : {dict_rate:12,.0f} records/s, {dict_bytes / 1024:8.0f} KB held per 1000 frames")
+    print(f"  columns : {column_rate:12,.0f} records/s, {column_bytes / 1024:8.0f} KB held per 1000 frames")
+    check(column_bytes < dict_bytes, "column batches use more memory than dicts")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
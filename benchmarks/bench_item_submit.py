@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - per-item submission to a simulated Shop-Flow textbox
+
+The simulated textbox clears itself a random 20-80 ms after Enter (Shop-Flow
+reading the device ID) and can show NG for chosen items. Compares:
+  sleeps     : the frame-mode pacing per item (focus 0.1 s, set_text 0.2 s,
+               Enter 0.1 s, result wait 1.0 s)
+  condition  : ItemSubmitter, polling until the item is taken
+Reports items/s and per-item p50/p99, and checks OK/NG aggregation, stop at
+the first NG, early exit on a quick NG, one full NG scan per frame, an NG
+dialog found after a timeout, timeouts and injection failures.
+Exits with status 1 if a check fails.
+
+Usage: python benchmarks/bench_item_submit.py [frames] [items]
+"""
+
+import os
+import random
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from item_submit import ItemSubmitter, split_items, format_result, reached_shopflow, items_per_second, TIMEOUT
+
+SLEEP_PACING = 0.1 + 0.2 + 0.1 + 1.0
+
+
+class SimulatedTextbox:
+    """set_text / type_keys / window_text of a Shop-Flow textbox"""
+    def __init__(self, latency=(0.02, 0.08), ng_items=(), stuck=False, broken=False, seed=11):
+        self.text = ""
+        self.latency = latency
+        self.ng_items = set(ng_items)
+        self.stuck = stuck      # never takes the item
+        self.broken = broken    # every call fails
+        self.ng_visible = False
+        self.received = []
+        self.rng = random.Random(seed)
+
+    def set_text(self, text):
+        if self.broken:
+            raise RuntimeError("control not responding")
+        self.text = text
+
+    def set_focus(self):
+        if self.broken:
+            raise RuntimeError("control not responding")
+
+    def type_keys(self, keys, pause=0.05):
+        if self.broken:
+            raise RuntimeError("control not responding")
+        if keys != '{ENTER}':
+            self.text = keys.replace('{ENTER}', '')
+        if not self.stuck:
+            item = self.text
+            threading.Timer(self.rng.uniform(*self.latency), self.process, (item,)).start()
+
+    def process(self, item):
+        self.received.append(item)
+        if item in self.ng_items:
+            self.ng_visible = True
+        else:
+            self.text = ""
+
+    def window_text(self):
+        return self.text
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def sleep_paced(textbox, items):
+    for item in items:
+        time.sleep(0.1)
+        textbox.set_text(item)
+        time.sleep(0.2)
+        textbox.type_keys('{ENTER}', pause=0.1)
+        time.sleep(0.1 + 1.0)
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    item_count = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    failed = False
+
+    def check(ok, message):
+        nonlocal failed
+        if not ok:
+            print(f"FAIL: {message}")
+            failed = True
+
+    check(split_items(" A1; ;B2;C3;") == ["A1", "B2", "C3"], "split_items kept empty items")
+
+    # NG on the third item: frame NG, remaining items not submitted
+    box = SimulatedTextbox(ng_items={"ID03"})
+    result = ItemSubmitter(box, lambda: box.ng_visible, lambda: box.ng_visible, timeout=1.0).submit(
+        [f"ID{n:02d}" for n in range(1, 6)])
+    check(not result.ok and len(result.results) == 3 and result.results[-1].reason == "NG",
+          f"NG not aggregated: {format_result(result)}")
+    check(box.received == ["ID01", "ID02", "ID03"], f"items after the NG were submitted: {box.received}")
+    check(result.results[-1].seconds < 0.5, "quick NG did not end the wait early")
+    print(f"  ng      : {format_result(result)}")
+
+    # Item never taken: timeout, frame NG
+    box = SimulatedTextbox(stuck=True)
+    result = ItemSubmitter(box, lambda: False, timeout=0.2).submit(["ID01", "ID02"])
+    check(not result.ok and result.results[0].reason == TIMEOUT, f"timeout not reported: {format_result(result)}")
+    check(0.2 <= result.seconds < 0.5, f"timeout took {result.seconds:.2f}s")
+
+    # NG dialog without lblError: the item is never taken, the frame's full check finds it
+    box = SimulatedTextbox(stuck=True)
+    result = ItemSubmitter(box, lambda: True, timeout=0.2).submit(["ID01", "ID02"])
+    check(not result.ok and [r.reason for r in result.results] == ["NG"], f"NG dialog missed: {format_result(result)}")
+
+    # Textbox broken: nothing reached Shop-Flow, the frame can be retried
+    box = SimulatedTextbox(broken=True)
+    result = ItemSubmitter(box, lambda: False).submit(["ID01"])
+    check(not result.ok and not reached_shopflow(result), "injection failure reported as delivered")
+
+    # Throughput
+    box = SimulatedTextbox()
+    full_checks = []
+
+    def detect_ng():
+        full_checks.append(1)
+        return box.ng_visible
+
+    submitter = ItemSubmitter(box, detect_ng, lambda: box.ng_visible)
+    samples = []
+    total_items = 0
+    total_seconds = 0.0
+    for frame in range(frames):
+        items = [f"{frame:04d}{n:013d}" for n in range(item_count)]
+        result = submitter.submit(items)
+        check(result.ok, f"frame {frame}: {format_result(result)}")
+        samples += [r.seconds * 1000 for r in result.results]
+        total_items += len(result.results)
+        total_seconds += result.seconds
+    check(box.received[-item_count:] == items, "items submitted out of order")
+    check(len(full_checks) == frames, f"{len(full_checks)} full NG checks for {frames} frames")
+
+    box = SimulatedTextbox()
+    start = time.perf_counter()
+    sleep_paced(box, ["A", "B"])
+    sleep_item = (time.perf_counter() - start) / 2
+    condition_rate = total_items / total_seconds
+    print(f"{frames} frames x {item_count} items, Shop-Flow takes 20-80 ms per item")
+    print(f"  sleeps    : {1 / sleep_item:6.2f} items/s, {sleep_item * 1000:6.0f} ms per item "
+          f"({sleep_item * item_count:.1f} s per frame)")
+    print(f"  condition : {condition_rate:6.2f} items/s, p50 {percentile(samples, 0.5):4.0f} ms, "
+          f"p99 {percentile(samples, 0.99):4.0f} ms ({total_seconds / frames:.1f} s per frame)")
+    print(f"  last frame: {format_result(result)}")
+    check(abs(items_per_second(result) * result.seconds - len(result.results)) < 1e-6, "items/s inconsistent")
+    check(condition_rate > 5 / SLEEP_PACING, "condition-based pacing is not faster than sleeps")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark - frame journal write latency and replay throughput
+
+  1. Write path as seen by the serial reader: append (commit) + mark
+     delivered, per frame, with synchronous=NORMAL and synchronous=FULL.
+  2. Replay: a backlog of pending frames drained by JournalReplayer with no
+     rate limit and a no-op Shop-Flow, i.e. the journal's own ceiling.
+     Replay order is checked; exits with status 1 if frames come out of order
+     or any frame is left pending.
+
+Runs in a temporary directory. No display, serial port or Shop-Flow needed.
+
+Usage: python benchmarks/bench_journal.py [frames]
+"""
+
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from frame_journal import FrameJournal, JournalReplayer, DELIVERED
+
+FRAME = "I42IDHL03HQM{:05d};" + ";".join(f"A{i:02d}" for i in range(20))
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+
+def bench_writes(directory, frames, synchronous):
+    journal = FrameJournal(os.path.join(directory, f"write_{synchronous}.db"), synchronous=synchronous)
+    latencies = []
+    for i in range(frames):
+        start = time.perf_counter()
+        frame_id = journal.append(FRAME.format(i))
+        journal.mark(frame_id, DELIVERED)
+        latencies.append(time.perf_counter() - start)
+    journal.close()
+    return latencies
+
+
+def make_handler(journal, delivered):
+    """Bare object with the attributes JournalReplayer touches"""
+    handler = types.SimpleNamespace(textbox=object(), delivery_lock=threading.Lock(), delivering=set())
+
+    def deliver_frame(data, frame_id, reply=True):
+        delivered.append(frame_id)
+        journal.mark(frame_id, DELIVERED)
+        return True
+    handler.deliver_frame = deliver_frame
+    return handler
+
+
+def bench_replay(directory, frames):
+    journal = FrameJournal(os.path.join(directory, "replay.db"))
+    expected = [journal.append(FRAME.format(i)) for i in range(frames)]
+    delivered = []
+    replayer = JournalReplayer(make_handler(journal, delivered), journal, rate=None)
+    start = time.perf_counter()
+    replayer.drain()
+    elapsed = time.perf_counter() - start
+    pending = journal.pending_count()
+    journal.close()
+    return elapsed, delivered == expected, pending
+
+
+def main():
+    frames = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Journal write latency ({frames} frames, append + mark delivered)")
+        for synchronous in ("NORMAL", "FULL"):
+            latencies = bench_writes(directory, frames, synchronous)
+            print(f"  synchronous={synchronous:6s} p50 {percentile(latencies, 50) * 1000:7.3f} ms   "
+                  f"p99 {percentile(latencies, 99) * 1000:7.3f} ms   "
+                  f"mean {statistics.mean(latencies) * 1000:7.3f} ms")
+
+        elapsed, in_order, pending = bench_replay(directory, frames)
+        print(f"Replay throughput: {frames} frames in {elapsed:.2f}s ({frames / elapsed:,.0f} frames/s, no rate limit)")
+        if not in_order:
+            print("FAIL: frames replayed out of order")
+            failed = True
+        if pending:
+            print(f"FAIL: {pending} frames left pending")
+            failed = True
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
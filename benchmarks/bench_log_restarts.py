@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Benchmark - per-record logging cost across many Start/Stop cycles
+
+Simulates the GUI attaching its log handler on every Start and detaching it
+on every Stop. The per-record cost must stay flat; the old behaviour (a new
+GUIHandler added on every Start) is shown for comparison. Exits with status 1
+if the cost grows by more than 50% or records are delivered more than once.
+No display needed.
+
+Usage: python benchmarks/bench_log_restarts.py [cycles] [records_per_cycle]
+"""
+
+import collections
+import logging
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gui_log import GUILogHandler
+
+
+def make_gui():
+    """Bare object with the attributes GUILogHandler touches"""
+    gui = types.SimpleNamespace(
+        error_count=0, success_count=0, data_count=0, last_data_text="N/A",
+        lines=collections.deque(maxlen=1000),
+    )
+    gui.log_message = lambda msg, tag="INFO": gui.lines.append((msg, tag))
+    return gui
+
+
+def time_records(logger, records):
+    start = time.perf_counter()
+    for i in range(records):
+        logger.info(f"Raw serial data received: STXI42IDHL03HQM{i:05d}ETX (Read time: 0.012s)")
+    return (time.perf_counter() - start) / records
+
+
+def run(cycles, records, legacy):
+    logger = logging.getLogger(f"bench_restarts_{'legacy' if legacy else 'new'}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    gui = make_gui()
+    handler = GUILogHandler(gui, logger=logger)
+    costs = []
+    for _ in range(cycles):
+        # Start
+        if legacy:
+            GUILogHandler(gui, logger=logger).attach()
+        else:
+            handler.attach()
+        costs.append(time_records(logger, records))
+        # Stop
+        if not legacy:
+            handler.detach()
+    # data_count should equal cycles * records when every record is handled once
+    duplicates = gui.data_count / float(cycles * records)
+    return costs, duplicates, len(logger.handlers)
+
+
+def main():
+    cycles = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    records = int(sys.argv[2]) if len(sys.argv) > 2 else 500
+
+    costs, dup, handlers = run(cycles, records, legacy=False)
+    window = min(10, len(costs))
+    first, last = sorted(costs[:window])[window // 2], sorted(costs[-window:])[window // 2]
+    print(f"attach/detach : first cycles {first * 1e6:7.2f} us/record, last cycles {last * 1e6:7.2f} us/record, "
+          f"deliveries/record {dup:.2f}, handlers left {handlers}")
+
+    legacy_cycles = min(cycles, 50)
+    lcosts, ldup, lhandlers = run(legacy_cycles, records, legacy=True)
+    print(f"legacy (x{legacy_cycles})  : first cycle {lcosts[0] * 1e6:7.2f} us/record, last cycle {lcosts[-1] * 1e6:7.2f} us/record, "
+          f"deliveries/record {ldup:.2f}, handlers left {lhandlers}")
+
+    if dup != 1.0 or handlers != 0 or last > first * 1.5:
+        print("FAIL: per-record cost is not constant across restarts")
+        sys.exit(1)
+    print("OK: per-record cost constant across restarts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Benchmark - UI-thread time to render 10k Activity Log records
+
+Compares the old per-record rendering (one root.after() + insert/see/index/
+delete per line) with BatchedLogView. Needs a display (run on a station PC
+or under Xvfb).
+
+Usage: python benchmarks/bench_log_widget.py [records] [max_log_lines]
+"""
+
+import os
+import sys
+import time
+import tkinter as tk
+from tkinter import scrolledtext
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from gui_log import BatchedLogView, LOG_FLUSH_MS
+
+
+def make_widget(root):
+    text = scrolledtext.ScrolledText(root, height=15, wrap=tk.WORD)
+    text.pack()
+    for tag, color in (("INFO", "black"), ("ERROR", "red"), ("SUCCESS", "green"), ("WARNING", "orange")):
+        text.tag_config(tag, foreground=color)
+    return text
+
+
+def sample_line(i):
+    return f"[12:00:00] 12:00:00 - INFO - Raw serial data received: STXI42IDHL03HQM{i:05d}ETX (Read time: 0.012s)\n"
+
+
+def bench_legacy(root, records, max_lines):
+    """One root.after(0, ...) per record, as GUIHandler.emit used to do"""
+    text = make_widget(root)
+    counter = tk.StringVar()
+
+    def log_message(line, tag):
+        text.insert(tk.END, line, tag)
+        text.see(tk.END)
+        lines = int(text.index('end-1c').split('.')[0])
+        if lines > max_lines:
+            text.delete('1.0', f'{lines - max_lines}.0')
+
+    for i in range(records):
+        root.after(0, lambda i=i: counter.set(str(i)))
+        root.after(0, lambda i=i: log_message(sample_line(i), "INFO"))
+
+    start = time.perf_counter()
+    root.update()
+    elapsed = time.perf_counter() - start
+    text.destroy()
+    return elapsed, records
+
+
+def bench_batched(root, records, max_lines, burst=200):
+    """Records arrive in bursts of `burst`; one flush per LOG_FLUSH_MS tick"""
+    text = make_widget(root)
+    counter = tk.StringVar()
+    count = [0]
+    view = BatchedLogView(root, text, max_lines=max_lines)
+    view.bind(lambda: count[0], lambda v: counter.set(str(v)))
+
+    for i in range(records):
+        view.append(sample_line(i), "INFO")
+        count[0] += 1
+        if (i + 1) % burst == 0:
+            view.flush()
+    view.flush()
+    text.destroy()
+    return view.flush_seconds, view.flush_count
+
+
+def main():
+    records = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    max_lines = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    root = tk.Tk()
+    root.withdraw()
+
+    legacy_s, legacy_calls = bench_legacy(root, records, max_lines)
+    batched_s, flushes = bench_batched(root, records, max_lines)
+    root.destroy()
+
+    print(f"Records: {records}, max_log_lines: {max_lines}, flush interval: {LOG_FLUSH_MS} ms")
+    print(f"  legacy  : {legacy_s * 1000:8.1f} ms UI time per {records} records ({legacy_calls} render calls)")
+    print(f"  batched : {batched_s * 1000:8.1f} ms UI time per {records} records ({flushes} flushes)")
+    if batched_s > 0:
+        print(f"  speedup : {legacy_s / batched_s:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
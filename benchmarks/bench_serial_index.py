@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - duplicate serial index lookups as the index grows
+
+Fills a SerialIndex with 20-serial frames up to `entries` serials and, at
+each checkpoint, times the check of one incoming frame:
+  new     : 20 unseen serials (answered by the Bloom filter)
+  repeat  : a frame with one serial packed earlier (confirmed in SQLite)
+  table   : 20 unseen serials looked up in SQLite without the filter
+Lookups must stay flat: p50 at the largest size within 3x of the first
+checkpoint. Also checks reopen (saved filter + catch-up after a crash),
+remove() and retention pruning. Exits with status 1 if a check fails.
+
+Usage: python benchmarks/bench_serial_index.py [entries] [lookups]
+"""
+
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serial_index import SerialIndex, BLOOM_SUFFIX
+
+CHECKPOINTS = (10_000, 100_000, 1_000_000, 3_000_000, 10_000_000)
+
+
+def serial(n):
+    return f"{n * 7919 % 10 ** 17:017d}"
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))]
+
+
+def timed(function, frames):
+    samples = []
+    for frame in frames:
+        start = time.perf_counter()
+        function(frame)
+        samples.append((time.perf_counter() - start) * 1e6)
+    return percentile(samples, 0.5), percentile(samples, 0.99)
+
+
+def main():
+    entries = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    lookups = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    checkpoints = [c for c in CHECKPOINTS if c < entries] + [entries]
+    failed = False
+    rng = random.Random(3)
+
+    def check(ok, message):
+        nonlocal failed
+        if not ok:
+            print(f"FAIL: {message}")
+            failed = True
+
+    with tempfile.TemporaryDirectory() as work:
+        path = os.path.join(work, "serials.db")
+        index = SerialIndex(path, retention_days=0, capacity=entries * 2)
+        table = sqlite3.connect(path, check_same_thread=False)
+        print(f"{'entries':>10} {'fill s':>7} {'new p50/p99 µs':>16} {'repeat p50/p99 µs':>18} "
+              f"{'table p50/p99 µs':>17}")
+        filled = 0
+        first_p50 = None
+        fill_start = time.perf_counter()
+        for target in checkpoints:
+            while filled < target:
+                count = min(20, target - filled)
+                index.add([serial(n) for n in range(filled, filled + count)])
+                filled += count
+            fill_seconds = time.perf_counter() - fill_start
+
+            fresh = [[serial(10 ** 9 + rng.randrange(10 ** 8)) for _ in range(20)] for _ in range(lookups)]
+            repeats = [frame[:19] + [serial(rng.randrange(filled))] for frame in fresh]
+            new_p50, new_p99 = timed(index.seen, fresh)
+            repeat_p50, repeat_p99 = timed(index.seen, repeats)
+
+            def table_lookup(frame):
+                table.execute(f"SELECT serial FROM serials WHERE serial IN ({','.join('?' * len(frame))})",
+                              frame).fetchall()
+            table_p50, table_p99 = timed(table_lookup, fresh)
+            print(f"{filled:>10,} {fill_seconds:7.1f} {new_p50:7.1f} / {new_p99:6.1f} "
+                  f"{repeat_p50:8.1f} / {repeat_p99:7.1f} {table_p50:8.1f} / {table_p99:6.1f}")
+
+            check(all(index.seen(frame) == [frame[-1]] for frame in repeats[:100]), "repeat not detected")
+            check(not any(index.seen(frame) for frame in fresh[:100]), "unseen serial reported as packed")
+            first_p50 = first_p50 or new_p50
+        check(new_p50 < first_p50 * 3, f"lookups grew from {first_p50:.1f} to {new_p50:.1f} µs")
+        hits_before = index.bloom_hits
+        fresh = [serial(2 * 10 ** 9 + n) for n in range(100_000)]
+        index.seen(fresh)
+        print(f"  filter: {len(index.bloom.words) * 8 / 1024 / 1024:.1f} MB for {index.bloom.capacity:,} keys, "
+              f"false positives {(index.bloom_hits - hits_before) / len(fresh) * 100:.2f}%")
+
+        # Reopen: saved filter; rows added after the save (crash) are caught up
+        index.close()
+        crashed = sqlite3.connect(path)
+        crashed.execute("INSERT INTO serials (serial, packed_at) VALUES (?, ?)", ("CRASHED0000000001", time.time()))
+        crashed.commit()
+        crashed.close()
+        start = time.perf_counter()
+        index = SerialIndex(path, retention_days=0, capacity=entries * 2)
+        reopen_ms = (time.perf_counter() - start) * 1000
+        check(index.seen(["CRASHED0000000001", serial(5)]) == ["CRASHED0000000001", serial(5)],
+              "rows added after the filter was saved were lost")
+        os.remove(path + BLOOM_SUFFIX)
+        index.close()
+        os.remove(path + BLOOM_SUFFIX)
+        start = time.perf_counter()
+        index = SerialIndex(path, retention_days=0, capacity=entries * 2)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+        print(f"  reopen: {reopen_ms:.0f} ms with the saved filter, {rebuild_ms:.0f} ms rebuilding it")
+
+        check(index.remove(serial(7)) and index.seen([serial(7)]) == [], "removed serial still reported")
+        index.close()
+
+        # Retention: old rows are pruned on open
+        small = os.path.join(work, "retention.db")
+        index = SerialIndex(small, retention_days=30, capacity=1000)
+        index.add(["OLD00000000000001", "NEW00000000000001"])
+        index.db.execute("UPDATE serials SET packed_at = ? WHERE serial = ?", (time.time() - 31 * 86400,
+                                                                              "OLD00000000000001"))
+        index.close()
+        index = SerialIndex(small, retention_days=30, capacity=1000)
+        check(index.seen(["OLD00000000000001", "NEW00000000000001"]) == ["NEW00000000000001"],
+              "retention did not prune old serials")
+        index.close()
+        table.close()
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
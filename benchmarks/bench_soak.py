@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Soak test - long runs of the real pipeline with resource growth tracking
+
+Drives frames through SerialToWinForms with the same fake scanner (pty) and
+simulated Shop-Flow as bench_e2e.py, for --frames frames or --hours hours.
+Every --sample-every frames it records:
+  traced_kb     Python heap (tracemalloc; off with --no-tracemalloc)
+  rss_kb        resident memory
+  threads       threading.active_count()
+  fds           open file descriptors / handles
+  log_handlers  handlers on the root logger
+  gc_objects    objects tracked by the garbage collector
+  tk_lines, tk_pending, tk_after   Activity Log lines, queued lines and
+                Tcl after() callbacks (--tk, needs a display)
+and reports the growth slope of each (least squares over the samples after
+warm-up, per 1M frames) with the object types and allocation sites that
+grew most. --restart-every N stops and recreates the handler every N frames
+like Start/Stop in the GUI. Exits with status 1 when a slope is over its
+limit (see LIMITS).
+
+Needs pyserial and a POSIX pty, like bench_e2e.py.
+
+Usage: python benchmarks/bench_soak.py [--frames 1000000] [--hours H] [--sample-every 10000]
+           [--items 20] [--restart-every N] [--tk] [--no-tracemalloc] [--csv samples.csv]
+"""
+
+import argparse
+import collections
+import gc
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+import serial
+from serial_to_winforms_bk6 import SerialToWinForms
+from framing import FramingProfile
+from serial_standin import PtyDevice
+from shopflow_standin import ShopFlowStandIn
+from bench_e2e import write_config, make_payload, rss_kb, ACK_TIMEOUT
+
+# metric -> (limit per 1M frames, growth over the run that must also be exceeded)
+LIMITS = {
+    "traced_kb": (2048, 512),
+    "rss_kb": (8192, 8192),   # SQLite page caches (2 MB per connection) fill up first
+    "threads": (1, 1),
+    "fds": (1, 1),
+    "log_handlers": (1, 1),
+    "gc_objects": (5000, 1000),
+    "tk_lines": (1, 1),
+    "tk_pending": (1, 1),
+    "tk_after": (1, 1),
+}
+WARMUP_SHARE = 0.2  # samples left out of the slope (caches filling up)
+MIN_TYPE_GROWTH = 100  # object types reported when they grew by at least this much
+
+
+class DiscardHandler(logging.Handler):
+    """Formats every record like a file handler would, then drops it"""
+    def emit(self, record):
+        self.format(record)
+
+
+class SoakGUI:
+    """The parts of the Control Panel the GUI log handler talks to"""
+    def __init__(self):
+        import tkinter as tk
+        from tkinter import scrolledtext
+        from gui_log import BatchedLogView
+        self.root = tk.Tk()
+        self.root.title("Soak")
+        self.text = scrolledtext.ScrolledText(self.root, height=15)
+        self.text.pack()
+        self.error_count = 0
+        self.success_count = 0
+        self.data_count = 0
+        self.last_data_text = ""
+        self.counter = tk.StringVar()
+        self.log_view = BatchedLogView(self.root, self.text)
+        self.log_view.bind(lambda: self.data_count, lambda v: self.counter.set(str(v)))
+        self.log_view.start()
+
+    def log_message(self, message, level="INFO"):
+        self.log_view.append(f"[{time.strftime('%H:%M:%S')}] {message}\n", level)
+
+    def sample(self):
+        self.root.update()
+        return {
+            "tk_lines": int(self.text.index('end-1c').split('.')[0]),
+            "tk_pending": len(self.log_view.pending),
+            "tk_after": len(self.root.tk.splitlist(self.root.tk.call('after', 'info'))),
+        }
+
+
+def open_fds():
+    try:
+        return len(os.listdir('/proc/self/fd'))
+    except OSError:
+        pass
+    try:
+        import psutil
+        process = psutil.Process()
+        return process.num_handles() if os.name == 'nt' else process.num_fds()
+    except (ImportError, AttributeError):
+        return None
+
+
+def slope(points):
+    """Least-squares slope of (x, y) points"""
+    n = len(points)
+    if n < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var if var else 0.0
+
+
+class Soak:
+    def __init__(self, args, work):
+        self.args = args
+        self.work = work
+        self.profile = FramingProfile(args.framing)
+        self.device = PtyDevice(self.profile)
+        self.shopflow = ShopFlowStandIn(args.process_delay, ng_rate=args.ng_rate)
+        self.config_path = write_config(work, args, self.device.port)
+        self.gui = SoakGUI() if args.tk else None
+        self.gui_handler = None
+        if self.gui:
+            from gui_log import GUILogHandler
+            self.gui_handler = GUILogHandler(self.gui)
+        self.handler = None
+        self.samples = []
+        self.acks = collections.Counter()
+        self.restarts = 0
+
+    def start_handler(self):
+        """As the GUI's Start: new handler, log handler attached"""
+        handler = SerialToWinForms(config_path=self.config_path, show_dialogs=False)
+        handler.serial_conn = serial.Serial(self.device.port, 115200, timeout=1)
+        handler.window, handler.textbox = self.shopflow.window, self.shopflow.textbox
+        handler.start_reader()
+        if self.gui_handler:
+            self.gui_handler.attach()
+        self.handler = handler
+
+    def stop_handler(self):
+        """As the GUI's Stop"""
+        handler, self.handler = self.handler, None
+        handler.stop()
+        handler.thread.join(5.0)
+        if self.gui_handler:
+            self.gui_handler.detach()
+
+    def past_warmup(self, frames, deadline):
+        """Baseline for object / allocation growth is taken once warm-up is over"""
+        if deadline is not None:
+            return time.monotonic() > deadline - self.args.hours * 3600 * (1 - WARMUP_SHARE)
+        return frames >= self.args.frames * WARMUP_SHARE
+
+    def sample(self, frames, start):
+        gc.collect()
+        sample = {
+            "frames": frames,
+            "seconds": time.perf_counter() - start,
+            "traced_kb": tracemalloc.get_traced_memory()[0] / 1024 if tracemalloc.is_tracing() else None,
+            "rss_kb": rss_kb(),
+            "threads": threading.active_count(),
+            "fds": open_fds(),
+            "log_handlers": len(logging.getLogger().handlers),
+            "gc_objects": len(gc.get_objects()),
+        }
+        if self.gui:
+            sample.update(self.gui.sample())
+        self.samples.append(sample)
+        return sample
+
+    def run(self):
+        args = self.args
+        self.start_handler()
+        deadline = time.monotonic() + args.hours * 3600 if args.hours else None
+        type_counts = None
+        snapshot = None
+        start = time.perf_counter()
+        frames = 0
+        try:
+            while frames < args.frames and (deadline is None or time.monotonic() < deadline):
+                self.device.send(self.profile.encode(make_payload(frames, args.items)))
+                ack, _ = self.device.wait_ack(ACK_TIMEOUT)
+                self.acks[ack] += 1
+                frames += 1
+                if self.gui and frames % 10 == 0:
+                    self.gui.root.update()
+                if args.restart_every and frames % args.restart_every == 0:
+                    self.stop_handler()
+                    self.start_handler()
+                    self.restarts += 1
+                if frames % args.sample_every == 0:
+                    sample = self.sample(frames, start)
+                    print(f"  {frames:>10,} frames {sample['seconds']:8.0f}s "
+                          f"{frames / sample['seconds']:7.1f} frames/s  rss {sample['rss_kb'] or 0:9.0f} KB  "
+                          f"threads {sample['threads']:3d}  fds {sample['fds']}", flush=True)
+                    if type_counts is None and self.past_warmup(frames, deadline):
+                        type_counts = collections.Counter(type(o).__name__ for o in gc.get_objects())
+                        snapshot = tracemalloc.take_snapshot() if tracemalloc.is_tracing() else None
+        finally:
+            self.stop_handler()
+            self.device.close()
+        sites = []
+        if snapshot is not None:
+            sites = tracemalloc.take_snapshot().compare_to(snapshot, 'lineno')[:8]
+            del snapshot
+        gc.collect()
+        growth = collections.Counter(type(o).__name__ for o in gc.get_objects())
+        growth.subtract(type_counts or {})
+        return frames, growth, sites
+
+
+def analyse(samples):
+    """(metric, first, last, slope per 1M frames, growth over the window, over limit) per metric"""
+    rows = []
+    usable = samples[int(len(samples) * WARMUP_SHARE):]
+    if len(usable) < 2:
+        return rows
+    span = usable[-1]["frames"] - usable[0]["frames"]
+    for metric, (per_million, minimum) in LIMITS.items():
+        points = [(s["frames"], s[metric]) for s in usable if s.get(metric) is not None]
+        if len(points) < 2:
+            continue
+        rate = slope(points)
+        grown = rate * span
+        rows.append((metric, points[0][1], points[-1][1], rate * 1e6, grown,
+                     rate * 1e6 > per_million and grown > minimum))
+    return rows
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Soak test: drive frames through the pipeline, track resource growth")
+    parser.add_argument('--frames', type=int, default=1_000_000)
+    parser.add_argument('--hours', type=float, default=None, help="stop after this long even if frames remain")
+    parser.add_argument('--sample-every', type=int, default=10_000, help="frames between samples")
+    parser.add_argument('--items', type=int, default=20, help="giftbox items per frame")
+    parser.add_argument('--mode', choices=['items', 'frame'], default='items', help="submit_mode of the handler")
+    parser.add_argument('--framing', default='ascii', help="framing profile (see framing.py)")
+    parser.add_argument('--process-delay', type=float, default=0.0, help="Shop-Flow time per submission (s)")
+    parser.add_argument('--ng-rate', type=float, default=0.0, help="share of submissions Shop-Flow rejects")
+    parser.add_argument('--restart-every', type=int, default=0, help="Stop/Start the handler every N frames")
+    parser.add_argument('--tk', action='store_true', help="feed the log into a Tk Activity Log (needs a display)")
+    parser.add_argument('--no-tracemalloc', action='store_true', help="skip heap tracing (it costs ~30%% CPU)")
+    parser.add_argument('--csv', help="write the samples to this file")
+    args = parser.parse_args(argv)
+    args.set_text_delay = 0.0
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, handlers=[DiscardHandler()],
+                        format='%(asctime)s - %(levelname)s - %(message)s', force=True)
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    with tempfile.TemporaryDirectory() as work:
+        soak = Soak(args, work)
+        print(f"Soak: {args.frames:,} frames x {args.items} items, {args.mode} mode, {args.framing} framing, "
+              f"sample every {args.sample_every:,}" + (f", restart every {args.restart_every:,}"
+                                                        if args.restart_every else ""))
+        frames, growth, sites = soak.run()
+    samples = soak.samples
+
+    if args.csv and samples:
+        columns = list(samples[-1])
+        with open(args.csv, "w", encoding="utf-8") as f:
+            f.write(",".join(columns) + "\n")
+            for sample in samples:
+                f.write(",".join("" if sample.get(c) is None else f"{sample[c]:g}" for c in columns) + "\n")
+
+    print(f"\n{frames:,} frames, acks {dict((k.decode() if k else 'timeout', v) for k, v in soak.acks.items())}, "
+          f"{soak.restarts} restarts")
+    rows = analyse(samples)
+    if not rows:
+        print("Not enough samples for slopes (lower --sample-every)")
+    print(f"  {'metric':14s} {'first':>12} {'last':>12} {'per 1M frames':>14} {'over run':>10}")
+    failed = False
+    for metric, first, last, per_million, grown, over in rows:
+        print(f"  {metric:14s} {first:12,.0f} {last:12,.0f} {per_million:+14,.1f} {grown:+10,.1f}"
+              f"{'   LEAK?' if over else ''}")
+        failed = failed or over
+    grown_types = [(name, count) for name, count in growth.most_common(8) if count >= MIN_TYPE_GROWTH]
+    if grown_types:
+        print("  object types that grew: " + ", ".join(f"{name} +{count}" for name, count in grown_types))
+    for stat in sites:
+        if stat.size_diff > 0:
+            print(f"  {stat.size_diff / 1024:+9.1f} KB {stat.count_diff:+7d} blocks  {stat.traceback}")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Benchmark - import time per module and time-to-ready for both entry points
+
+  1. `python -X importtime` for each entry module: total import time and the
+     slowest imported modules (cumulative).
+  2. Time-to-ready measured in a fresh interpreter:
+       service : imports + logging + handler constructed, ready to connect
+       gui     : imports + Tk window built and idle (needs a display)
+     Wall time includes interpreter startup. RSS is reported when available.
+
+Usage: python benchmarks/bench_startup.py [runs] [top_n]
+"""
+
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY_MODULES = ["serial_to_winforms_bk6", "serial_to_winforms_service", "serial_to_winforms_gui"]
+
+RSS_SNIPPET = """
+def _rss_mb():
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+"""
+
+SERVICE_READY = RSS_SNIPPET + """
+import json, time
+t0 = time.perf_counter()
+import serial_to_winforms_service as svc
+svc.setup_logging({log_dir!r})
+handler = svc.SerialToWinForms(config_path='config.json', show_dialogs=False)
+print(json.dumps({{"ready": time.perf_counter() - t0, "rss_mb": _rss_mb()}}))
+"""
+
+GUI_READY = RSS_SNIPPET + """
+import json, time
+t0 = time.perf_counter()
+import serial_to_winforms_gui as gui
+gui.setup_logging({log_dir!r})
+root = gui.tk.Tk()
+app = gui.SerialToWinFormsGUI(root)
+root.update()
+ready = time.perf_counter() - t0
+print(json.dumps({{"ready": ready, "rss_mb": _rss_mb()}}))
+app.quit_app()
+root.update()
+"""
+
+
+def import_times(module, top_n):
+    """Parse `-X importtime` output: (total_us, [(cumulative_us, name), ...])"""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            cwd=REPO_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None, result.stderr.strip().splitlines()[-1:]
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = (field.strip() for field in line[len("import time:"):].split("|"))
+        rows.append((int(cumulative_us), name))
+    total = next((us for us, name in rows if name == module), 0)
+    nested = sorted((row for row in rows if row[1] != module), reverse=True)
+    return total, nested[:top_n]
+
+
+def time_to_ready(snippet, runs):
+    readies, walls, rss = [], [], []
+    with tempfile.TemporaryDirectory() as log_dir:
+        code = snippet.format(log_dir=log_dir)
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run([sys.executable, "-c", code], cwd=REPO_DIR, capture_output=True, text=True)
+            wall = time.perf_counter() - start
+            if result.returncode != 0:
+                return None, result.stderr.strip().splitlines()[-1:]
+            data = json.loads(result.stdout.strip().splitlines()[0])
+            readies.append(data["ready"])
+            walls.append(wall)
+            if data["rss_mb"] is not None:
+                rss.append(data["rss_mb"])
+    return {
+        "ready_ms": statistics.median(readies) * 1000,
+        "wall_ms": statistics.median(walls) * 1000,
+        "rss_mb": statistics.median(rss) if rss else None,
+    }, None
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top_n = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+
+    print("=== Import time per entry module ===")
+    for module in ENTRY_MODULES:
+        total, detail = import_times(module, top_n)
+        if total is None:
+            print(f"{module}: import failed - {' '.join(detail)}")
+            continue
+        print(f"{module}: {total / 1000:.1f} ms")
+        for cumulative_us, name in detail:
+            print(f"    {cumulative_us / 1000:8.1f} ms  {name}")
+
+    print(f"\n=== Time to ready (median of {runs} runs) ===")
+    for name, snippet in (("service", SERVICE_READY), ("gui", GUI_READY)):
+        stats, error = time_to_ready(snippet, runs)
+        if stats is None:
+            print(f"{name:8}: failed - {' '.join(error)}")
+            continue
+        rss = f", RSS {stats['rss_mb']:.1f} MB" if stats["rss_mb"] is not None else ""
+        print(f"{name:8}: ready {stats['ready_ms']:7.1f} ms, wall (incl. interpreter) {stats['wall_ms']:7.1f} ms{rss}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - declarative transform chain
+
+Runs recorded-style giftbox payloads through a typical chain (trim, strip
+weight, map model prefix, append station code) and reports:
+  compiled : the fused callable used by the bridge (one split/join)
+  stages   : stage by stage, with the cost of each stage
+Checks the chain against expected outputs, per-target selection, invalid
+chains and `python transform.py` on a recorded file. Exits with status 1 if
+a check fails.
+
+Usage: python benchmarks/bench_transform.py [payloads]
+"""
+
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+from transform import compile_transforms, check_recorded
+
+CHAIN = [
+    {"op": "trim"},
+    {"op": "drop_empty"},
+    {"op": "strip_weight"},
+    {"op": "map_prefix", "map": {"0146": "9146"}},
+    {"op": "append", "text": ";ST01"},
+]
+
+RECORDED = [
+    ("01462008114854321I44HK24AZCK5240DKR00009.00",
+     "91462008114854321I44HK24AZCK5240DKR;ST01"),
+    (" 01462008114854321I44HK24AZCK5240DKR00009.00 ;02462008114854322I44HK24AZCK5240DKR00010.50;",
+     "91462008114854321I44HK24AZCK5240DKR;02462008114854322I44HK24AZCK5240DKR;ST01"),
+    ("RESETX", "RESETX;ST01"),
+]
+
+
+def make_payload(rng):
+    return ";".join(f"0146{rng.randrange(10 ** 12, 10 ** 13)}I44HK24AZCK{rng.randrange(1000, 9999)}DKR"
+                    f"{rng.uniform(1, 99):08.2f}" for _ in range(20))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    failed = False
+
+    def check(ok, message):
+        nonlocal failed
+        if not ok:
+            print(f"FAIL: {message}")
+            failed = True
+
+    pipeline = compile_transforms(CHAIN)
+    for payload, expected in RECORDED:
+        result = pipeline(payload)
+        check(result == expected, f"{payload!r} -> {result!r}, expected {expected!r}")
+        check(pipeline.timed(payload)[0] == result, f"stage-by-stage differs for {payload!r}")
+
+    per_target = {"Shop-Flow A": [{"op": "prefix", "text": "A:"}], "*": [{"op": "upper"}]}
+    check(compile_transforms(per_target, "Shop-Flow A")("x") == "A:x", "per-target chain not selected")
+    check(compile_transforms(per_target, "Other")("x") == "X", "'*' chain not used")
+    check(compile_transforms(None)("x") == "x", "empty chain changed the payload")
+    reorder = compile_transforms([{"op": "fields", "keep": ["model", "serial"]}])
+    check(reorder(RECORDED[0][0]) == "I44HK24AZCK01462008114854321", "fields reorder wrong")
+    for bad in ([{"op": "nope"}], [{"op": "append"}], [{"op": "fields", "keep": ["colour"]}], ["trim"]):
+        try:
+            compile_transforms(bad)
+            check(False, f"invalid chain {bad} accepted")
+        except ValueError as e:
+            print(f"  rejected: {e}")
+
+    with tempfile.TemporaryDirectory() as work:
+        config_path = os.path.join(work, "config.json")
+        recorded_path = os.path.join(work, "recorded.txt")
+        with open(config_path, "w", encoding="utf-8") as f:
+            json.dump({"target_app_title": "Shop-Flow", "transforms": CHAIN}, f)
+        with open(recorded_path, "w", encoding="utf-8") as f:
+            f.writelines(f"{payload}\t{expected}\n" for payload, expected in RECORDED)
+        cli = subprocess.run([sys.executable, os.path.join(ROOT, "transform.py"), config_path, recorded_path],
+                             capture_output=True, text=True)
+        check(cli.returncode == 0, f"transform.py check failed:\n{cli.stdout}{cli.stderr}")
+        with open(recorded_path, "a", encoding="utf-8") as f:
+            f.write("abc\twrong\n")
+        cli = subprocess.run([sys.executable, os.path.join(ROOT, "transform.py"), config_path, recorded_path],
+                             capture_output=True, text=True)
+        check(cli.returncode == 1, "transform.py did not report a mismatch")
+
+    rng = random.Random(5)
+    payloads = [make_payload(rng) for _ in range(count)]
+    start = time.perf_counter()
+    for payload in payloads:
+        pipeline(payload)
+    compiled_us = (time.perf_counter() - start) / count * 1e6
+    _, _, totals = check_recorded(pipeline, payloads)
+    print(f"{count} payloads x 20 records, chain: {pipeline}")
+    print(f"  compiled : {compiled_us:7.2f} µs per payload ({count / (compiled_us * count / 1e6):,.0f} payloads/s)")
+    print(f"  stages   : {sum(totals.values()) / count * 1e6:7.2f} µs per payload")
+    for name, seconds in totals.items():
+        print(f"    {name:12s} {seconds / count * 1e6:7.2f} µs")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
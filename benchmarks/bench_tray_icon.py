@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Benchmark - tray icon updates over a simulated idle hour
+
+Replays one monitor tick per second for an hour (3600 ticks) with a few
+state changes (degraded, recovering, back to ready) and counts how often the
+tray icon is pushed and redrawn. The old behaviour (new image + push on every
+tick) is shown for comparison. Exits with status 1 if icon pushes exceed the
+number of state transitions or an image is drawn more than once per state.
+No display and no PIL needed.
+
+Usage: python benchmarks/bench_tray_icon.py [ticks]
+"""
+
+import os
+import sys
+import time
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from tray_icon import TrayIconCache, tray_state
+from health_check import HealthStatus
+
+
+class FakeIcon:
+    """Counts assignments to pystray.Icon.icon"""
+    def __init__(self):
+        self.pushes = 0
+        self._icon = None
+
+    @property
+    def icon(self):
+        return self._icon
+
+    @icon.setter
+    def icon(self, image):
+        self._icon = image
+        self.pushes += 1
+
+
+def make_draw(counter):
+    def draw(state):
+        counter[state] = counter.get(state, 0) + 1
+        return types.SimpleNamespace(state=state)
+    return draw
+
+
+def timeline(ticks):
+    """(supervisor_state, health) per tick: mostly ready, one outage mid-hour"""
+    healthy = HealthStatus(True, True, 0.0, 0.0, 0.0, "")
+    serial_down = HealthStatus(False, True, 0.0, 0.0, 0.0, "")
+    outage = ticks // 2
+    for tick in range(ticks):
+        if tick < 3:
+            yield "connecting", healthy
+        elif outage <= tick < outage + 20:
+            yield "degraded", serial_down
+        elif outage + 20 <= tick < outage + 22:
+            yield "recovering", serial_down
+        elif tick >= ticks - 600:
+            yield "idle", healthy
+        else:
+            yield "ready", healthy
+
+
+def run_cached(ticks):
+    draws = {}
+    cache = TrayIconCache(draw=make_draw(draws))
+    cache.preload()
+    icon = FakeIcon()
+    transitions = 0
+    previous = None
+    start = time.perf_counter()
+    for supervisor_state, health in timeline(ticks):
+        state = tray_state(True, supervisor_state, health)
+        if state != previous:
+            transitions += 1
+            previous = state
+        cache.apply(icon, state)
+    return icon.pushes, sum(draws.values()), max(draws.values()), transitions, time.perf_counter() - start
+
+
+def run_legacy(ticks):
+    draws = {}
+    draw = make_draw(draws)
+    icon = FakeIcon()
+    start = time.perf_counter()
+    for supervisor_state, health in timeline(ticks):
+        icon.icon = draw(tray_state(True, supervisor_state, health))
+    return icon.pushes, sum(draws.values()), time.perf_counter() - start
+
+
+def main():
+    ticks = int(sys.argv[1]) if len(sys.argv) > 1 else 3600
+
+    legacy_pushes, legacy_draws, legacy_seconds = run_legacy(ticks)
+    pushes, draws, max_per_state, transitions, seconds = run_cached(ticks)
+
+    print(f"Simulated {ticks} monitor ticks ({ticks / 3600:.1f} h)")
+    print(f"  legacy: {legacy_pushes:6d} icon pushes, {legacy_draws:6d} images drawn ({legacy_seconds * 1000:.2f} ms)")
+    print(f"  cached: {pushes:6d} icon pushes, {draws:6d} images drawn ({seconds * 1000:.2f} ms), "
+          f"{transitions} state transitions")
+
+    failed = False
+    if pushes > transitions:
+        print(f"FAIL: {pushes} icon pushes for {transitions} state transitions")
+        failed = True
+    if max_per_state > 1:
+        print(f"FAIL: an image was drawn {max_per_state} times")
+        failed = True
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
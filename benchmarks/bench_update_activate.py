@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - side-by-side install, activation and rollback
+
+Installs release 1.0.1 (a large "exe", _internal modules, version.txt) next
+to a config.json, stages 1.0.2 from the local FTP stand-in (delta and zip)
+and compares:
+  extract  : old apply_update(), update.zip extracted over the install
+  prepare  : versions/1.0.2 built and verified, install untouched
+  activate : rename switch to 1.0.2
+  rollback : rename switch back to 1.0.1
+Checks that every switch leaves an install matching its manifest, that
+config.json is never touched, and that a corrupt staging folder or a failed
+switch keeps 1.0.1 running. Exits with status 1 if a check fails.
+
+Usage: python benchmarks/bench_update_activate.py [exe_size_mb]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import update_client
+from update_client import (FTPUpdateClient, UpdateError, build_manifest, plan_delta, prepare_version, activate,
+                           rollback, read_active, FILES_DIR)
+from ftp_standin import FTPStandIn
+from bench_update_delta import write_release, publish
+
+CONFIG = b'{"port": "COM3"}'
+
+
+def make_install(release, install):
+    shutil.rmtree(install, ignore_errors=True)
+    shutil.copytree(release, install)
+    with open(os.path.join(install, "config.json"), "wb") as f:
+        f.write(CONFIG)
+
+
+def main():
+    exe_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    failed = False
+
+    def check(ok, message):
+        nonlocal failed
+        if not ok:
+            print(f"FAIL: {message}")
+            failed = True
+
+    with tempfile.TemporaryDirectory() as work:
+        old_release = os.path.join(work, "release_101")
+        new_release = os.path.join(work, "release_102")
+        server_dir = os.path.join(work, "server")
+        install = os.path.join(work, "install")
+        staging = os.path.join(install, "update_staging")
+        write_release(old_release, "1.0.1", os.urandom(int(exe_mb * 1024 * 1024)))
+        write_release(new_release, "1.0.2", os.urandom(int(exe_mb * 1024 * 1024)))
+        old_manifest = build_manifest(old_release, "1.0.1")
+        new_manifest = build_manifest(new_release, "1.0.2")
+        publish(server_dir, new_release, "1.0.2")
+
+        def config_intact():
+            with open(os.path.join(install, "config.json"), "rb") as f:
+                return f.read() == CONFIG
+
+        # Old flow: extract over the running install
+        make_install(old_release, install)
+        start = time.perf_counter()
+        with zipfile.ZipFile(os.path.join(server_dir, "update.zip"), "r") as zip_ref:
+            zip_ref.extractall(install)
+        extract_ms = (time.perf_counter() - start) * 1000
+
+        server = FTPStandIn(server_dir).start()
+        client = FTPUpdateClient("127.0.0.1", "update", "update", "", port=server.port)
+        print(f"exe {exe_mb:.0f} MB")
+        print(f"  extract over install : {extract_ms:8.1f} ms (install half-updated meanwhile)")
+        try:
+            for kind in ("delta", "zip"):
+                make_install(old_release, install)
+                if kind == "zip":
+                    os.remove(os.path.join(server_dir, "manifest.json"))
+                info = client.stage_update(install, staging)
+                check(info['kind'] == kind, f"staged {info['kind']} instead of {kind}")
+
+                start = time.perf_counter()
+                version = prepare_version(install, staging)
+                prepare_ms = (time.perf_counter() - start) * 1000
+                check(not plan_delta(old_manifest, install), f"{kind}: prepare touched the active install")
+
+                activate_ms = activate(install, version)
+                check(not plan_delta(new_manifest, install), f"{kind}: active install is not 1.0.2")
+
+                previous, rollback_ms = rollback(install)
+                check(previous == "1.0.1" and not plan_delta(old_manifest, install),
+                      f"{kind}: rollback did not restore 1.0.1")
+
+                forward, forward_ms = rollback(install)
+                check(forward == "1.0.2" and not plan_delta(new_manifest, install),
+                      f"{kind}: roll forward did not restore 1.0.2")
+                check(config_intact(), f"{kind}: config.json changed")
+                check(sorted(os.listdir(os.path.join(install, "versions"))) == ["1.0.1", "active.json"],
+                      f"{kind}: unexpected versions/ content")
+                print(f"  {kind:5s} prepare        : {prepare_ms:8.1f} ms (bridge still running)")
+                print(f"  {kind:5s} activate       : {activate_ms:8.1f} ms")
+                print(f"  {kind:5s} rollback       : {rollback_ms:8.1f} ms, roll forward {forward_ms:.1f} ms")
+
+            # Corrupt staging: a delta file disappears before install
+            publish(server_dir, new_release, "1.0.2")
+            make_install(old_release, install)
+            client.stage_update(install, staging)
+            os.remove(os.path.join(staging, FILES_DIR, "SerialToWinForms.exe"))
+            try:
+                prepare_version(install, staging)
+                check(False, "incomplete staging was prepared")
+            except (OSError, UpdateError) as e:
+                check(not plan_delta(old_manifest, install) and read_active(install)['current'] == "1.0.1",
+                      "corrupt staging changed the install")
+                print(f"  corrupt staging      : rejected ({type(e).__name__}), 1.0.1 kept")
+
+            # Failed switch: the third rename fails (file in use)
+            client.stage_update(install, staging)
+            version = prepare_version(install, staging)
+            real_replace = os.replace
+            calls = [0]
+
+            def flaky_replace(src, dst):
+                calls[0] += 1
+                if calls[0] == 3:
+                    raise PermissionError("file in use")
+                return real_replace(src, dst)
+            update_client.os.replace = flaky_replace
+            try:
+                activate(install, version)
+                check(False, "failed switch reported success")
+            except UpdateError as e:
+                update_client.os.replace = real_replace
+                check(not plan_delta(old_manifest, install) and config_intact(), "failed switch left a mixed install")
+                print(f"  failed switch        : undone, 1.0.1 kept ({e})")
+            finally:
+                update_client.os.replace = real_replace
+        finally:
+            client.close()
+            server.stop()
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
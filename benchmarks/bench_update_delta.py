@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - delta update against a local FTP stand-in
+
+Publishes release 1.0.1 (a large "exe" plus small files) on a local FTP
+server, installs it, then publishes 1.0.2 where a single small file changed.
+Compares the delta update with the full update.zip download (bytes and
+time), then checks that:
+  - the install matches the 1.0.2 manifest afterwards,
+  - a second run transfers only the manifest,
+  - a file corrupted on the server is rejected and nothing is replaced.
+Exits with status 1 if any check fails. No display needed.
+
+Usage: python benchmarks/bench_update_delta.py [exe_size_mb]
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from update_client import (FTPUpdateClient, UpdateError, build_manifest, plan_delta, format_stats,
+                           MANIFEST_NAME, FILES_DIR)
+from ftp_standin import FTPStandIn
+
+
+def write_release(release_dir, version, exe_bytes):
+    os.makedirs(os.path.join(release_dir, "_internal"), exist_ok=True)
+    with open(os.path.join(release_dir, "SerialToWinForms.exe"), "wb") as f:
+        f.write(exe_bytes)
+    with open(os.path.join(release_dir, "version.txt"), "w") as f:
+        f.write(version)
+    for i in range(20):
+        with open(os.path.join(release_dir, "_internal", f"module_{i:02d}.pyd"), "wb") as f:
+            f.write(bytes([i]) * 50_000)
+
+
+def publish(server_dir, release_dir, version):
+    """Server layout: manifest.json, files/<path>, update.zip, version.txt"""
+    shutil.rmtree(server_dir, ignore_errors=True)
+    shutil.copytree(release_dir, os.path.join(server_dir, FILES_DIR))
+    with open(os.path.join(server_dir, MANIFEST_NAME), "w") as f:
+        json.dump(build_manifest(release_dir, version), f)
+    with zipfile.ZipFile(os.path.join(server_dir, "update.zip"), "w", zipfile.ZIP_DEFLATED) as z:
+        for base, _, names in os.walk(release_dir):
+            for name in names:
+                path = os.path.join(base, name)
+                z.write(path, os.path.relpath(path, release_dir))
+    shutil.copy(os.path.join(release_dir, "version.txt"), os.path.join(server_dir, "version.txt"))
+
+
+def main():
+    exe_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    failed = False
+    with tempfile.TemporaryDirectory() as work:
+        release = os.path.join(work, "release")
+        server_dir = os.path.join(work, "server")
+        install = os.path.join(work, "install")
+        staging = os.path.join(work, "staging")
+
+        exe_bytes = os.urandom(int(exe_mb * 1024 * 1024))
+        write_release(release, "1.0.1", exe_bytes)
+        shutil.copytree(release, install)
+
+        # 1.0.2: one small module changed
+        with open(os.path.join(release, "_internal", "module_07.pyd"), "wb") as f:
+            f.write(b"fixed" * 10_000)
+        with open(os.path.join(release, "version.txt"), "w") as f:
+            f.write("1.0.2")
+        publish(server_dir, release, "1.0.2")
+
+        server = FTPStandIn(server_dir).start()
+        client = FTPUpdateClient("127.0.0.1", "update", "update", "", port=server.port)
+        try:
+            # Full download for comparison
+            start = time.monotonic()
+            client.download("update.zip", os.path.join(work, "update.zip"))
+            client.close()
+            full_seconds = time.monotonic() - start
+            full_bytes = os.path.getsize(os.path.join(work, "update.zip"))
+            print(f"full update.zip : {full_bytes / 1024:8.0f} KB in {full_seconds:.2f}s")
+
+            stats = client.delta_update(install, staging)
+            print(f"delta update    : {stats.bytes_transferred / 1024:8.0f} KB in {stats.seconds:.2f}s "
+                  f"({format_stats(stats)})")
+            print(f"saved           : {(1 - stats.bytes_transferred / full_bytes) * 100:.1f}% of the transfer")
+
+            manifest = build_manifest(release, "1.0.2")
+            if plan_delta(manifest, install):
+                print("FAIL: install does not match the 1.0.2 manifest")
+                failed = True
+
+            again = client.delta_update(install, staging)
+            if again.files_changed or again.bytes_transferred != client.manifest_bytes:
+                print(f"FAIL: second run transferred {again.bytes_transferred} bytes")
+                failed = True
+
+            # Corrupted upload: served bytes no longer match the manifest
+            with open(os.path.join(install, "version.txt"), "w") as f:
+                f.write("1.0.1")
+            with open(os.path.join(server_dir, FILES_DIR, "version.txt"), "w") as f:
+                f.write("1.0.X")
+            try:
+                client.delta_update(install, staging)
+                print("FAIL: corrupted file was accepted")
+                failed = True
+            except UpdateError as e:
+                with open(os.path.join(install, "version.txt")) as f:
+                    untouched = f.read() == "1.0.1"
+                print(f"corrupted file  : rejected ({e}), install untouched: {untouched}")
+                failed = failed or not untouched
+        finally:
+            server.stop()
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
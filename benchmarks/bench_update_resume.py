@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark - update.zip download with injected disconnects
+
+Serves a random "update.zip" from the local FTP stand-in, which cuts the
+connection `drops` times after `drop_mb` MB, and compares:
+  restart : old behaviour, 8 KB blocks, every drop starts over from zero
+  resume  : FTPUpdateClient.download, 64 KB blocks, REST offset after a drop
+Reports bytes sent by the server, wall time, reconnects and progress
+callbacks (per block vs throttled), plus clean-line throughput per block
+size. Exits with status 1 if the resumed file fails verification, a bad
+checksum is accepted, or resume sends more than the file size plus one block
+per drop.
+
+Usage: python benchmarks/bench_update_resume.py [size_mb] [drops] [drop_mb]
+"""
+
+import hashlib
+import os
+import sys
+import tempfile
+import time
+from ftplib import FTP
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from update_client import FTPUpdateClient, UpdateError, throttled, file_sha256
+from ftp_standin import FTPStandIn
+
+
+def restart_download(port, path, block_size=8192):
+    """Old download_update(): retrbinary from zero, one UI update per block"""
+    attempts = 0
+    callbacks = 0
+    while True:
+        attempts += 1
+        try:
+            ftp = FTP()
+            ftp.connect("127.0.0.1", port, timeout=10)
+            ftp.login("update", "update")
+            with open(path, "wb") as f:
+                def callback(data):
+                    nonlocal callbacks
+                    f.write(data)
+                    callbacks += 1
+                ftp.retrbinary("RETR update.zip", callback, block_size)
+            ftp.quit()
+            return attempts - 1, callbacks
+        except (OSError, EOFError):
+            continue
+
+
+def resume_download(client, path, size, sha256):
+    callbacks = 0
+    done = 0
+
+    def on_progress(done, total):
+        nonlocal callbacks
+        callbacks += 1
+    report = throttled(on_progress)
+
+    def on_block(n):
+        nonlocal done
+        done += n
+        report(done, size)
+    client.download("update.zip", path, size, sha256, on_block)
+    return client.reconnects, callbacks
+
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    drops = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    drop_mb = float(sys.argv[3]) if len(sys.argv) > 3 else size_mb / (drops + 1)
+    failed = False
+    with tempfile.TemporaryDirectory() as work:
+        server_dir = os.path.join(work, "server")
+        os.makedirs(server_dir)
+        payload = os.urandom(int(size_mb * 1024 * 1024))
+        with open(os.path.join(server_dir, "update.zip"), "wb") as f:
+            f.write(payload)
+        size = len(payload)
+        sha256 = hashlib.sha256(payload).hexdigest()
+        drop_after = int(drop_mb * 1024 * 1024)
+        print(f"update.zip {size_mb:.0f} MB, {drops} disconnects after {drop_mb:.0f} MB each")
+
+        server = FTPStandIn(server_dir, drop_after=drop_after, drops=drops).start()
+        start = time.monotonic()
+        retries, callbacks = restart_download(server.port, os.path.join(work, "restart.zip"))
+        print(f"  restart : {server.bytes_sent / 1024 / 1024:7.1f} MB sent, {time.monotonic() - start:5.2f}s, "
+              f"{retries} restarts, {callbacks} progress callbacks")
+        server.stop()
+
+        server = FTPStandIn(server_dir, drop_after=drop_after, drops=drops).start()
+        client = FTPUpdateClient("127.0.0.1", "update", "update", "", port=server.port, retry_delay=0.05)
+        path = os.path.join(work, "resume.zip")
+        start = time.monotonic()
+        reconnects, callbacks = resume_download(client, path, size, sha256)
+        client.close()
+        print(f"  resume  : {server.bytes_sent / 1024 / 1024:7.1f} MB sent, {time.monotonic() - start:5.2f}s, "
+              f"{reconnects} reconnects, {callbacks} progress callbacks")
+        if file_sha256(path) != sha256:
+            print("FAIL: resumed file does not match")
+            failed = True
+        if server.bytes_sent > size + drops * client.block_size:
+            print("FAIL: resume re-sent data")
+            failed = True
+        server.stop()
+
+        server = FTPStandIn(server_dir).start()
+        bad = FTPUpdateClient("127.0.0.1", "update", "update", "", port=server.port)
+        try:
+            bad.download("update.zip", os.path.join(work, "bad.zip"), size, "0" * 64)
+            print("FAIL: wrong checksum accepted")
+            failed = True
+        except UpdateError as e:
+            print(f"  verify  : {e} -> rejected, file kept: {os.path.exists(os.path.join(work, 'bad.zip'))}")
+        bad.close()
+
+        print("Clean line throughput by block size")
+        for block_size in (8192, 65536, 262144):
+            client = FTPUpdateClient("127.0.0.1", "update", "update", "", port=server.port, block_size=block_size)
+            path = os.path.join(work, f"clean_{block_size}.zip")
+            start = time.monotonic()
+            client.download("update.zip", path, size, sha256)
+            elapsed = time.monotonic() - start
+            client.close()
+            os.remove(path)
+            print(f"  {block_size // 1024:4d} KB blocks: {size / elapsed / 1024 / 1024:7.1f} MB/s (incl. SHA-256)")
+        server.stop()
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
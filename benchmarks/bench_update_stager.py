@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - background pre-staging and swap at idle
+
+Publishes 1.0.2 on the local FTP stand-in over an installed 1.0.1 and
+compares the station downtime of:
+  inline : old flow, download + install while the bridge is stopped
+  staged : UpdateStager downloads in the background, the swap only installs
+Also checks that the swap waits for the idle period, that the install matches
+the manifest afterwards, and that an update staged before a restart is picked
+up again. Exits with status 1 if a check fails. No display needed.
+
+Usage: python benchmarks/bench_update_stager.py [exe_size_mb] [latency_ms]
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from update_client import FTPUpdateClient, apply_staged, build_manifest, plan_delta
+from update_stager import UpdateStager
+from ftp_standin import FTPStandIn
+from bench_update_delta import write_release, publish
+
+
+def main():
+    exe_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 30
+    latency = float(sys.argv[2]) / 1000 if len(sys.argv) > 2 else 0.02
+    failed = False
+    with tempfile.TemporaryDirectory() as work:
+        release = os.path.join(work, "release")
+        server_dir = os.path.join(work, "server")
+        write_release(release, "1.0.1", os.urandom(int(exe_mb * 1024 * 1024)))
+        inline_dir = os.path.join(work, "inline")
+        staged_dir = os.path.join(work, "staged")
+        shutil.copytree(release, inline_dir)
+        shutil.copytree(release, staged_dir)
+
+        # 1.0.2 rebuilds the exe
+        write_release(release, "1.0.2", os.urandom(int(exe_mb * 1024 * 1024)))
+        publish(server_dir, release, "1.0.2")
+        server = FTPStandIn(server_dir, latency=latency).start()
+
+        def client():
+            return FTPUpdateClient("127.0.0.1", "update", "update", "", port=server.port)
+        try:
+            start = time.monotonic()
+            client().delta_update(inline_dir, os.path.join(work, "inline_staging"))
+            inline_downtime = time.monotonic() - start
+
+            installed = ["1.0.1"]
+            stager = UpdateStager(client(), staged_dir, lambda: installed[0], swap_idle_minutes=10)
+            start = time.monotonic()
+            info = stager.check()
+            staging_seconds = time.monotonic() - start
+
+            if stager.ready_to_swap(idle_seconds=60):
+                print("FAIL: swap allowed while the line was busy")
+                failed = True
+            if not stager.ready_to_swap(idle_seconds=600):
+                print("FAIL: staged update not ready at idle")
+                failed = True
+
+            # Restarted program finds the staged update again
+            again = UpdateStager(client(), staged_dir, lambda: installed[0])
+            if not again.staged or again.staged['version'] != info['version']:
+                print("FAIL: staged update lost across restart")
+                failed = True
+
+            start = time.monotonic()
+            installed[0] = apply_staged(stager.staging_dir, staged_dir)
+            staged_downtime = time.monotonic() - start
+
+            if plan_delta(build_manifest(release, "1.0.2"), staged_dir):
+                print("FAIL: staged install does not match 1.0.2")
+                failed = True
+            if UpdateStager(client(), staged_dir, lambda: installed[0]).staged:
+                print("FAIL: installed update still reported as staged")
+                failed = True
+        finally:
+            server.stop()
+
+        print(f"exe {exe_mb:.0f} MB, {latency * 1000:.0f} ms per FTP reply")
+        print(f"  inline : downtime {inline_downtime * 1000:8.1f} ms (download + install)")
+        print(f"  staged : downtime {staged_downtime * 1000:8.1f} ms (install only), "
+              f"background staging {staging_seconds:.2f}s, {info['bytes_transferred'] / 1024:.0f} KB")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
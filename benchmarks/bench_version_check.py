@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Benchmark / check - version polling against the local FTP stand-in
+
+Compares the old update_script check (new session, latest_version.txt
+written to the working directory, read back, deleted) with VersionChecker:
+  read     : first check, version.txt read into memory
+  metadata : SIZE/MDTM unchanged, no data connection
+  cached   : within the TTL, no server round trip at all
+and checks that:
+  - versions compare numerically (1.0.10 > 1.0.9, 1.2 == 1.2.0, rc < release),
+  - a republished version.txt is picked up, also when MDTM is unsupported,
+  - nothing is written to the working directory,
+  - UpdateStager does not treat 1.1.9 as newer than 1.1.10.
+Exits with status 1 if a check fails.
+
+Usage: python benchmarks/bench_version_check.py [latency_ms] [checks]
+"""
+
+import os
+import sys
+import tempfile
+import time
+from ftplib import FTP
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from update_client import FTPUpdateClient
+from update_stager import UpdateStager
+from version_check import VersionChecker, version_key, is_newer
+from ftp_standin import FTPStandIn
+
+COMPARISONS = [
+    ("1.0.10", "1.0.9", True),
+    ("1.0.9", "1.0.10", False),
+    ("2.0", "1.99.99", True),
+    ("1.2", "1.2.0", False),
+    ("1.2.0", "1.2", False),
+    ("v1.3.0", "1.2.9", True),
+    ("1.2.0", "1.2.0-rc1", True),
+    ("1.2.0-rc2", "1.2.0-rc1", True),
+    ("1.2.0-rc1", "1.2.0", False),
+    ("1.0.1b", "1.0.1a", True),
+    (None, "1.0.0", False),
+    ("", "1.0.0", False),
+]
+
+
+def old_get_latest_version(port):
+    """update_script.get_latest_version() before the shared checker"""
+    ftp = FTP()
+    ftp.connect("127.0.0.1", port, timeout=10)
+    ftp.login("update", "update")
+    with open("latest_version.txt", "wb") as file:
+        ftp.retrbinary("RETR version.txt", file.write)
+    ftp.quit()
+    with open("latest_version.txt", "r") as file:
+        latest_version = file.read().strip()
+    os.remove("latest_version.txt")
+    return latest_version
+
+
+def publish_version(server_dir, version, mtime):
+    path = os.path.join(server_dir, "version.txt")
+    with open(path, "w") as f:
+        f.write(version)
+    os.utime(path, (mtime, mtime))
+
+
+def timed(function, checks):
+    start = time.perf_counter()
+    for _ in range(checks):
+        result = function()
+    return result, (time.perf_counter() - start) * 1000 / checks
+
+
+def main():
+    latency = float(sys.argv[1]) / 1000 if len(sys.argv) > 1 else 0.02
+    checks = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    failed = False
+
+    def check(ok, message):
+        nonlocal failed
+        if not ok:
+            print(f"FAIL: {message}")
+            failed = True
+
+    for latest, current, expected in COMPARISONS:
+        check(is_newer(latest, current) == expected, f"is_newer({latest!r}, {current!r}) != {expected}")
+    check(version_key("1.2") == version_key("1.2.0"), "1.2 != 1.2.0")
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as work:
+        server_dir = os.path.join(work, "server")
+        run_dir = os.path.join(work, "run")
+        os.makedirs(server_dir)
+        os.makedirs(run_dir)
+        os.chdir(run_dir)
+        base_time = time.time() - 3600
+        publish_version(server_dir, "1.0.9", base_time)
+
+        server = FTPStandIn(server_dir, latency=latency).start()
+
+        def client():
+            return FTPUpdateClient("127.0.0.1", "update", "update", "", port=server.port)
+        try:
+            print(f"{latency * 1000:.0f} ms per FTP reply, {checks} checks each")
+            _, old_ms = timed(lambda: old_get_latest_version(server.port), checks)
+            print(f"  old (temp file)  : {old_ms:7.1f} ms per check")
+
+            checker = VersionChecker(client(), ttl=0)
+            version = checker.latest()
+            check(version == "1.0.9", f"first read returned {version!r}")
+            retr_before = server.commands.get("RETR", 0)
+            version, metadata_ms = timed(checker.latest, checks)
+            check(server.commands.get("RETR", 0) == retr_before, "unchanged version.txt was downloaded again")
+            check(checker.metadata_hits == checks, f"{checker.metadata_hits} metadata hits, expected {checks}")
+            print(f"  metadata         : {metadata_ms:7.1f} ms per check (SIZE/MDTM, no data connection)")
+
+            cached = VersionChecker(client(), ttl=300)
+            cached.latest()
+            commands_before = sum(server.commands.values())
+            _, cached_ms = timed(cached.latest, checks)
+            check(sum(server.commands.values()) == commands_before, "TTL cache talked to the server")
+            print(f"  cached (TTL)     : {cached_ms:7.3f} ms per check")
+
+            # Republished: same size, newer mtime
+            publish_version(server_dir, "1.1.0", base_time + 60)
+            check(checker.latest() == "1.1.0", "republished version.txt not picked up")
+            check(cached.latest() == "1.0.9", "TTL cache expired early")
+            check(cached.latest(force=True) == "1.1.0", "force did not bypass the TTL cache")
+
+            # Same size and same mtime second: only the periodic full read notices
+            full = VersionChecker(client(), ttl=0, full_check_interval=0)
+            full.latest()
+            publish_version(server_dir, "1.1.1", base_time + 60)
+            check(checker.latest() == "1.1.0", "metadata check downloaded an unchanged stamp")
+            check(full.latest() == "1.1.1", "full check interval ignored")
+
+            stager = UpdateStager(client(), os.path.join(work, "install"), lambda: "1.1.10")
+            check(stager.check() is None, "stager treated 1.1.1 as newer than 1.1.10")
+            publish_version(server_dir, "1.1.9", base_time + 120)
+            check(stager.check() is None, "stager treated 1.1.9 as newer than 1.1.10")
+        finally:
+            server.stop()
+
+        # Server without MDTM: every check reads, results stay correct
+        server = FTPStandIn(server_dir, latency=latency, disabled=("MDTM",)).start()
+        try:
+            plain = VersionChecker(client(), ttl=0)
+            _, plain_ms = timed(plain.latest, checks)
+            check(plain.reads == checks, "checks without MDTM must read version.txt")
+            publish_version(server_dir, "1.2.0", base_time + 180)
+            check(plain.latest() == "1.2.0", "change missed without MDTM")
+            print(f"  no MDTM (read)   : {plain_ms:7.1f} ms per check")
+        finally:
+            server.stop()
+
+        left_behind = os.listdir(run_dir)
+        os.chdir(cwd)
+        check(left_behind == [], f"files left in the working directory: {left_behind}")
+    print("FAIL" if failed else "OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
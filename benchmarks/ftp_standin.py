@@ -0,0 +1,230 @@
+"""
+Minimal local FTP server used by the update benchmarks / checks.
+
+Serves a directory read-only on 127.0.0.1 with just the commands ftplib
+needs for the updater: USER, PASS, CWD, PWD, TYPE, PASV, SIZE, MDTM, REST,
+RETR, NLST, NOOP, QUIT. Any user/password is accepted.
+
+Fault injection: `drop_after` (bytes) makes the next `drops` RETR transfers
+close the data and control connections after that many bytes, like a
+network drop mid-download. `disabled` commands answer 502, like servers
+without MDTM/SIZE.
+
+    server = FTPStandIn(root_dir)
+    server.start()          # server.port
+    ...
+    server.stop()
+"""
+
+import os
+import socket
+import socketserver
+import threading
+import time
+
+
+class FTPStandIn:
+    def __init__(self, root_dir, drop_after=None, drops=0, latency=0.0, disabled=()):
+        self.root_dir = os.path.abspath(root_dir)
+        self.drop_after = drop_after
+        self.drops = drops
+        self.latency = latency  # seconds added to every reply (simulated WAN)
+        self.disabled = {command.upper() for command in disabled}
+        self.bytes_sent = 0
+        self.commands = {}
+        self.lock = threading.Lock()
+        self.server = None
+        self.port = None
+
+    def start(self):
+        standin = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                _Session(standin, self).run()
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def count(self, command):
+        with self.lock:
+            self.commands[command] = self.commands.get(command, 0) + 1
+
+    def take_drop(self):
+        """True if this transfer should be cut off"""
+        with self.lock:
+            if self.drop_after is not None and self.drops > 0:
+                self.drops -= 1
+                return True
+            return False
+
+    def add_sent(self, n):
+        with self.lock:
+            self.bytes_sent += n
+
+
+class _Session:
+    def __init__(self, standin, request):
+        self.standin = standin
+        self.rfile = request.rfile
+        self.wfile = request.wfile
+        self.sock = request.request
+        self.cwd = "/"
+        self.rest = 0
+        self.pasv = None
+
+    def reply(self, text):
+        if self.standin.latency:
+            time.sleep(self.standin.latency)
+        self.wfile.write((text + "\r\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def resolve(self, name):
+        path = name if name.startswith("/") else self.cwd.rstrip("/") + "/" + name
+        parts = []
+        for part in path.split("/"):
+            if part in ("", "."):
+                continue
+            if part == "..":
+                if parts:
+                    parts.pop()
+            else:
+                parts.append(part)
+        return "/" + "/".join(parts), os.path.join(self.standin.root_dir, *parts)
+
+    def run(self):
+        self.reply("220 FTP stand-in ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            line = line.decode("utf-8").rstrip("\r\n")
+            command, _, arg = line.partition(" ")
+            command = command.upper()
+            self.standin.count(command)
+            handler = getattr(self, "do_" + command, None)
+            if handler is None or command in self.standin.disabled:
+                self.reply(f"502 {command} not implemented")
+                continue
+            if handler(arg) is False:
+                return
+
+    def do_USER(self, arg):
+        self.reply("331 Password required")
+
+    def do_PASS(self, arg):
+        self.reply("230 Logged in")
+
+    def do_SYST(self, arg):
+        self.reply("215 UNIX Type: L8")
+
+    def do_NOOP(self, arg):
+        self.reply("200 OK")
+
+    def do_TYPE(self, arg):
+        self.reply("200 Type set")
+
+    def do_PWD(self, arg):
+        self.reply(f'257 "{self.cwd}"')
+
+    def do_CWD(self, arg):
+        virtual, real = self.resolve(arg)
+        if os.path.isdir(real):
+            self.cwd = virtual
+            self.reply("250 OK")
+        else:
+            self.reply("550 No such directory")
+
+    def do_SIZE(self, arg):
+        _, real = self.resolve(arg)
+        if os.path.isfile(real):
+            self.reply(f"213 {os.path.getsize(real)}")
+        else:
+            self.reply("550 No such file")
+
+    def do_MDTM(self, arg):
+        _, real = self.resolve(arg)
+        if os.path.isfile(real):
+            self.reply("213 " + time.strftime("%Y%m%d%H%M%S", time.gmtime(os.path.getmtime(real))))
+        else:
+            self.reply("550 No such file")
+
+    def do_REST(self, arg):
+        self.rest = int(arg)
+        self.reply(f"350 Restarting at {self.rest}")
+
+    def do_PASV(self, arg):
+        if self.pasv:
+            self.pasv.close()
+        self.pasv = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.pasv.bind(("127.0.0.1", 0))
+        self.pasv.listen(1)
+        port = self.pasv.getsockname()[1]
+        self.reply(f"227 Entering Passive Mode (127,0,0,1,{port >> 8},{port & 0xFF})")
+
+    def open_data(self):
+        if not self.pasv:
+            self.reply("425 Use PASV first")
+            return None
+        self.pasv.settimeout(10)
+        conn, _ = self.pasv.accept()
+        self.pasv.close()
+        self.pasv = None
+        return conn
+
+    def do_NLST(self, arg):
+        _, real = self.resolve(arg or ".")
+        conn = self.open_data()
+        if conn is None:
+            return
+        self.reply("150 Listing")
+        names = sorted(os.listdir(real)) if os.path.isdir(real) else []
+        conn.sendall("".join(name + "\r\n" for name in names).encode("utf-8"))
+        conn.close()
+        self.reply("226 Done")
+
+    def do_RETR(self, arg):
+        _, real = self.resolve(arg)
+        rest, self.rest = self.rest, 0
+        if not os.path.isfile(real):
+            self.reply("550 No such file")
+            return
+        conn = self.open_data()
+        if conn is None:
+            return
+        drop = self.standin.take_drop()
+        limit = self.standin.drop_after if drop else None
+        self.reply("150 Opening data connection")
+        sent = 0
+        with open(real, "rb") as f:
+            f.seek(rest)
+            while True:
+                chunk = f.read(65536)
+                if not chunk:
+                    break
+                if limit is not None and sent + len(chunk) > limit:
+                    chunk = chunk[:limit - sent]
+                    conn.sendall(chunk)
+                    self.standin.add_sent(len(chunk))
+                    # Simulated network drop: data and control connection go away
+                    conn.close()
+                    self.sock.close()
+                    return False
+                conn.sendall(chunk)
+                sent += len(chunk)
+                self.standin.add_sent(len(chunk))
+        conn.close()
+        self.reply("226 Transfer complete")
+
+    def do_QUIT(self, arg):
+        self.reply("221 Bye")
+        return False
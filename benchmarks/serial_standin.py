@@ -0,0 +1,77 @@
+"""
+Fake scanner on a pseudo-terminal for the pipeline benchmarks (POSIX).
+
+The bridge opens `device.port` with pyserial like a COM port; the device
+writes frames on the other end and collects the OK/NG acknowledgements
+(framed with the same profile as the scans) with the time each one arrived.
+
+    profile = FramingProfile("stx_etx_crc16")
+    device = PtyDevice(profile)
+    handler.serial_conn = serial.Serial(device.port, 9600, timeout=1)
+    device.send(profile.encode("A01;A02"))
+    ack, arrived = device.wait_ack(5.0)
+    device.close()
+"""
+
+import os
+import queue
+import select
+import threading
+import time
+import tty
+
+from framing import Deframer, FramingProfile
+
+
+class PtyDevice:
+    def __init__(self, profile=None):
+        self.deframer = Deframer(profile or FramingProfile())
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.master)
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.acks = queue.Queue()
+        self.bytes_sent = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._read_acks, daemon=True)
+        self.thread.start()
+
+    def send(self, data):
+        """Write one frame; returns the send time (perf_counter)"""
+        sent_at = time.perf_counter()
+        view = memoryview(data)
+        while view:
+            written = os.write(self.master, view)
+            view = view[written:]
+        self.bytes_sent += len(data)
+        return sent_at
+
+    def wait_ack(self, timeout):
+        """(b"OK" / b"NG", perf_counter when it arrived), or (None, None) on timeout"""
+        try:
+            return self.acks.get(timeout=timeout)
+        except queue.Empty:
+            return None, None
+
+    def _read_acks(self):
+        while self.running:
+            ready, _, _ = select.select([self.master], [], [], 0.2)
+            if not ready:
+                continue
+            try:
+                data = os.read(self.master, 4096)
+            except OSError:
+                break
+            arrived = time.perf_counter()
+            payloads, _ = self.deframer.feed(data)
+            for payload in payloads:
+                self.acks.put((payload.encode('ascii'), arrived))
+
+    def close(self):
+        self.running = False
+        self.thread.join(1.0)
+        for fd in (self.master, self.slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
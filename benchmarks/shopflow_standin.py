@@ -0,0 +1,140 @@
+"""
+Simulated Shop-Flow window and textbox for the pipeline benchmarks.
+
+Implements the pywinauto calls the bridge makes (set_focus, set_text,
+type_keys, window_text, child_window(auto_id='lblError'), children(),
+descendants()). On Enter the textbox is processed after `process_delay`
+seconds: accepted items clear the textbox, rejected ones show the NG popup
+(lblError) until the next scan or a reset (Alt+C, Alt+R).
+
+    shopflow = ShopFlowStandIn(process_delay=0.005, ng_rate=0.01)
+    handler.window, handler.textbox = shopflow.window, shopflow.textbox
+"""
+
+import random
+import threading
+import time
+
+
+class _Rect:
+    def __init__(self, width, height):
+        self._width = width
+        self._height = height
+
+    def width(self):
+        return self._width
+
+    def height(self):
+        return self._height
+
+
+class _NGPopup:
+    def window_text(self):
+        return "NG"
+
+    def is_visible(self):
+        return True
+
+    def rectangle(self):
+        return _Rect(640, 480)
+
+
+class _LblError:
+    def __init__(self, shopflow):
+        self.shopflow = shopflow
+
+    def exists(self, timeout=None, retry_interval=None):
+        return self.shopflow.ng_visible
+
+    def is_visible(self):
+        return self.shopflow.ng_visible
+
+
+class _Textbox:
+    def __init__(self, shopflow):
+        self.shopflow = shopflow
+        self.text = ""
+
+    def set_focus(self):
+        pass
+
+    def set_text(self, text):
+        shopflow = self.shopflow
+        if shopflow.set_text_delay:
+            time.sleep(shopflow.set_text_delay)
+        shopflow.ng_visible = False  # a new scan dismisses the popup
+        self.text = text
+
+    def type_keys(self, keys, pause=0.05, **kwargs):
+        if not keys.endswith('{ENTER}'):
+            self.text += keys
+            return
+        if keys != '{ENTER}':
+            self.text = keys[:-len('{ENTER}')]
+        self.shopflow.submit(self.text)
+
+    def window_text(self):
+        return self.text
+
+
+class _Window:
+    def __init__(self, shopflow):
+        self.shopflow = shopflow
+        self.popup = _NGPopup()
+        self.lbl_error = _LblError(shopflow)
+
+    def set_focus(self):
+        pass
+
+    def type_keys(self, keys, **kwargs):
+        if keys.lower() == '%r':
+            self.shopflow.reset()
+
+    def child_window(self, **criteria):
+        return self.lbl_error
+
+    def children(self):
+        return [self.popup] if self.shopflow.ng_visible else []
+
+    def descendants(self, **criteria):
+        return []
+
+
+class ShopFlowStandIn:
+    def __init__(self, process_delay=0.0, set_text_delay=0.0, ng_rate=0.0, ng_items=(), seed=5):
+        self.process_delay = process_delay
+        self.set_text_delay = set_text_delay
+        self.ng_rate = ng_rate
+        self.ng_items = set(ng_items)
+        self.rng = random.Random(seed)
+        self.ng_visible = False
+        self.lock = threading.Lock()
+        self.submitted = 0
+        self.accepted = 0
+        self.rejected = 0
+        self.resets = 0
+        self.textbox = _Textbox(self)
+        self.window = _Window(self)
+
+    def submit(self, text):
+        if self.process_delay > 0:
+            threading.Timer(self.process_delay, self.process, (text,)).start()
+        else:
+            self.process(text)
+
+    def process(self, text):
+        with self.lock:
+            self.submitted += 1
+            if text in self.ng_items or (self.ng_rate and self.rng.random() < self.ng_rate):
+                self.rejected += 1
+                self.ng_visible = True
+            else:
+                self.accepted += 1
+                if self.textbox.text == text:
+                    self.textbox.text = ""
+
+    def reset(self):
+        with self.lock:
+            self.resets += 1
+            self.ng_visible = False
+            self.textbox.text = ""
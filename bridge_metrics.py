@@ -0,0 +1,282 @@
+"""
+Bridge metrics - counters, latency histograms and an opt-in localhost HTTP
+endpoint that exposes them in Prometheus text exposition format.
+
+The hot path only touches plain ints/lists under one lock; all formatting
+happens when the endpoint is scraped.
+"""
+
+import bisect
+import logging
+import math
+import threading
+import time
+from array import array
+
+METRIC_PREFIX = "serial_bridge"
+
+# Upper bounds (seconds) of the latency buckets, Prometheus "le" style
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# Pipeline stages that get a latency histogram
+STAGES = ("read", "inject", "result", "end_to_end")
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (cumulative counts computed on render)"""
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot = +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def cumulative(self):
+        """Return [(le, cumulative_count), ...] including +Inf"""
+        result = []
+        running = 0
+        for le, n in zip(self.buckets + (float('inf'),), self.counts):
+            running += n
+            result.append((le, running))
+        return result
+
+
+class RollingHistogram:
+    """
+    Fixed-memory, log-bucketed latency histogram over a sliding time window.
+
+    The window is split into time slots; each slot is a flat array of bucket
+    counts that is zeroed and reused when its time comes round again, so
+    memory never grows. Bucket b (b >= 1) covers
+    [min_value * growth**(b-1), min_value * growth**b).
+    """
+    def __init__(self, window_seconds=300, slots=30, min_value=0.001, max_value=60.0, growth=1.1):
+        self.slot_seconds = window_seconds / slots
+        self.min_value = min_value
+        self.growth = growth
+        self.log_min = math.log(min_value)
+        self.log_growth = math.log(growth)
+        self.nbuckets = int(math.ceil((math.log(max_value) - self.log_min) / self.log_growth)) + 2
+        self.slots = [array('I', [0]) * self.nbuckets for _ in range(slots)]
+        self.slot_ids = [-1] * slots
+
+    def _bucket(self, seconds):
+        if seconds <= self.min_value:
+            return 0
+        b = int((math.log(seconds) - self.log_min) / self.log_growth) + 1
+        return b if b < self.nbuckets else self.nbuckets - 1
+
+    def _bucket_upper(self, b):
+        return self.min_value * self.growth ** b
+
+    def _current_slot(self, now):
+        slot_id = int(now // self.slot_seconds)
+        idx = slot_id % len(self.slots)
+        if self.slot_ids[idx] != slot_id:
+            counts = self.slots[idx]
+            for i in range(self.nbuckets):
+                counts[i] = 0
+            self.slot_ids[idx] = slot_id
+        return self.slots[idx]
+
+    def observe(self, seconds, now=None):
+        now = time.monotonic() if now is None else now
+        self._current_slot(now)[self._bucket(seconds)] += 1
+
+    def _merged(self, now, seconds=None):
+        """Sum bucket counts of the slots that are still inside the window"""
+        current = int(now // self.slot_seconds)
+        span = len(self.slots) if seconds is None else max(1, int(math.ceil(seconds / self.slot_seconds)))
+        merged = [0] * self.nbuckets
+        for idx, slot_id in enumerate(self.slot_ids):
+            if current - span < slot_id <= current:
+                for b, n in enumerate(self.slots[idx]):
+                    if n:
+                        merged[b] += n
+        return merged
+
+    def count(self, seconds=None, now=None):
+        """Number of observations in the last `seconds` (whole window if None)"""
+        now = time.monotonic() if now is None else now
+        return sum(self._merged(now, seconds))
+
+    def percentiles(self, quantiles=(0.5, 0.95, 0.99), now=None):
+        """Return {q: seconds or None} using bucket upper bounds"""
+        now = time.monotonic() if now is None else now
+        merged = self._merged(now)
+        total = sum(merged)
+        result = {}
+        for q in quantiles:
+            if not total:
+                result[q] = None
+                continue
+            rank = max(1, int(math.ceil(q * total)))
+            running = 0
+            for b, n in enumerate(merged):
+                running += n
+                if running >= rank:
+                    result[q] = self._bucket_upper(b)
+                    break
+        return result
+
+
+class BridgeMetrics:
+    """Process-wide bridge counters; survives handler Start/Stop cycles"""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.start_time = time.monotonic()
+        self.frames_received = 0
+        self.frames_ok = 0
+        self.frames_ng = 0
+        self.reconnects = {"serial": 0, "winforms": 0}
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES}
+        self.rolling = {stage: RollingHistogram() for stage in STAGES}
+        # name -> (help text, callable) evaluated at scrape time only
+        self.gauges = {}
+
+    def inc_frames(self):
+        with self.lock:
+            self.frames_received += 1
+
+    def inc_ok(self):
+        with self.lock:
+            self.frames_ok += 1
+
+    def inc_ng(self):
+        with self.lock:
+            self.frames_ng += 1
+
+    def inc_reconnect(self, component):
+        """Count a successful reconnection (failed attempts are not counted)"""
+        with self.lock:
+            self.reconnects[component] = self.reconnects.get(component, 0) + 1
+
+    def observe(self, stage, seconds):
+        with self.lock:
+            self.histograms[stage].observe(seconds)
+            self.rolling[stage].observe(seconds)
+
+    def latency_summary(self):
+        """Rolling {stage: {0.5: s, 0.95: s, 0.99: s}} for the GUI panel"""
+        with self.lock:
+            return {stage: h.percentiles() for stage, h in self.rolling.items()}
+
+    def frames_per_minute(self):
+        """Frames read during the last 60 seconds"""
+        with self.lock:
+            return self.rolling["read"].count(60)
+
+    def register_gauge(self, name, help_text, func):
+        """Register a gauge whose value is read from func() on each scrape"""
+        self.gauges[name] = (help_text, func)
+
+    def unregister_gauge(self, name):
+        self.gauges.pop(name, None)
+
+    def uptime(self):
+        return time.monotonic() - self.start_time
+
+    def render(self):
+        """Render all metrics in Prometheus text exposition format"""
+        p = METRIC_PREFIX
+        with self.lock:
+            counters = [
+                ("frames_received_total", "Frames received from the serial port", self.frames_received),
+                ("frames_ok_total", "Frames acknowledged with OK", self.frames_ok),
+                ("frames_ng_total", "Frames acknowledged with NG", self.frames_ng),
+            ]
+            reconnects = dict(self.reconnects)
+            histograms = {stage: (h.cumulative(), h.total, h.count) for stage, h in self.histograms.items()}
+
+        lines = []
+        for name, help_text, value in counters:
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} counter")
+            lines.append(f"{p}_{name} {value}")
+
+        lines.append(f"# HELP {p}_reconnects_total Successful reconnections per component")
+        lines.append(f"# TYPE {p}_reconnects_total counter")
+        for component, value in sorted(reconnects.items()):
+            lines.append(f'{p}_reconnects_total{{component="{component}"}} {value}')
+
+        lines.append(f"# HELP {p}_stage_latency_seconds Latency per pipeline stage")
+        lines.append(f"# TYPE {p}_stage_latency_seconds histogram")
+        for stage, (buckets, total, count) in histograms.items():
+            for le, cumulative in buckets:
+                le_text = "+Inf" if le == float('inf') else repr(le)
+                lines.append(f'{p}_stage_latency_seconds_bucket{{stage="{stage}",le="{le_text}"}} {cumulative}')
+            lines.append(f'{p}_stage_latency_seconds_sum{{stage="{stage}"}} {total:.6f}')
+            lines.append(f'{p}_stage_latency_seconds_count{{stage="{stage}"}} {count}')
+
+        for name, (help_text, func) in sorted(self.gauges.items()):
+            try:
+                value = func()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            lines.append(f"# HELP {p}_{name} {help_text}")
+            lines.append(f"# TYPE {p}_{name} gauge")
+            lines.append(f"{p}_{name} {value}")
+
+        lines.append(f"# HELP {p}_uptime_seconds Seconds since the bridge process started")
+        lines.append(f"# TYPE {p}_uptime_seconds gauge")
+        lines.append(f"{p}_uptime_seconds {self.uptime():.3f}")
+        return "\n".join(lines) + "\n"
+
+
+# Global metrics instance shared by the handler, GUI and exporter
+metrics = BridgeMetrics()
+
+
+def _make_request_handler():
+    """Build the /metrics request handler (http.server is imported only when enabled)"""
+    from http.server import BaseHTTPRequestHandler
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] not in ('/metrics', '/'):
+                self.send_error(404)
+                return
+            body = self.server.metrics.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            # Scrapes every few seconds would flood the activity log
+            pass
+
+    return MetricsRequestHandler
+
+
+class MetricsServer:
+    """Serve /metrics on localhost in a daemon thread"""
+    def __init__(self, port=9108, host="127.0.0.1", bridge_metrics=None):
+        self.host = host
+        self.port = port
+        self.metrics = bridge_metrics or metrics
+        self.httpd = None
+        self.thread = None
+
+    def start(self):
+        from http.server import ThreadingHTTPServer
+        self.httpd = ThreadingHTTPServer((self.host, self.port), _make_request_handler())
+        self.httpd.daemon_threads = True
+        self.httpd.metrics = self.metrics
+        self.port = self.httpd.server_address[1]  # resolve port 0
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+        logging.info(f"📈 Metrics endpoint listening on http://{self.host}:{self.port}/metrics")
+
+    def stop(self):
+        if self.httpd:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+            self.httpd = None
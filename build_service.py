@@ -0,0 +1,30 @@
+"""
+Build script for SerialToWinFormsService.exe (headless, console)
+"""
+
+import PyInstaller.__main__
+import os
+
+# Get the current directory
+current_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Build parameters
+PyInstaller.__main__.run([
+    'serial_to_winforms_service.py',   # Main script
+    '--name=SerialToWinFormsService',  # Output name
+    '--onefile',                       # Single executable file
+    '--console',                       # Console app: exit codes + log output
+    '--icon=app_icon.ico',             # Application icon
+    '--hidden-import=serial.tools.list_ports',  # Include pyserial tools
+    '--exclude-module=tkinter',        # No Tk in headless mode
+    '--exclude-module=PIL',
+    '--exclude-module=pystray',
+    '--clean',                         # Clean PyInstaller cache
+    '--noconfirm',                     # Replace output without asking
+])
+
+print("\n" + "="*60)
+print("✅ SerialToWinFormsService.exe build completed!")
+print("="*60)
+print(f"\n📦 Executable: {os.path.join(current_dir, 'dist', 'SerialToWinFormsService.exe')}")
+print("\n" + "="*60)
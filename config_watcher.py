@@ -0,0 +1,74 @@
+"""
+Polling watcher for config.json / settings.json.
+
+Every `interval` seconds each watched file is stat()-ed; only when its
+mtime or size changed is it read and parsed, and the callback gets the new
+dict. A file caught half-written (invalid JSON) is skipped and picked up on
+the next change. Callbacks run on the watcher thread.
+"""
+
+import json
+import logging
+import os
+import threading
+
+DEFAULT_INTERVAL = 2.0
+
+
+def file_stamp(path):
+    """(mtime_ns, size) of a file, None if it does not exist"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
+class ConfigWatcher:
+    def __init__(self, interval=DEFAULT_INTERVAL):
+        self.interval = interval
+        self.watches = {}  # path -> [callback, last stamp]
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def watch(self, path, callback):
+        """Call callback(dict) whenever `path` changes (current content is the baseline)"""
+        path = os.path.abspath(path)
+        with self.lock:
+            self.watches[path] = [callback, file_stamp(path)]
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="ConfigWatcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.check()
+
+    def check(self):
+        """Poll all watched files once; returns the paths that were reloaded"""
+        with self.lock:
+            watches = list(self.watches.items())
+        reloaded = []
+        for path, watch in watches:
+            stamp = file_stamp(path)
+            if stamp == watch[1] or stamp is None:
+                continue
+            watch[1] = stamp
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError) as e:
+                logging.warning(f"♻️ Ignoring {os.path.basename(path)} change: {e}")
+                continue
+            try:
+                watch[0](data)
+                reloaded.append(path)
+            except Exception as e:
+                logging.error(f"♻️ Failed to apply {os.path.basename(path)}: {type(e).__name__} - {e}")
+        return reloaded
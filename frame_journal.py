@@ -0,0 +1,203 @@
+"""
+Store-and-forward journal for scanned frames.
+
+Every accepted frame is committed to a local SQLite database (WAL mode)
+before it is typed into Shop-Flow, with a status:
+
+    pending -> delivered
+            -> failed      (gave up after MAX_ATTEMPTS injections)
+
+When Shop-Flow is down the frame simply stays pending. JournalReplayer
+delivers pending frames oldest-first at a bounded rate once the textbox is
+reachable again; new frames are queued behind an existing backlog so the
+order on the Shop-Flow side is the scan order. Delivery is at-least-once:
+a crash between typing a frame and marking it delivered replays it.
+
+The serial line is answered when a frame is scanned: a frame that is kept in
+the journal gets the handler's queued_response right away, and its replay
+sends nothing (the line controller could not match a late OK/NG to a scan).
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+PENDING = "pending"
+DELIVERED = "delivered"
+FAILED = "failed"
+
+DEFAULT_JOURNAL_PATH = os.path.join("journal", "frames.db")
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_REPLAY_RATE = 2.0  # frames per second
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    received_at REAL NOT NULL,
+    data TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS frames_status ON frames (status, id);
+"""
+
+
+class FrameJournal:
+    def __init__(self, path=DEFAULT_JOURNAL_PATH, retention_days=DEFAULT_RETENTION_DAYS, synchronous="NORMAL"):
+        self.path = path
+        self.retention_days = retention_days
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # One connection shared by the reader and replayer threads, serialized by lock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL survives a process crash; FULL also survives power loss
+        self.db.execute(f"PRAGMA synchronous={synchronous}")
+        self.db.executescript(SCHEMA)
+        self.prune()
+
+    def append(self, data):
+        """Commit a new pending frame; returns its id"""
+        now = time.time()
+        with self.lock:
+            cursor = self.db.execute(
+                "INSERT INTO frames (received_at, data, status, updated_at) VALUES (?, ?, ?, ?)",
+                (now, data, PENDING, now))
+        return cursor.lastrowid
+
+    def mark(self, frame_id, status):
+        with self.lock:
+            self.db.execute("UPDATE frames SET status = ?, updated_at = ? WHERE id = ?",
+                            (status, time.time(), frame_id))
+
+    def record_attempt(self, frame_id):
+        """Count a failed injection; the frame is marked failed after MAX_ATTEMPTS"""
+        with self.lock:
+            self.db.execute(
+                "UPDATE frames SET attempts = attempts + 1, updated_at = ?, "
+                "status = CASE WHEN attempts + 1 >= ? THEN ? ELSE status END WHERE id = ?",
+                (time.time(), MAX_ATTEMPTS, FAILED, frame_id))
+            row = self.db.execute("SELECT status FROM frames WHERE id = ?", (frame_id,)).fetchone()
+        return row[0] if row else None
+
+    def oldest_pending(self, limit=1):
+        """[(id, data)] of the oldest pending frames"""
+        with self.lock:
+            return self.db.execute(
+                "SELECT id, data FROM frames WHERE status = ? ORDER BY id LIMIT ?",
+                (PENDING, limit)).fetchall()
+
+    def pending_before(self, frame_id):
+        """True if an older frame is still waiting (new frames must queue behind it)"""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT 1 FROM frames WHERE status = ? AND id < ? LIMIT 1", (PENDING, frame_id)).fetchone()
+        return row is not None
+
+    def pending_count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM frames WHERE status = ?", (PENDING,)).fetchone()[0]
+
+    def counts(self):
+        """{status: frames}"""
+        with self.lock:
+            return dict(self.db.execute("SELECT status, COUNT(*) FROM frames GROUP BY status").fetchall())
+
+    def prune(self):
+        """Drop delivered / failed frames older than retention_days"""
+        cutoff = time.time() - self.retention_days * 86400
+        with self.lock:
+            cursor = self.db.execute("DELETE FROM frames WHERE status != ? AND updated_at < ?", (PENDING, cutoff))
+        if cursor.rowcount:
+            logging.info(f"📒 Journal: pruned {cursor.rowcount} frames older than {self.retention_days} days")
+        return cursor.rowcount
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+
+class JournalReplayer:
+    """Deliver pending frames in order, at most `rate` per second, while Shop-Flow is reachable"""
+    def __init__(self, handler, journal, rate=DEFAULT_REPLAY_RATE):
+        self.handler = handler
+        self.journal = journal
+        self.interval = 1.0 / rate if rate else 0.0
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.thread = None
+        self.replayed = 0
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="JournalReplayer", daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout=None):
+        """Stop replaying; with a timeout, wait that long for a frame being typed"""
+        self.stop_event.set()
+        self.wake_event.set()
+        if timeout is not None and self.thread and self.thread is not threading.current_thread():
+            self.thread.join(timeout)
+
+    def wake(self):
+        """A frame was queued; check for work now"""
+        self.wake_event.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                drained = self.drain()
+            except Exception as e:
+                logging.error(f"Journal replay error: {type(e).__name__} - {e}")
+                drained = 0
+            if not drained:
+                self.wake_event.wait(1.0)
+                self.wake_event.clear()
+
+    def drain(self):
+        """Replay the backlog until it is empty or delivery fails; returns frames delivered"""
+        handler = self.handler
+        if handler.textbox is None:
+            return 0
+        # A live frame being typed right now is not backlog
+        with handler.delivery_lock:
+            backlog = self.journal.pending_count() - len(handler.delivering)
+        if backlog <= 0:
+            return 0
+        logging.info(f"📤 Replaying {backlog} journaled frames ({1 / self.interval if self.interval else 'max'}/s)")
+        start = time.monotonic()
+        delivered = 0
+        while not self.stop_event.is_set():
+            frame_start = time.monotonic()
+            # The lock covers the journal read and the claim only, so live frames are
+            # journaled and answered while a replayed frame is being typed
+            with handler.delivery_lock:
+                rows = self.journal.oldest_pending()
+                if not rows or rows[0][0] in handler.delivering:
+                    break
+                frame_id, data = rows[0]
+                handler.delivering.add(frame_id)
+            try:
+                ok = handler.deliver_frame(data, frame_id, reply=False)
+            finally:
+                with handler.delivery_lock:
+                    handler.delivering.discard(frame_id)
+            if not ok:
+                break
+            delivered += 1
+            self.replayed += 1
+            wait = self.interval - (time.monotonic() - frame_start)
+            if wait > 0 and self.stop_event.wait(wait):
+                break
+        elapsed = time.monotonic() - start
+        if delivered:
+            logging.info(f"📤 Replayed {delivered} frames in {elapsed:.1f}s ({delivered / elapsed:.2f} frames/s), "
+                         f"{self.journal.pending_count()} still pending")
+        return delivered
@@ -0,0 +1,306 @@
+"""
+Serial framing profiles: how frames are delimited on the wire and checked.
+
+config.json:
+
+    "framing": "ascii"              one line per frame, optional text STX...ETX (the default)
+    "framing": "stx_etx_lrc"        a named profile (see PROFILES)
+    "framing": {"profile": "stx_etx", "checksum": "crc16_modbus", "checksum_format": "hex"}
+
+Profile keys:
+    start, end        marker bytes: 0-255 or a one-character string ("\\u0002"); no end with a length prefix
+    length_bytes      0, 1 or 2: big-endian payload length after the start byte
+    checksum          none, xor (BCC), lrc, sum8, crc16_modbus, crc16_ccitt, crc32
+    checksum_format   binary (raw bytes after the end marker) or hex (ASCII hex digits)
+    checksum_scope    payload, or frame (length bytes + payload + end marker)
+    max_length        longest payload accepted before the deframer resyncs
+
+OK / NG responses are framed with the same profile (plain "OK\n" with
+ascii). A frame dropped for a bad checksum, length or end byte is not
+answered: the device times out and rescans, and the drop is counted.
+
+Checksums work on bytes with precomputed tables (CRC-16/MODBUS in Python,
+CRC-16/CCITT and CRC-32 through the C tables of binascii / zlib).
+"""
+
+import binascii
+import collections
+import zlib
+
+STX, ETX = 0x02, 0x03
+ASCII_PROFILE = "ascii"
+DEFAULT_MAX_LENGTH = 4096
+
+PROFILES = {
+    ASCII_PROFILE: {},
+    "stx_etx": {"start": STX, "end": ETX},
+    "stx_etx_xor": {"start": STX, "end": ETX, "checksum": "xor", "checksum_scope": "frame"},
+    "stx_etx_lrc": {"start": STX, "end": ETX, "checksum": "lrc"},
+    "stx_etx_crc16": {"start": STX, "end": ETX, "checksum": "crc16_modbus"},
+    "length_crc16": {"start": STX, "end": None, "length_bytes": 2, "checksum": "crc16_ccitt"},
+}
+
+
+def make_crc16_table(poly, reflected):
+    """256-entry table for a 16-bit CRC (poly given reversed when reflected)"""
+    table = []
+    for byte in range(256):
+        if reflected:
+            crc = byte
+            for _ in range(8):
+                crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+        else:
+            crc = byte << 8
+            for _ in range(8):
+                crc = ((crc << 1) ^ poly) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+        table.append(crc)
+    return table
+
+
+CRC16_MODBUS_TABLE = make_crc16_table(0xA001, True)
+
+
+def crc16_modbus(data, crc=0xFFFF):
+    table = CRC16_MODBUS_TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
+
+
+def crc16_ccitt(data, crc=0xFFFF):
+    """CRC-16/CCITT-FALSE"""
+    return binascii.crc_hqx(data, crc)
+
+
+def xor8(data):
+    """XOR of all bytes (BCC), folded in halves on one big integer"""
+    size = len(data)
+    value = int.from_bytes(data, 'little')
+    while size > 1:
+        half = (size + 1) // 2
+        value = (value & ((1 << half * 8) - 1)) ^ (value >> half * 8)
+        size = half
+    return value
+
+
+def lrc8(data):
+    """Two's complement of the byte sum (Modbus ASCII LRC)"""
+    return -sum(data) & 0xFF
+
+
+def sum8(data):
+    return sum(data) & 0xFF
+
+
+Checksum = collections.namedtuple('Checksum', ['size', 'function', 'byteorder'])
+
+CHECKSUMS = {
+    "none": Checksum(0, None, 'big'),
+    "xor": Checksum(1, xor8, 'big'),
+    "lrc": Checksum(1, lrc8, 'big'),
+    "sum8": Checksum(1, sum8, 'big'),
+    "crc16_modbus": Checksum(2, crc16_modbus, 'little'),
+    "crc16_ccitt": Checksum(2, crc16_ccitt, 'big'),
+    "crc32": Checksum(4, zlib.crc32, 'big'),
+}
+
+
+def _marker(value, key):
+    if value is None:
+        return None
+    if isinstance(value, str) and len(value) == 1:
+        value = ord(value)
+    if not isinstance(value, int) or not 0 <= value <= 255:
+        raise ValueError(f"framing {key} must be a byte value, got {value!r}")
+    return value
+
+
+class FramingProfile:
+    def __init__(self, spec=None):
+        if spec is None or isinstance(spec, str):
+            spec = {"profile": spec or ASCII_PROFILE}
+        if not isinstance(spec, dict):
+            raise ValueError(f"framing must be a profile name or an object, got {spec!r}")
+        name = spec.get("profile", ASCII_PROFILE if "start" not in spec else "custom")
+        if name not in PROFILES and name != "custom":
+            raise ValueError(f"unknown framing profile {name!r}, expected one of {list(PROFILES)}")
+        settings = dict(PROFILES.get(name, {}), **{k: v for k, v in spec.items() if k != "profile"})
+        self.name = name
+        self.start = _marker(settings.get("start"), "start")
+        self.end = _marker(settings.get("end"), "end")
+        self.length_bytes = int(settings.get("length_bytes", 0))
+        self.checksum_name = settings.get("checksum", "none")
+        self.checksum_format = settings.get("checksum_format", "binary")
+        self.checksum_scope = settings.get("checksum_scope", "payload")
+        self.encoding = settings.get("encoding", "utf-8")
+        self.max_length = int(settings.get("max_length", DEFAULT_MAX_LENGTH))
+        if self.checksum_name not in CHECKSUMS:
+            raise ValueError(f"unknown checksum {self.checksum_name!r}, expected one of {list(CHECKSUMS)}")
+        if self.checksum_format not in ("binary", "hex"):
+            raise ValueError(f"checksum_format must be 'binary' or 'hex', got {self.checksum_format!r}")
+        if self.checksum_scope not in ("payload", "frame"):
+            raise ValueError(f"checksum_scope must be 'payload' or 'frame', got {self.checksum_scope!r}")
+        if self.length_bytes not in (0, 1, 2):
+            raise ValueError(f"length_bytes must be 0, 1 or 2, got {self.length_bytes}")
+        if self.start is None and (self.length_bytes or self.checksum_name != "none"):
+            raise ValueError("length prefix and checksum need a start byte")
+        if self.start is not None and self.end is None and not self.length_bytes:
+            raise ValueError("a frame needs an end byte or a length prefix")
+        self.checksum = CHECKSUMS[self.checksum_name]
+        self.checksum_width = self.checksum.size * (2 if self.checksum_format == "hex" else 1)
+
+    @property
+    def line_based(self):
+        """ASCII lines (readline), no control bytes"""
+        return self.start is None
+
+    def __str__(self):
+        if self.line_based:
+            return ASCII_PROFILE
+        parts = [f"start 0x{self.start:02X}"]
+        if self.length_bytes:
+            parts.append(f"{self.length_bytes}-byte length")
+        if self.end is not None:
+            parts.append(f"end 0x{self.end:02X}")
+        if self.checksum.size:
+            parts.append(f"{self.checksum_name} ({self.checksum_format}, {self.checksum_scope})")
+        return f"{self.name}: {', '.join(parts)}"
+
+    def checksum_bytes(self, covered):
+        value = self.checksum.function(covered)
+        if self.checksum_format == "hex":
+            return f"{value:0{self.checksum.size * 2}X}".encode('ascii')
+        return value.to_bytes(self.checksum.size, self.checksum.byteorder)
+
+    def encode(self, payload):
+        """Wire bytes of one frame (responses, senders and benchmarks)"""
+        data = payload.encode(self.encoding) if isinstance(payload, str) else bytes(payload)
+        if self.line_based:
+            return data + b"\n"
+        length = len(data).to_bytes(self.length_bytes, 'big') if self.length_bytes else b""
+        end = bytes([self.end]) if self.end is not None else b""
+        covered = length + data + end if self.checksum_scope == "frame" else data
+        trailer = self.checksum_bytes(covered) if self.checksum.size else b""
+        return bytes([self.start]) + length + data + end + trailer
+
+
+def load_framing(spec):
+    """FramingProfile for config.json "framing"; raises ValueError on an invalid profile"""
+    return FramingProfile(spec)
+
+
+class Deframer:
+    """
+    Splits a byte stream into frame payloads. Bytes outside frames are
+    skipped; a frame with a bad checksum, length or encoding is dropped and
+    reported, and parsing resyncs on the next start byte.
+    """
+    def __init__(self, profile):
+        self.profile = profile
+        self.buffer = bytearray()
+        self.frames = 0
+        self.corrupted = 0      # checksum mismatch or undecodable payload
+        self.malformed = 0      # bad length, missing end byte, oversize
+        self.skipped_bytes = 0  # noise between frames
+
+    def stats(self):
+        return {"frames": self.frames, "corrupted": self.corrupted, "malformed": self.malformed,
+                "skipped_bytes": self.skipped_bytes}
+
+    def feed(self, data):
+        """Add received bytes; returns (payloads, errors) for the frames completed"""
+        self.buffer += data
+        if self.profile.line_based:
+            return self._lines()
+        return self._frames()
+
+    def _lines(self):
+        payloads, errors = [], []
+        buffer = self.buffer
+        *lines, rest = buffer.split(b"\n")
+        self.buffer = bytearray(rest)
+        for line in lines:
+            try:
+                text = line.decode(self.profile.encoding).strip()
+            except UnicodeDecodeError:
+                self.corrupted += 1
+                errors.append("undecodable line")
+                continue
+            if text:
+                self.frames += 1
+                payloads.append(text)
+        return payloads, errors
+
+    def _drop(self, count, counter, reason, errors):
+        del self.buffer[:count]
+        setattr(self, counter, getattr(self, counter) + 1)
+        errors.append(reason)
+
+    def _frames(self):
+        profile = self.profile
+        buffer = self.buffer
+        start, end = profile.start, profile.end
+        checksum_width = profile.checksum_width
+        payloads, errors = [], []
+        while buffer:
+            at = buffer.find(start)
+            if at < 0:
+                self.skipped_bytes += len(buffer)
+                buffer.clear()
+                break
+            if at:
+                self.skipped_bytes += at
+                del buffer[:at]
+            if profile.length_bytes:
+                header = 1 + profile.length_bytes
+                if len(buffer) < header:
+                    break
+                length = int.from_bytes(buffer[1:header], 'big')
+                if length > profile.max_length:
+                    self._drop(1, "malformed", f"length {length} over {profile.max_length}", errors)
+                    continue
+                payload_end = header + length
+                frame_end = payload_end + (end is not None)
+                if len(buffer) < frame_end + checksum_width:
+                    break
+                if end is not None and buffer[payload_end] != end:
+                    self._drop(1, "malformed", "end byte missing after length", errors)
+                    continue
+            else:
+                header = 1
+                payload_end = buffer.find(end, 1)
+                if payload_end < 0:
+                    if len(buffer) > profile.max_length + 1:
+                        self._drop(1, "malformed", f"no end byte within {profile.max_length} bytes", errors)
+                        continue
+                    restart = buffer.find(start, 1)
+                    if restart > 0:
+                        self._drop(restart, "malformed", "frame cut off by a new start byte", errors)
+                        continue
+                    break
+                restart = buffer.find(start, 1, payload_end)
+                if restart > 0:
+                    self._drop(restart, "malformed", "frame cut off by a new start byte", errors)
+                    continue
+                frame_end = payload_end + 1
+                if len(buffer) < frame_end + checksum_width:
+                    break
+            total = frame_end + checksum_width
+            if checksum_width:
+                covered = buffer[1:frame_end] if profile.checksum_scope == "frame" else buffer[header:payload_end]
+                received = buffer[frame_end:total]
+                if profile.checksum_format == "hex":
+                    received = received.upper()
+                if profile.checksum_bytes(bytes(covered)) != received:
+                    # A corrupted length byte makes `total` meaningless: resync byte by byte
+                    self._drop(1 if profile.length_bytes else total, "corrupted", "checksum mismatch", errors)
+                    continue
+            try:
+                text = buffer[header:payload_end].decode(profile.encoding)
+            except UnicodeDecodeError:
+                self._drop(total, "corrupted", "undecodable payload", errors)
+                continue
+            del buffer[:total]
+            self.frames += 1
+            payloads.append(text)
+        return payloads, errors
@@ -0,0 +1,129 @@
+"""
+Giftbox payload decoder.
+
+A giftbox frame holds up to 20 ';'-separated item records, e.g.
+
+    01462008114854321I44HK24AZCK5240DKR00009.00
+    serial (17)      model (11) lot(7) weight (8)
+
+decode() turns a payload into a GiftboxBatch with one fixed-width column
+per field instead of a dict per item: serial/model/lot are bytes where item
+i of the serial column is serial[i * 17:(i + 1) * 17], weights are an
+array('d'). The batch summary (total weight, items per model, duplicate
+serials, malformed records) is computed in the same pass.
+
+The layout can be overridden in config.json, widths in characters:
+
+    "giftbox_layout": [["serial", 17], ["model", 11], ["lot", 7], ["weight", 8]]
+"""
+
+import collections
+from array import array
+
+FIELDS = ('serial', 'model', 'lot', 'weight')
+DEFAULT_LAYOUT = (('serial', 17), ('model', 11), ('lot', 7), ('weight', 8))
+SEPARATOR = b';'
+
+GiftboxSummary = collections.namedtuple(
+    'GiftboxSummary', ['items', 'total_weight', 'models', 'duplicates', 'malformed'])
+
+
+class RecordLayout:
+    def __init__(self, layout=DEFAULT_LAYOUT):
+        names = [name for name, _ in layout]
+        if sorted(names) != sorted(FIELDS):
+            raise ValueError(f"giftbox_layout needs exactly the fields {', '.join(FIELDS)}, got {names}")
+        self.layout = tuple((name, int(width)) for name, width in layout)
+        self.widths = dict(self.layout)
+        self.slices = {}
+        offset = 0
+        for name, width in self.layout:
+            self.slices[name] = slice(offset, offset + width)
+            offset += width
+        self.record_width = offset
+
+
+DEFAULT_RECORD_LAYOUT = RecordLayout()
+
+
+class GiftboxBatch(collections.namedtuple('GiftboxBatch',
+                                          ['layout', 'count', 'serial', 'model', 'lot', 'weight', 'summary'])):
+    """Decoded items of one frame, stored column-wise"""
+    __slots__ = ()
+
+    def __len__(self):
+        return self.count
+
+    def field(self, name, index):
+        """Text of one item's field; the weight column holds floats"""
+        if name == 'weight':
+            return self.weight[index]
+        width = self.layout.widths[name]
+        return getattr(self, name)[index * width:(index + 1) * width].decode('ascii', 'replace')
+
+    def item(self, index):
+        """(serial, model, lot, weight) of one item"""
+        return tuple(self.field(name, index) for name in FIELDS)
+
+    def column(self, name):
+        """All values of one field, in scan order"""
+        return [self.field(name, index) for index in range(self.count)]
+
+
+def decode(payload, layout=DEFAULT_RECORD_LAYOUT):
+    """Decode a payload (str or bytes) into a GiftboxBatch in one pass"""
+    data = payload.encode('ascii', 'replace') if isinstance(payload, str) else payload
+    width = layout.record_width
+    serial_slice = layout.slices['serial']
+    model_slice = layout.slices['model']
+    lot_slice = layout.slices['lot']
+    weight_slice = layout.slices['weight']
+    serials, models, lots = [], [], []
+    weights = array('d')
+    seen = set()
+    duplicates = []
+    per_model = {}
+    malformed = 0
+    total_weight = 0.0
+
+    for record in data.split(SEPARATOR):
+        if len(record) != width:
+            if record.strip():
+                malformed += 1
+            continue
+        try:
+            weight = float(record[weight_slice])
+        except ValueError:
+            malformed += 1
+            continue
+        serial = record[serial_slice]
+        if serial in seen:
+            duplicates.append(serial)
+        else:
+            seen.add(serial)
+        model = record[model_slice]
+        per_model[model] = per_model.get(model, 0) + 1
+        serials.append(serial)
+        models.append(model)
+        lots.append(record[lot_slice])
+        weights.append(weight)
+        total_weight += weight
+
+    summary = GiftboxSummary(
+        items=len(weights),
+        total_weight=round(total_weight, 3),
+        models={model.decode('ascii', 'replace'): count for model, count in per_model.items()},
+        duplicates=tuple(serial.decode('ascii', 'replace') for serial in duplicates),
+        malformed=malformed)
+    return GiftboxBatch(layout, len(weights), b''.join(serials), b''.join(models), b''.join(lots),
+                        weights, summary)
+
+
+def format_summary(summary):
+    text = (f"{summary.items} items, {len(summary.models)} model(s), "
+            f"total weight {summary.total_weight:.2f}")
+    if summary.duplicates:
+        text += f", duplicates: {', '.join(summary.duplicates)}"
+    if summary.malformed:
+        text += f", {summary.malformed} malformed"
+    return text
@@ -0,0 +1,144 @@
+"""
+Batched rendering for the Activity Log widget.
+
+Log lines and counter updates may come from any thread. They are parked in a
+bounded ring (collections.deque appends are thread-safe) and the Tk thread
+flushes them into the Text widget with a single insert a few times per
+second, instead of one root.after() callback per record.
+
+GUILogHandler is the single logging -> GUI bridge. It is created once per
+window and attached/detached with the handler lifecycle, so Start/Stop
+cycles never stack duplicate handlers on the root logger.
+"""
+
+import collections
+import logging
+import time
+import tkinter as tk
+
+# Flush interval of the Activity Log (ms) - 4 updates per second
+LOG_FLUSH_MS = 250
+
+# Max lines parked between two flushes; older lines are dropped first
+LOG_BUFFER_SIZE = 1000
+
+
+class BatchedLogView:
+    def __init__(self, root, text_widget, max_lines=50, flush_ms=LOG_FLUSH_MS, buffer_size=LOG_BUFFER_SIZE):
+        self.root = root
+        self.text = text_widget
+        self.max_lines = max_lines
+        self.flush_ms = flush_ms
+        self.pending = collections.deque(maxlen=buffer_size)
+        self.bindings = []  # [getter, setter, last value]
+        self.flush_count = 0
+        self.flush_seconds = 0.0  # UI-thread time spent in flush()
+        self.scheduled = False
+
+    def append(self, line, tag="INFO"):
+        """Queue one line (thread-safe); rendered on the next flush"""
+        self.pending.append((line, tag))
+
+    def bind(self, getter, setter):
+        """Call setter(getter()) on flush whenever the value changed"""
+        self.bindings.append([getter, setter, object()])
+
+    def clear(self):
+        self.pending.clear()
+        self.text.delete('1.0', tk.END)
+
+    def start(self):
+        if not self.scheduled:
+            self.scheduled = True
+            self.root.after(self.flush_ms, self._tick)
+
+    def _tick(self):
+        try:
+            self.flush()
+        finally:
+            self.root.after(self.flush_ms, self._tick)
+
+    def flush(self):
+        """Render everything queued since the last flush (Tk thread only)"""
+        start = time.perf_counter()
+        items = []
+        try:
+            while True:
+                items.append(self.pending.popleft())
+        except IndexError:
+            pass
+
+        if items:
+            # Lines that would be trimmed right away are never inserted
+            if len(items) > self.max_lines:
+                items = items[-self.max_lines:]
+            args = []
+            for line, tag in items:
+                args.append(line)
+                args.append(tag)
+            self.text.insert(tk.END, *args)
+            self.text.see(tk.END)
+
+            lines = int(self.text.index('end-1c').split('.')[0])
+            if lines > self.max_lines:
+                self.text.delete('1.0', f'{lines - self.max_lines}.0')
+
+        for binding in self.bindings:
+            value = binding[0]()
+            if value != binding[2]:
+                binding[2] = value
+                binding[1](value)
+
+        self.flush_count += 1
+        self.flush_seconds += time.perf_counter() - start
+
+
+class GUILogHandler(logging.Handler):
+    """Forward log records to the GUI log view and update its counters"""
+    def __init__(self, gui, logger=None):
+        super().__init__()
+        self.gui = gui
+        self.logger = logger or logging.getLogger()
+        self.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', datefmt='%H:%M:%S'))
+
+    @property
+    def attached(self):
+        return self in self.logger.handlers
+
+    def attach(self):
+        """Subscribe to the root logger (idempotent)"""
+        if not self.attached:
+            self.logger.addHandler(self)
+
+    def detach(self):
+        """Unsubscribe from the root logger (idempotent)"""
+        self.logger.removeHandler(self)
+
+    def emit(self, record):
+        msg = self.format(record)
+        level = record.levelname
+        gui = self.gui
+
+        # Determine tag based on level
+        if level == "ERROR":
+            tag = "ERROR"
+            gui.error_count += 1
+        elif level == "WARNING":
+            tag = "WARNING"
+        elif "successful" in msg.lower() or "connected" in msg.lower():
+            tag = "SUCCESS"
+            gui.success_count += 1
+        else:
+            tag = "INFO"
+
+        # Check for data received
+        if "Raw serial data received:" in msg:
+            gui.data_count += 1
+            # Extract and display last data
+            try:
+                data = msg.split("Raw serial data received:")[1].split("(")[0].strip()
+                gui.last_data_text = data[:50]
+            except Exception:
+                pass
+
+        gui.log_message(msg, tag)
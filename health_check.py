@@ -0,0 +1,116 @@
+"""
+Background health checker for the serial port and the Shop-Flow window.
+
+Probes run on their own thread at an adaptive interval and the result is
+published as an immutable HealthStatus snapshot. The GUI, tray and metrics
+exporter only read `checker.status` and never block on a probe.
+"""
+
+import collections
+import logging
+import threading
+import time
+
+HealthStatus = collections.namedtuple(
+    'HealthStatus',
+    ['serial_ok', 'winforms_ok', 'checked_at', 'probe_seconds', 'changed_at', 'detail'])
+
+# Snapshot published before the first probe completes
+UNKNOWN_STATUS = HealthStatus(False, False, 0.0, 0.0, 0.0, "not checked yet")
+
+MIN_INTERVAL = 1.0   # probe every second while something is down or changing
+MAX_INTERVAL = 5.0   # back off to this while everything stays healthy
+BACKOFF_FACTOR = 1.5
+
+
+class HealthChecker:
+    def __init__(self, handler, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL, bridge_metrics=None):
+        self.handler = handler
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.metrics = bridge_metrics
+        self.status = UNKNOWN_STATUS
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="HealthChecker", daemon=True)
+        self.thread.start()
+        if self.metrics:
+            self.metrics.register_gauge("serial_connected", "1 if the serial port is open and present",
+                                        lambda: int(self.status.serial_ok))
+            self.metrics.register_gauge("winforms_connected", "1 if the Shop-Flow window is reachable",
+                                        lambda: int(self.status.winforms_ok))
+
+    def stop(self):
+        self.stop_event.set()
+        self.wake_event.set()
+        if self.metrics:
+            self.metrics.unregister_gauge("serial_connected")
+            self.metrics.unregister_gauge("winforms_connected")
+
+    def check_now(self):
+        """Ask for an immediate probe (non-blocking)"""
+        self.interval = self.min_interval
+        self.wake_event.set()
+
+    def run(self):
+        while not self.stop_event.is_set():
+            try:
+                self.probe()
+            except Exception as e:
+                logging.debug(f"Health probe failed: {e}")
+            self.wake_event.wait(self.interval)
+            self.wake_event.clear()
+
+    def probe(self):
+        start = time.monotonic()
+        previous = self.status
+        serial_ok, serial_detail = self.probe_serial()
+        winforms_ok, winforms_detail = self.probe_winforms(previous.winforms_ok)
+        now = time.monotonic()
+
+        changed = (serial_ok, winforms_ok) != (previous.serial_ok, previous.winforms_ok)
+        if changed or not (serial_ok and winforms_ok):
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.interval * BACKOFF_FACTOR, self.max_interval)
+
+        self.status = HealthStatus(
+            serial_ok=serial_ok,
+            winforms_ok=winforms_ok,
+            checked_at=now,
+            probe_seconds=now - start,
+            changed_at=now if changed else previous.changed_at,
+            detail=f"serial: {serial_detail}; shop-flow: {winforms_detail}",
+        )
+
+    def probe_serial(self):
+        conn = self.handler.serial_conn
+        if conn is None or not conn.is_open:
+            return False, "closed"
+        # A USB adapter pulled out keeps is_open True; check it is still listed
+        try:
+            if self.handler.port not in self.handler.list_port_names():
+                return False, "port missing"
+        except Exception:
+            pass
+        return True, "open"
+
+    def probe_winforms(self, previous_ok):
+        window = self.handler.window
+        if window is None or self.handler.textbox is None:
+            return False, "not attached"
+        # Don't touch the window while the reader thread is driving it;
+        # an injection in progress means it was reachable a moment ago.
+        if not self.handler.ui_lock.acquire(blocking=False):
+            return previous_ok, "busy"
+        try:
+            return bool(window.exists(timeout=0.1)), "probed"
+        except Exception as e:
+            return False, f"error: {type(e).__name__}"
+        finally:
+            self.handler.ui_lock.release()
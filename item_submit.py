@@ -0,0 +1,141 @@
+"""
+Per-item submission: a multi-item frame is typed into Shop-Flow one item
+per Enter (screens such as DEVICEID_AUTO take one device ID at a time).
+
+Each item is set with set_text() and Enter; instead of fixed sleeps the
+submitter polls until Shop-Flow has taken the item (the textbox no longer
+holds it) or the cheap NG indicator (lblError) shows. The full NG scan
+(every child window of Shop-Flow) runs once per frame, after the last
+item. Item results are aggregated into one OK/NG for the frame.
+
+config.json:
+    "submit_mode": "items",       ("frame" = whole string, the default)
+    "item_timeout": 3.0,          (seconds to wait for one item)
+    "item_poll_interval": 0.02
+"""
+
+import collections
+import time
+
+FRAME_MODE = "frame"
+ITEM_MODE = "items"
+SUBMIT_MODES = (FRAME_MODE, ITEM_MODE)
+SEPARATOR = ';'
+DEFAULT_ITEM_TIMEOUT = 3.0
+DEFAULT_POLL_INTERVAL = 0.02
+INJECT_FAILED = "inject failed"
+TIMEOUT = "timeout"
+
+# One item typed into Shop-Flow; reason is "", "NG", TIMEOUT or INJECT_FAILED + error
+ItemResult = collections.namedtuple('ItemResult', ['item', 'ok', 'seconds', 'reason'])
+
+# Aggregated result of a frame; results is shorter than items when it stopped at an NG
+FrameResult = collections.namedtuple('FrameResult', ['ok', 'items', 'results', 'seconds'])
+
+
+class InjectError(Exception):
+    """An item could not be typed into the textbox"""
+
+
+def split_items(text, separator=SEPARATOR):
+    """Non-empty items of a frame, in order"""
+    return [item for item in (part.strip() for part in text.split(separator)) if item]
+
+
+def wait_until(condition, timeout, interval=DEFAULT_POLL_INTERVAL):
+    """Poll condition() until it is true or timeout expires; returns (met, seconds waited)"""
+    start = time.perf_counter()
+    deadline = start + timeout
+    while True:
+        if condition():
+            return True, time.perf_counter() - start
+        now = time.perf_counter()
+        if now >= deadline:
+            return False, now - start
+        time.sleep(min(interval, deadline - now))
+
+
+def items_per_second(result):
+    submitted = len(result.results)
+    return submitted / result.seconds if result.seconds > 0 else 0.0
+
+
+def reached_shopflow(result):
+    """True if at least one item was typed (a retry would submit it twice)"""
+    return any(not r.reason.startswith(INJECT_FAILED) for r in result.results)
+
+
+def format_result(result):
+    failed = [r for r in result.results if not r.ok]
+    text = (f"{'OK' if result.ok else 'NG'} - {len(result.results)}/{len(result.items)} items in "
+            f"{result.seconds:.2f}s ({items_per_second(result):.1f} items/s)")
+    if failed:
+        text += f", {failed[0].reason}: {failed[0].item}"
+    return text
+
+
+class ItemSubmitter:
+    """
+    Types items into a textbox one per Enter. Per item only the textbox text
+    and `quick_ng()` (optional, cheap) are checked; `detect_ng()`, the full
+    NG check, runs once per frame and marks the last item typed NG.
+    """
+    def __init__(self, textbox, detect_ng, quick_ng=None, timeout=DEFAULT_ITEM_TIMEOUT,
+                 poll_interval=DEFAULT_POLL_INTERVAL, stop_on_ng=True):
+        self.textbox = textbox
+        self.detect_ng = detect_ng
+        self.quick_ng = quick_ng or (lambda: False)
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.stop_on_ng = stop_on_ng
+
+    def type_item(self, item):
+        """set_text() + Enter, falling back to typing the item; raises InjectError"""
+        try:
+            self.textbox.set_text(item)
+            self.textbox.type_keys('{ENTER}', pause=0)
+        except Exception as e1:
+            try:
+                self.textbox.set_focus()
+                self.textbox.type_keys(item + '{ENTER}', pause=0)
+            except Exception as e2:
+                raise InjectError(f"set_text: {e1}; type_keys: {e2}")
+
+    def taken(self, item):
+        """Shop-Flow has read the item once the textbox no longer holds it"""
+        try:
+            return self.textbox.window_text().strip() != item
+        except Exception:
+            return False
+
+    def submit_one(self, item):
+        start = time.perf_counter()
+        self.type_item(item)
+        met, _ = wait_until(lambda: self.taken(item) or self.quick_ng(), self.timeout, self.poll_interval)
+        if self.quick_ng():
+            ok, reason = False, "NG"
+        elif not met:
+            # Not taken and no lblError; the frame's full NG check may still find a dialog
+            ok, reason = False, TIMEOUT
+        else:
+            ok, reason = True, ""
+        return ItemResult(item, ok, time.perf_counter() - start, reason)
+
+    def submit(self, items):
+        """Submit items in order; the frame is OK only if every item is OK"""
+        start = time.perf_counter()
+        results = []
+        for item in items:
+            try:
+                result = self.submit_one(item)
+            except InjectError as e:
+                result = ItemResult(item, False, 0.0, f"{INJECT_FAILED}: {e}")
+            results.append(result)
+            if not result.ok and self.stop_on_ng:
+                break
+        ok = bool(items) and len(results) == len(items) and all(r.ok for r in results)
+        last = results[-1] if results else None
+        if last and last.reason in ("", TIMEOUT) and self.detect_ng():
+            results[-1] = last._replace(ok=False, reason="NG")
+            ok = False
+        return FrameResult(ok, list(items), results, time.perf_counter() - start)
@@ -0,0 +1,90 @@
+"""
+On-demand, time-boxed cProfile capture for a single thread.
+
+cProfile only sees the thread that enabled it, so the profile has to be
+started and stopped from inside the thread being measured. Another thread
+(GUI menu, config flag) calls request(); the owning thread calls poll() from
+its loop only while `armed` is True, so a disabled hook costs one attribute
+check per loop iteration. cProfile and pstats are imported when a capture
+starts, not at startup.
+"""
+
+import io
+import logging
+import os
+import time
+from datetime import datetime
+
+DEFAULT_PROFILE_SECONDS = 60
+DEFAULT_TOP_N = 30
+
+
+class ThreadProfileHook:
+    def __init__(self, name, output_dir='log', top_n=DEFAULT_TOP_N):
+        self.name = name
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.armed = False
+        self.requested_seconds = None
+        self.profile = None
+        self.deadline = 0.0
+        self.started_at = None
+        self.last_result = None  # (prof_path, summary_path)
+
+    def request(self, seconds=DEFAULT_PROFILE_SECONDS):
+        """Ask the owning thread to profile itself for `seconds` (any thread)"""
+        if self.profile is not None:
+            logging.warning(f"Profiler '{self.name}' already running")
+            return
+        self.requested_seconds = seconds
+        self.armed = True
+
+    def poll(self):
+        """Start or finish the capture; call from the profiled thread only"""
+        if self.profile is not None:
+            if time.monotonic() >= self.deadline:
+                self.finish()
+        elif self.requested_seconds is not None:
+            seconds = self.requested_seconds
+            self.requested_seconds = None
+            self.started_at = datetime.now()
+            self.deadline = time.monotonic() + seconds
+            logging.info(f"🔬 Profiling '{self.name}' for {seconds}s")
+            import cProfile
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def finish(self):
+        """Stop the capture early or at the deadline and write the reports"""
+        profile = self.profile
+        if profile is None:
+            return None
+        profile.disable()
+        self.profile = None
+        self.armed = False
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            stamp = self.started_at.strftime("%Y%m%d_%H%M%S")
+            base = os.path.join(self.output_dir, f"profile_{self.name}_{stamp}")
+            prof_path = base + ".prof"
+            summary_path = base + "_summary.txt"
+            profile.dump_stats(prof_path)
+            with open(summary_path, 'w', encoding='utf-8') as f:
+                f.write(self.summarize(profile))
+            self.last_result = (prof_path, summary_path)
+            logging.info(f"🔬 Profile '{self.name}' saved: {prof_path}")
+            return self.last_result
+        except Exception as e:
+            logging.error(f"Failed to write profile '{self.name}': {e}")
+            return None
+
+    def summarize(self, profile):
+        """Top-N functions by cumulative and by own time"""
+        import pstats
+        out = io.StringIO()
+        out.write(f"Profile '{self.name}' started {self.started_at:%Y-%m-%d %H:%M:%S}\n\n")
+        for sort_key, title in (("cumulative", "cumulative time"), ("tottime", "own time")):
+            out.write(f"=== Top {self.top_n} by {title} ===\n")
+            stats = pstats.Stats(profile, stream=out)
+            stats.strip_dirs().sort_stats(sort_key).print_stats(self.top_n)
+        return out.getvalue()
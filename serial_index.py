@@ -0,0 +1,235 @@
+"""
+Persistent index of the device serials packed at this station.
+
+Serials of frames Shop-Flow accepted (OK) are stored in SQLite
+(journal/serials.db, WAL mode). A Bloom filter in memory answers "never
+packed" without touching the disk, so a new frame is checked in
+microseconds and a repeat can be answered NG before the UI is involved;
+only filter hits are confirmed against the table, so there are no false
+rejects. Entries older than `retention_days` are pruned.
+
+The filter is saved next to the database on close and caught up from the
+table on open (rows added after the save, e.g. before a crash); it is
+rebuilt when it holds more keys than it was sized for.
+
+    python serial_index.py stats  [db]
+    python serial_index.py remove <serial> [db]    (box unpacked, allow a repack)
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+
+DEFAULT_INDEX_PATH = os.path.join("journal", "serials.db")
+DEFAULT_RETENTION_DAYS = 30
+DEFAULT_CAPACITY = 5_000_000   # ~30 days at 20 serials every 10 s
+BITS_PER_KEY = 16              # ~0.1-0.2% false positives, each costs one table lookup
+HASHES = 8                     # bits set per key
+MASK_COUNT = 4096              # distinct bit patterns (power of two)
+MIX = 0x9E3779B97F4A7C15       # spreads the 32-bit crc over 64 bits
+BLOOM_SUFFIX = ".bloom"
+BLOOM_HEADER = struct.Struct("<8sQQQ")  # magic, words, keys added, last rowid
+BLOOM_MAGIC = b"SERBLK01"
+PRUNE_INTERVAL = 24 * 3600
+SQL_VARIABLES = 500            # serials per IN (...) query
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS serials (
+    serial TEXT PRIMARY KEY,
+    packed_at REAL NOT NULL,
+    frame_id INTEGER
+);
+CREATE INDEX IF NOT EXISTS serials_packed_at ON serials (packed_at);
+"""
+
+
+def make_masks():
+    """MASK_COUNT 64-bit masks with HASHES bits set each, derived deterministically"""
+    masks = []
+    for i in range(MASK_COUNT):
+        digest = hashlib.blake2b(i.to_bytes(4, 'little'), digest_size=32).digest()
+        bits = []
+        for byte in digest:
+            if byte & 63 not in bits:
+                bits.append(byte & 63)
+            if len(bits) == HASHES:
+                break
+        masks.append(sum(1 << bit for bit in bits))
+    return masks
+
+
+class BloomFilter:
+    """
+    Blocked Bloom filter: a key sets HASHES bits inside one 64-bit word, so a
+    lookup is one crc32, one word read and one mask compare.
+    """
+    masks = None
+
+    def __init__(self, capacity=DEFAULT_CAPACITY, words=None):
+        if BloomFilter.masks is None:
+            BloomFilter.masks = make_masks()
+        size = words or max(1, capacity * BITS_PER_KEY // 64)
+        self.words = array('Q', bytes(8 * size))
+        self.capacity = size * 64 // BITS_PER_KEY
+        self.count = 0
+
+    def slot(self, key):
+        mixed = (zlib.crc32(key) * MIX) & 0xFFFFFFFFFFFFFFFF
+        return (mixed >> 32) % len(self.words), self.masks[mixed & (MASK_COUNT - 1)]
+
+    def add(self, key):
+        word, mask = self.slot(key)
+        self.words[word] |= mask
+        self.count += 1
+
+    def __contains__(self, key):
+        word, mask = self.slot(key)
+        return self.words[word] & mask == mask
+
+
+class SerialIndex:
+    def __init__(self, path=DEFAULT_INDEX_PATH, retention_days=DEFAULT_RETENTION_DAYS,
+                 capacity=DEFAULT_CAPACITY, synchronous="NORMAL"):
+        self.path = path
+        self.retention_days = retention_days
+        self.capacity = capacity
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(f"PRAGMA synchronous={synchronous}")
+        self.db.executescript(SCHEMA)
+        self.last_prune = 0.0
+        self.bloom_hits = 0      # lookups that had to be confirmed in the table
+        self.bloom_misses = 0    # lookups answered by the filter alone
+        self.prune()
+        start = time.monotonic()
+        self.bloom, self.bloom_rowid = self.load_bloom()
+        logging.info(f"🔁 Serial index: {self.count()} serials, filter ready in "
+                     f"{(time.monotonic() - start) * 1000:.0f} ms")
+
+    def load_bloom(self):
+        """Saved filter caught up with newer rows, or a filter rebuilt from the table"""
+        bloom = None
+        last_rowid = 0
+        try:
+            with open(self.path + BLOOM_SUFFIX, 'rb') as f:
+                magic, words, count, last_rowid = BLOOM_HEADER.unpack(f.read(BLOOM_HEADER.size))
+                data = f.read()
+            if magic == BLOOM_MAGIC and len(data) == words * 8:
+                bloom = BloomFilter(words=words)
+                bloom.words = array('Q', data)
+                bloom.count = count
+        except (OSError, struct.error):
+            pass
+        rows = self.count()
+        # Pruned and removed serials keep their bits, so an old filter fills up over time
+        if bloom is None or rows > bloom.capacity or bloom.count > 2 * bloom.capacity:
+            bloom = BloomFilter(max(self.capacity, rows * 2))
+            last_rowid = 0
+        with self.lock:
+            cursor = self.db.execute("SELECT rowid, serial FROM serials WHERE rowid > ? ORDER BY rowid", (last_rowid,))
+            for rowid, serial in cursor:
+                bloom.add(serial.encode('utf-8'))
+                last_rowid = rowid
+        return bloom, last_rowid
+
+    def save_bloom(self):
+        bloom = self.bloom
+        tmp = self.path + BLOOM_SUFFIX + ".tmp"
+        with open(tmp, 'wb') as f:
+            f.write(BLOOM_HEADER.pack(BLOOM_MAGIC, len(bloom.words), bloom.count, self.bloom_rowid))
+            f.write(bloom.words.tobytes())
+        os.replace(tmp, self.path + BLOOM_SUFFIX)
+
+    def seen(self, serials):
+        """Serials from the list that were already packed (in list order)"""
+        bloom = self.bloom
+        candidates = [serial for serial in serials if serial.encode('utf-8') in bloom]
+        self.bloom_misses += len(serials) - len(candidates)
+        if not candidates:
+            return []
+        self.bloom_hits += len(candidates)
+        found = set()
+        with self.lock:
+            for i in range(0, len(candidates), SQL_VARIABLES):
+                chunk = candidates[i:i + SQL_VARIABLES]
+                rows = self.db.execute(
+                    f"SELECT serial FROM serials WHERE serial IN ({','.join('?' * len(chunk))})", chunk)
+                found.update(serial for serial, in rows)
+        return [serial for serial in candidates if serial in found]
+
+    def add(self, serials, frame_id=None):
+        """Record packed serials (repeats are ignored)"""
+        now = time.time()
+        with self.lock:
+            self.db.execute("BEGIN")
+            try:
+                self.db.executemany("INSERT OR IGNORE INTO serials (serial, packed_at, frame_id) VALUES (?, ?, ?)",
+                                    [(serial, now, frame_id) for serial in serials])
+                self.db.execute("COMMIT")
+            except Exception:
+                self.db.execute("ROLLBACK")
+                raise
+            self.bloom_rowid = self.db.execute("SELECT MAX(rowid) FROM serials").fetchone()[0] or 0
+        for serial in serials:
+            self.bloom.add(serial.encode('utf-8'))
+        if time.monotonic() - self.last_prune > PRUNE_INTERVAL:
+            self.prune()
+
+    def remove(self, serial):
+        """Forget a serial so it can be packed again; True if it was indexed"""
+        # The filter keeps its bits; a hit is confirmed in the table and misses
+        with self.lock:
+            return self.db.execute("DELETE FROM serials WHERE serial = ?", (serial,)).rowcount > 0
+
+    def prune(self):
+        """Delete serials packed more than retention_days ago"""
+        self.last_prune = time.monotonic()
+        if not self.retention_days:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400
+        with self.lock:
+            removed = self.db.execute("DELETE FROM serials WHERE packed_at < ?", (cutoff,)).rowcount
+        if removed:
+            logging.info(f"🔁 Serial index: pruned {removed} serials older than {self.retention_days} days")
+        return removed
+
+    def count(self):
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM serials").fetchone()[0]
+
+    def close(self):
+        try:
+            self.save_bloom()
+        except OSError as e:
+            logging.warning(f"🔁 Could not save serial filter: {e}")
+        with self.lock:
+            self.db.close()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    args = sys.argv[1:]
+    if args[:1] == ["stats"] and len(args) <= 2:
+        index = SerialIndex(args[1] if len(args) > 1 else DEFAULT_INDEX_PATH)
+        print(f"{index.count()} serials, filter {len(index.bloom.words) * 8 / 1024 / 1024:.1f} MB "
+              f"for {index.bloom.capacity} keys ({index.bloom.count} added)")
+        index.close()
+    elif args[:1] == ["remove"] and len(args) in (2, 3):
+        index = SerialIndex(args[2] if len(args) > 2 else DEFAULT_INDEX_PATH)
+        print(f"{args[1]}: {'removed' if index.remove(args[1]) else 'not in the index'}")
+        index.close()
+    else:
+        print("Usage: python serial_index.py stats [db]")
+        print("       python serial_index.py remove <serial> [db]")
+        sys.exit(2)
@@ -1,27 +1,77 @@
 import os
+import collections
+import queue
 import serial
 import serial.tools.list_ports
 import threading
 import time
-import pywinauto
 import logging
 import json
-import pystray
-from PIL import Image, ImageDraw
 
 import datetime
-import tkinter.messagebox as messagebox
+from bridge_metrics import metrics
+from profiler import ThreadProfileHook, DEFAULT_PROFILE_SECONDS
+from frame_journal import (FrameJournal, JournalReplayer, DELIVERED, FAILED, MAX_ATTEMPTS,
+                           DEFAULT_JOURNAL_PATH, DEFAULT_RETENTION_DAYS, DEFAULT_REPLAY_RATE)
+from giftbox import RecordLayout, DEFAULT_LAYOUT, decode as decode_giftbox, format_summary
+from transform import compile_transforms, Pipeline
+from framing import load_framing, Deframer, FramingProfile
+from item_submit import (ItemSubmitter, split_items, format_result, reached_shopflow,
+                         FRAME_MODE, ITEM_MODE, SUBMIT_MODES, DEFAULT_ITEM_TIMEOUT, DEFAULT_POLL_INTERVAL)
+from serial_index import SerialIndex, DEFAULT_INDEX_PATH, DEFAULT_RETENTION_DAYS as DEFAULT_SERIAL_RETENTION_DAYS
 
-# Logging setup
-os.makedirs('log', exist_ok=True)
-log_filename = f"log/{datetime.date.today()}.txt"
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s', handlers=[logging.FileHandler(log_filename, encoding='utf-8'), logging.StreamHandler()])
+# pywinauto (comtypes, win32 wrappers) is imported on first use in
+# connect_winforms(); importing this module has no side effects.
+
+class JsonLogFormatter(logging.Formatter):
+    """One JSON object per line for log shippers"""
+    def format(self, record):
+        entry = {
+            'time': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'thread': record.threadName,
+            'message': record.getMessage(),
+        }
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False)
+
+def setup_logging(log_dir='log', log_format='text', verbose=False):
+    """Daily log file + console; JSON lines go to log/<date>.jsonl"""
+    os.makedirs(log_dir, exist_ok=True)
+    if log_format == 'json':
+        formatter = JsonLogFormatter()
+        log_path = os.path.join(log_dir, f"{datetime.date.today()}.jsonl")
+    else:
+        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+        log_path = os.path.join(log_dir, f"{datetime.date.today()}.txt")
+    handlers = [logging.FileHandler(log_path, encoding='utf-8'), logging.StreamHandler()]
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO, handlers=handlers, force=True)
+
+# Outcome of SerialToWinForms.start() with per-component timing (seconds)
+StartupReport = collections.namedtuple(
+    'StartupReport',
+    ['serial_ok', 'winforms_ok', 'serial_seconds', 'winforms_seconds', 'total_seconds'])
+
+# How long stop() waits for a replayed frame being typed before closing the journal (seconds)
+JOURNAL_STOP_TIMEOUT = 2.0
+
+# Sent at scan time for a frame that is journaled instead of typed (Shop-Flow down / backlog)
+DEFAULT_QUEUED_RESPONSE = "NG"
+
+# How long reconnect_serial() waits for the reader thread to swap the port (seconds)
+REOPEN_TIMEOUT = 10.0
+
+# Pause after a failed serial read before the next attempt (seconds, the port timeout)
+READ_ERROR_BACKOFF = 1.0
 
 class SerialToWinForms:
-    def __init__(self, auto_reset=False):
+    def __init__(self, auto_reset=False, config_path='config.json', show_dialogs=True):
         # Load config from JSON
         try:
-            with open('config.json', 'r', encoding='utf-8') as f:
+            with open(config_path, 'r', encoding='utf-8') as f:
                 config = json.load(f)
         except FileNotFoundError:
             logging.warning("config.json not found, using defaults")
@@ -32,17 +82,95 @@ class SerialToWinForms:
         self.target_app_title = config.get('target_app_title', 'Shop-Flow System From Indonesia(Pack)')
         self.textbox_auto_id = config.get('textbox_auto_id', 'GIFTBOX_AUTO')
         self.backend = config.get('backend', 'win32')
+        self.profile_on_start = config.get('profile_on_start', False)
+        self.profile_seconds = int(config.get('profile_seconds', DEFAULT_PROFILE_SECONDS))
+        self.config_path = config_path
         self.serial_conn = None
         self.running = False
+        self.thread = None
+        # reconnect_serial() calls waiting for the reader thread: one reply queue each
+        self.reopen_requests = queue.Queue()
         self.app = None
         self.window = None
         self.textbox = None
         self.auto_reset = auto_reset  # Auto reset before sending data
+        self.show_dialogs = show_dialogs  # False in headless mode: log only
+        self.metrics = metrics
+        self.profile_hook = ThreadProfileHook("serial_reader")
+        # Held while the reader thread drives the Shop-Flow window
+        self.ui_lock = threading.Lock()
+        # Startup readiness: set once start() knows the outcome
+        self.ready_event = threading.Event()
+        self.startup_report = None
+        # Liveness data read by the supervisor (monotonic seconds)
+        self.started_at = time.monotonic()
+        self.last_frame_time = None
+        self.consecutive_failures = 0  # frames that could not be delivered in a row
+        self.read_errors = 0           # serial reads that failed in a row (port unplugged / broken)
+        self.stop_requested = False
+        # Store-and-forward journal: frames survive Shop-Flow outages and crashes
+        self.journal = None
+        self.replayer = None
+        # Held around the journal reads/writes that decide who types a frame (not while typing)
+        self.delivery_lock = threading.Lock()
+        self.delivering = set()  # journal ids being typed right now, live or replayed
+        self.replay_rate = float(config.get('replay_rate', DEFAULT_REPLAY_RATE))
+        # Answer for a frame kept in the journal; its replay later sends nothing on the serial line
+        self.queued_response = str(config.get('queued_response', DEFAULT_QUEUED_RESPONSE))
+        # Wire format: ASCII lines, or control-byte frames with a checksum (see framing.py)
+        self.framing_config = config.get('framing')
+        self.framing = self.load_framing(self.framing_config)
+        self.deframer = Deframer(self.framing)
+        # perf_counter when the first byte of the current / a partially received frame was read
+        self.frame_arrived_at = None
+        self.partial_frame_at = None
+        self.response_due = None  # arrival time of the frame still waiting for its OK/NG
+        # Item records of the last frame, column-wise (see giftbox.py)
+        try:
+            self.giftbox_layout = RecordLayout(config.get('giftbox_layout', DEFAULT_LAYOUT))
+        except (TypeError, ValueError) as e:
+            logging.error(f"Invalid giftbox_layout in config, using the default: {e}")
+            self.giftbox_layout = RecordLayout()
+        self.last_batch = None
+        # Declarative edits to the text typed into Shop-Flow (see transform.py)
+        self.transforms = config.get('transforms')
+        self.transform = self.compile_transforms(self.transforms)
+        self.last_result_ok = None  # OK/NG of the last frame typed into Shop-Flow
+        # "items": one item per Enter with condition-based waits (see item_submit.py)
+        self.submit_mode = config.get('submit_mode', FRAME_MODE)
+        if self.submit_mode not in SUBMIT_MODES:
+            logging.error(f"Invalid submit_mode '{self.submit_mode}' in config, using '{FRAME_MODE}'")
+            self.submit_mode = FRAME_MODE
+        self.item_timeout = float(config.get('item_timeout', DEFAULT_ITEM_TIMEOUT))
+        self.item_poll_interval = float(config.get('item_poll_interval', DEFAULT_POLL_INTERVAL))
+        self.last_item_result = None
+        # Serials already packed at this station: repeats get NG without a Shop-Flow round trip
+        self.serial_index = None
+        if config.get('serial_index_enabled', False):
+            index_path = config.get('serial_index_path', DEFAULT_INDEX_PATH)
+            if not os.path.isabs(index_path):
+                index_path = os.path.join(os.path.dirname(os.path.abspath(config_path)), index_path)
+            try:
+                self.serial_index = SerialIndex(
+                    index_path, config.get('serial_retention_days', DEFAULT_SERIAL_RETENTION_DAYS))
+            except Exception as e:
+                logging.error(f"Duplicate serial check disabled, cannot open {index_path}: {e}")
+        if config.get('journal_enabled', False):
+            journal_path = config.get('journal_path', DEFAULT_JOURNAL_PATH)
+            if not os.path.isabs(journal_path):
+                journal_path = os.path.join(os.path.dirname(os.path.abspath(config_path)), journal_path)
+            try:
+                self.journal = FrameJournal(journal_path, config.get('journal_retention_days', DEFAULT_RETENTION_DAYS))
+            except Exception as e:
+                logging.error(f"Frame journal disabled, cannot open {journal_path}: {e}")
+
+    def list_port_names(self):
+        """Names of the serial ports currently present (no logging)"""
+        return [port.device for port in serial.tools.list_ports.comports()]
 
     def list_available_ports(self):
         """List available serial ports"""
-        ports = serial.tools.list_ports.comports()
-        available_ports = [port.device for port in ports]
+        available_ports = self.list_port_names()
         logging.info(f"Available serial ports: {available_ports}")
         return available_ports
 
@@ -61,7 +189,7 @@ class SerialToWinForms:
         except serial.SerialException as e:
             logging.error(f"Serial port connection failed: {e}")
             if "Access is denied" in str(e) or "액세스가 거부되었습니다" in str(e):
-                messagebox.showerror("Error", f"Serial port connection failed: {e}")
+                self.show_error("Error", f"Serial port connection failed: {e}")
             return False
         return True
 
@@ -88,43 +216,218 @@ class SerialToWinForms:
 
     def read_serial_data(self):
         while self.running:
+            if self.profile_hook.armed:
+                self.profile_hook.poll()
+            self.serve_reopen_requests()
             if self.serial_conn:
                 try:
-                    start_time = time.time()
-                    raw_data = self.serial_conn.readline().decode('utf-8').strip()
-                    read_time = time.time() - start_time
-                    if raw_data:
-                        logging.info(f"Raw serial data received: {raw_data} (Read time: {read_time:.3f}s)")
-                        
-                        # Parse STX/ETX format first
-                        parsed_data = self.parse_stx_etx_data(raw_data)
-                        
-                        # Check for RESET command (after parsing)
-                        if parsed_data.upper() == "RESET":
-                            logging.info("🔄 RESET command received from serial")
-                            reset_start = time.time()
-                            self.click_reset_button()
-                            reset_time = time.time() - reset_start
-                            logging.info(f"✅ Reset button clicked (Time: {reset_time:.3f}s)")
-                            continue
-                        
-                        # Send entire string to Shop-Flow (no splitting)
-                        input_start = time.time()
-                        self.input_to_winforms(parsed_data)
-                        input_time = time.time() - input_start
-                        logging.info(f"WinForms input completed (Input time: {input_time:.3f}s)")
-                    else:
-                        logging.debug("No data, timeout")
+                    frames = self.read_frames()
+                    received_at = time.perf_counter()
                 except Exception as e:
-                    logging.error(f"Data read error: {e}")
+                    # A port fault, not a delivery failure: the supervisor reopens the port
+                    self.read_errors += 1
+                    logging.error(f"Serial read error ({self.read_errors} in a row): {e}")
+                    time.sleep(READ_ERROR_BACKOFF)
+                    continue
+                self.read_errors = 0
+                if not frames:
+                    logging.debug("No data, timeout")
+                for raw_data in frames:
+                    try:
+                        self.process_frame(raw_data, self.frame_arrived_at, received_at)
+                    except Exception as e:
+                        logging.error(f"Data read error: {e}")
+                        self.consecutive_failures += 1
             else:
                 # Wait if no serial connection
                 time.sleep(1)
+        # Flush a capture still running when the handler stops
+        self.profile_hook.finish()
 
-    def input_to_winforms(self, data):
+    def read_frames(self):
+        """
+        Frames completed by the next read: one line (ascii) or the frames in the bytes received.
+        frame_arrived_at is set when the first byte of a frame is read, so the idle wait
+        for data (up to the port timeout) is not counted as read latency.
+        """
+        if self.framing.line_based:
+            first = self.serial_conn.read(1)
+            if not first:
+                return []
+            self.frame_arrived_at = time.perf_counter()
+            line = first if first == b'\n' else first + self.serial_conn.readline()
+            raw_data = line.decode('utf-8').strip()
+            return [raw_data] if raw_data else []
+        data = self.serial_conn.read(self.serial_conn.in_waiting or 1)
+        if not data:
+            return []
+        now = time.perf_counter()
+        self.frame_arrived_at = (self.partial_frame_at or now) if self.deframer.buffer else now
+        frames, errors = self.deframer.feed(data)
+        # Bytes left over belong to a frame that is still arriving
+        if not self.deframer.buffer:
+            self.partial_frame_at = None
+        else:
+            self.partial_frame_at = now if frames else self.frame_arrived_at
+        for reason in errors:
+            # Not answered: the bytes may belong to no frame at all, and the device
+            # would pair an NG with the wrong scan. Counted in framing_errors.
+            logging.warning(f"🧩 Frame dropped ({reason}) - {self.deframer.stats()}")
+        return frames
+
+    def process_frame(self, raw_data, arrived_at, received_at):
+        """Decode, check and deliver one received frame (times are perf_counter values)"""
+        self.last_frame_time = time.monotonic()
+        self.metrics.inc_frames()
+        read_time = received_at - arrived_at
+        self.metrics.observe("read", read_time)
+        self.response_due = None
+        logging.info(f"Raw serial data received: {raw_data} (Read time: {read_time:.3f}s)")
+        
+        # Parse STX/ETX format first
+        parsed_data = self.parse_stx_etx_data(raw_data)
+        
+        # Check for RESET command (after parsing)
+        if parsed_data.upper() == "RESET":
+            logging.info("🔄 RESET command received from serial")
+            reset_start = time.time()
+            with self.ui_lock:
+                self.click_reset_button()
+            reset_time = time.time() - reset_start
+            logging.info(f"✅ Reset button clicked (Time: {reset_time:.3f}s)")
+            return
+        
+        # end_to_end runs from the first byte of the frame to its OK/NG being written
+        self.response_due = arrived_at
+        batch = self.decode_frame(parsed_data)
+        if self.reject_duplicates(batch):
+            return
+        
+        # Journal first, so the frame survives a Shop-Flow outage or crash
+        input_start = time.time()
+        with self.delivery_lock:
+            journal = self.journal  # stop() may close it while this frame is processed
+            frame_id = journal.append(parsed_data) if journal else None
+            backlog = frame_id is not None and journal.pending_before(frame_id)
+            queued = backlog or (frame_id is not None and self.textbox is None)
+            if frame_id is not None and not queued:
+                self.delivering.add(frame_id)
+        if queued:
+            logging.warning(f"📥 Frame #{frame_id} kept in journal "
+                            f"({'queued behind backlog' if backlog else 'Shop-Flow unavailable'})")
+            self.send_queued_to_serial(frame_id)
+            return
+        try:
+            # Whole string, or one item per Enter with submit_mode "items"
+            delivered = self.deliver_frame(parsed_data, frame_id)
+        finally:
+            if frame_id is not None:
+                with self.delivery_lock:
+                    self.delivering.discard(frame_id)
+        if not delivered and frame_id is not None:
+            # Still pending: the line gets its answer now, the replay sends none
+            self.send_queued_to_serial(frame_id)
+        input_time = time.time() - input_start
+        logging.info(f"WinForms input completed (Input time: {input_time:.3f}s)")
+
+    def load_framing(self, spec, fallback=None):
+        """Framing profile from config; an invalid one keeps `fallback` (or ASCII lines)"""
+        try:
+            framing = load_framing(spec)
+        except (TypeError, ValueError) as e:
+            logging.error(f"🧩 Invalid framing in config: {e}")
+            return fallback or FramingProfile()
+        logging.info(f"🧩 Serial framing: {framing}")
+        return framing
+
+    def get_framing_errors(self):
+        """Frames dropped by the deframer (bad checksum, length or end byte)"""
+        return self.deframer.corrupted + self.deframer.malformed
+
+    def compile_transforms(self, transforms, fallback=None):
+        """Pipeline for the current target; an invalid chain keeps `fallback` (or sends frames unchanged)"""
+        try:
+            pipeline = compile_transforms(transforms, self.target_app_title, self.giftbox_layout)
+        except ValueError as e:
+            logging.error(f"🔧 Invalid transforms in config: {e}")
+            return fallback or Pipeline()
+        if len(pipeline):
+            logging.info(f"🔧 Transforms for '{self.target_app_title}': {pipeline}")
+        return pipeline
+
+    def decode_frame(self, data):
+        """Decode the giftbox item records of a frame and log the batch summary"""
+        try:
+            batch = decode_giftbox(data, self.giftbox_layout)
+        except Exception as e:
+            logging.warning(f"📦 Giftbox decode failed: {e}")
+            return None
+        if batch.count:
+            self.last_batch = batch
+            summary = batch.summary
+            level = logging.WARNING if summary.duplicates or summary.malformed else logging.INFO
+            logging.log(level, f"📦 Giftbox: {format_summary(summary)}")
+        return batch
+
+    def reject_duplicates(self, batch):
+        """Answer NG for a frame with serials that were already packed; True if rejected"""
+        index = self.serial_index
+        if not (index and batch and batch.count):
+            return False
+        check_start = time.perf_counter()
+        repeated = list(batch.summary.duplicates) + index.seen(batch.column('serial'))
+        if not repeated:
+            return False
+        logging.warning(f"🔁 Already packed: {', '.join(dict.fromkeys(repeated))} - NG without Shop-Flow "
+                        f"(checked in {(time.perf_counter() - check_start) * 1e6:.0f} µs)")
+        self.send_ng_to_serial()
+        return True
+
+    def record_packed(self, data, frame_id=None):
+        """Add the serials of a frame Shop-Flow accepted to the duplicate index"""
+        batch = decode_giftbox(data, self.giftbox_layout)
+        if batch.count:
+            try:
+                self.serial_index.add(batch.column('serial'), frame_id)
+            except Exception as e:
+                logging.error(f"🔁 Could not record packed serials: {e}")
+
+    def deliver_frame(self, data, frame_id=None, reply=True):
+        """
+        Type one frame into Shop-Flow and update its journal status; True if delivered.
+        reply=False (journal replay): the OK/NG is logged, not sent - the line was answered at scan time.
+        """
+        journal = self.journal
+        if journal and self.textbox is None:
+            logging.warning(f"📥 Shop-Flow unavailable - frame #{frame_id} kept in journal")
+            self.consecutive_failures += 1
+            return False
+        self.last_result_ok = None
+        text = self.transform(data)
+        with self.ui_lock:
+            if self.submit_mode == ITEM_MODE:
+                delivered = self.input_items_to_winforms(text, reply)
+            else:
+                delivered = self.input_to_winforms(text, reply)
+        self.consecutive_failures = 0 if delivered else self.consecutive_failures + 1
+        if delivered and not reply:
+            level = logging.INFO if self.last_result_ok else logging.WARNING
+            logging.log(level, f"📤 Frame #{frame_id} replayed: {'OK' if self.last_result_ok else 'NG'} in Shop-Flow "
+                               f"(no serial response, answered at scan time)")
+        if delivered and self.last_result_ok and self.serial_index:
+            self.record_packed(data, frame_id)
+        if journal and frame_id is not None:
+            if delivered:
+                journal.mark(frame_id, DELIVERED)
+            elif journal.record_attempt(frame_id) == FAILED:
+                logging.error(f"📒 Frame #{frame_id} not delivered after {MAX_ATTEMPTS} attempts, marked failed: {data}")
+        return delivered
+
+    def input_to_winforms(self, data, reply=True):
+        """Type data into the Shop-Flow textbox; True if it was delivered (reply: send OK/NG)"""
         if not self.textbox:
             logging.error("Textbox not initialized")
-            return
+            return False
         try:
             # Auto reset before sending data if enabled
             if self.auto_reset:
@@ -138,6 +441,7 @@ class SerialToWinForms:
             # Try method 1: set_text() + type_keys Enter
             try:
                 logging.info(f"Attempting to input data: '{data}'")
+                inject_start = time.time()
                 self.window.set_focus()  # Focus window first
                 time.sleep(0.1)
                 
@@ -148,38 +452,108 @@ class SerialToWinForms:
                 
                 # Press Enter
                 self.textbox.type_keys('{ENTER}', pause=0.1)
+                self.metrics.observe("inject", time.time() - inject_start)
                 logging.info(f"Data input successful to '{self.textbox_auto_id}': {data}")
                 
                 # Wait for Shop-Flow to process data (increased wait time)
                 time.sleep(1.0)  # Increased from 0.5 to 1.0 seconds
                 
                 # Check lblError popup after input
-                self.check_lbl_error_popup()
+                self.check_lbl_error_popup(reply)
+                return True
             except Exception as e1:
                 logging.error(f"set_text() method failed: {e1}, trying type_keys()...")
                 # Method 2: type_keys
                 try:
+                    inject_start = time.time()
                     self.window.set_focus()
                     self.textbox.set_focus()
                     time.sleep(0.1)
                     self.textbox.type_keys(data + '{ENTER}', pause=0.1)
+                    self.metrics.observe("inject", time.time() - inject_start)
                     logging.info(f"type_keys() successful: {data}")
                     time.sleep(1.0)  # Increased wait time
-                    self.check_lbl_error_popup()
+                    self.check_lbl_error_popup(reply)
+                    return True
                 except Exception as e2:
                     logging.error(f"type_keys() also failed: {e2}")
+                    return False
         except Exception as e:
             logging.error(f"WinForms input error: {type(e).__name__} - {str(e)}")
             logging.error(f"Exception details: {repr(e)}")
             if "[WinError 5]" in str(e):
-                messagebox.showerror("Error", "Please run as administrator")
+                self.show_error("Error", "Please run as administrator")
+            return False
+
+    def input_items_to_winforms(self, data, reply=True):
+        """Type each item of a frame with its own Enter and send one OK/NG (if reply); True if delivered"""
+        if not self.textbox:
+            logging.error("Textbox not initialized")
+            return False
+        items = split_items(data)
+        if not items:
+            logging.warning(f"No items to submit in: '{data}'")
+            return False
+        try:
+            if self.auto_reset:
+                logging.info("🔄 Auto Reset enabled - Resetting before sending data")
+                self.click_reset_button()
+            inject_start = time.time()
+            self.window.set_focus()  # Once per frame; items only need set_text + Enter
+            # Items are checked after Shop-Flow took them, so lblError needs no extra wait;
+            # the full NG scan (all child windows) runs once, after the last item
+            detect_seconds = []
+
+            def detect_ng():
+                detect_start = time.time()
+                try:
+                    return self.detect_ng(0)
+                finally:
+                    detect_seconds.append(time.time() - detect_start)
+
+            submitter = ItemSubmitter(self.textbox, detect_ng, self.lbl_error_visible,
+                                      self.item_timeout, self.item_poll_interval)
+            result = submitter.submit(items)
+        except Exception as e:
+            logging.error(f"WinForms item input error: {type(e).__name__} - {str(e)}")
+            if "[WinError 5]" in str(e):
+                self.show_error("Error", "Please run as administrator")
+            return False
+        self.last_item_result = result
+        if not reached_shopflow(result):
+            logging.error(f"Item input failed: {result.results[0].reason}")
+            return False
+        # inject: typing and item waits; result: the frame's NG scan
+        self.metrics.observe("inject", time.time() - inject_start - sum(detect_seconds))
+        for detect_time in detect_seconds:
+            self.metrics.observe("result", detect_time)
+        for item_result in result.results:
+            logging.debug(f"Item {item_result.item}: {'OK' if item_result.ok else item_result.reason} "
+                          f"({item_result.seconds * 1000:.0f} ms)")
+        self.last_result_ok = result.ok
+        if result.ok:
+            logging.info(f"📋 Items: {format_result(result)}")
+        else:
+            logging.warning(f"📋 Items: {format_result(result)}")
+        if reply:
+            self.send_result_to_serial(result.ok)
+        return True
+
+    def show_error(self, title, message):
+        """Show an error dialog (GUI mode only); tkinter is imported on first use"""
+        if not self.show_dialogs:
+            return
+        import tkinter.messagebox as messagebox
+        messagebox.showerror(title, message)
 
     def send_ng_to_serial(self):
         try:
             # Send NG back to serial
             if self.serial_conn:
-                bytes_written = self.serial_conn.write(b'NG\n')
+                self.metrics.inc_ng()
+                bytes_written = self.serial_conn.write(self.framing.encode("NG"))
                 self.serial_conn.flush()  # Đảm bảo dữ liệu được gửi ngay
+                self.observe_response()
                 logging.warning(f"⚠️ NG serial transmission successful ({bytes_written} bytes)")
             else:
                 logging.error("❌ NG transmission failed - no serial connection")
@@ -188,16 +562,47 @@ class SerialToWinForms:
 
     def send_ok_to_serial(self):
         try:
-            # Send OK back to serial
+            # Send OK back to serial, framed like the scans (plain "OK\n" with ascii framing)
             if self.serial_conn:
-                bytes_written = self.serial_conn.write(b'OK\n')
+                self.metrics.inc_ok()
+                bytes_written = self.serial_conn.write(self.framing.encode("OK"))
                 self.serial_conn.flush()  # Ensure data is sent immediately
+                self.observe_response()
                 logging.info(f"✅ OK serial transmission successful ({bytes_written} bytes)")
             else:
                 logging.error("❌ OK transmission failed - no serial connection")
         except Exception as e:
             logging.error(f"❌ OK transmission error: {type(e).__name__} - {e}")
 
+    def send_result_to_serial(self, ok):
+        if ok:
+            self.send_ok_to_serial()
+        else:
+            self.send_ng_to_serial()
+
+    def send_queued_to_serial(self, frame_id):
+        """Answer a frame kept in the journal at scan time (queued_response); its replay sends nothing"""
+        try:
+            if self.serial_conn:
+                if self.queued_response == "NG":
+                    self.metrics.inc_ng()
+                bytes_written = self.serial_conn.write(self.framing.encode(self.queued_response))
+                self.serial_conn.flush()
+                self.observe_response()
+                logging.warning(f"📥 {self.queued_response} sent for journaled frame #{frame_id} ({bytes_written} bytes)")
+            else:
+                logging.error(f"❌ {self.queued_response} transmission failed - no serial connection")
+        except Exception as e:
+            logging.error(f"❌ {self.queued_response} transmission error: {type(e).__name__} - {e}")
+        if self.replayer:
+            self.replayer.wake()
+
+    def observe_response(self):
+        """Record end_to_end for the frame whose OK/NG was just written"""
+        arrived_at, self.response_due = self.response_due, None
+        if arrived_at is not None:
+            self.metrics.observe("end_to_end", time.perf_counter() - arrived_at)
+
     def click_reset_button(self):
         """Click the Reset button on Shop-Flow using keyboard shortcuts"""
         try:
@@ -226,78 +631,86 @@ class SerialToWinForms:
             logging.error(f"❌ Reset button click error: {type(e).__name__} - {e}")
             return False
 
-    def check_lbl_error_popup(self):
-        """Check if lblError popup or NG dialog is visible and send OK/NG accordingly"""
+    def lbl_error_visible(self, timeout=0):
+        """Cheap NG check: the lblError element is shown (timeout None = pywinauto default wait)"""
         try:
-            is_ng = False
-            
-            # Method 1: Check for lblError element
+            lbl_error = self.window.child_window(auto_id='lblError')
+            return lbl_error.exists(timeout=timeout) and lbl_error.is_visible()
+        except:
+            return False
+
+    def detect_ng(self, lbl_timeout=None):
+        """True if lblError popup or an NG dialog is visible"""
+        is_ng = False
+        
+        # Method 1: Check for lblError element
+        if self.lbl_error_visible(lbl_timeout):
+            logging.warning("lblError popup detected - sending NG")
+            is_ng = True
+        
+        # Method 2: Check for any visible window/dialog with "NG" text
+        if not is_ng:
             try:
-                lbl_error = self.window.child_window(auto_id='lblError')
-                if lbl_error.exists() and lbl_error.is_visible():
-                    logging.warning("lblError popup detected - sending NG")
-                    is_ng = True
+                # Get all child windows
+                children = self.window.children()
+                for child in children:
+                    try:
+                        text = child.window_text()
+                        # Check if control has "NG" text and is visible
+                        if text and "NG" in text and child.is_visible():
+                            # Check if it's a large control (likely the NG popup)
+                            rect = child.rectangle()
+                            width = rect.width()
+                            height = rect.height()
+                            # If control is large enough (e.g., > 200x200), it's probably the NG popup
+                            if width > 200 and height > 200:
+                                logging.warning(f"NG popup detected (text='{text}', size={width}x{height}) - sending NG")
+                                is_ng = True
+                                break
+                    except:
+                        continue
             except:
                 pass
-            
-            # Method 2: Check for any visible window/dialog with "NG" text
-            if not is_ng:
-                try:
-                    # Get all child windows
-                    children = self.window.children()
-                    for child in children:
-                        try:
-                            text = child.window_text()
-                            # Check if control has "NG" text and is visible
-                            if text and "NG" in text and child.is_visible():
-                                # Check if it's a large control (likely the NG popup)
-                                rect = child.rectangle()
-                                width = rect.width()
-                                height = rect.height()
-                                # If control is large enough (e.g., > 200x200), it's probably the NG popup
-                                if width > 200 and height > 200:
-                                    logging.warning(f"NG popup detected (text='{text}', size={width}x{height}) - sending NG")
-                                    is_ng = True
-                                    break
-                        except:
-                            continue
-                except:
-                    pass
-            
-            # Method 3: Check for red color in large area (NG screen is red)
+        
+        # Method 3: Check for red color in large area (NG screen is red)
+        if not is_ng:
+            try:
+                # Try to find controls with "NG" in class name or control type
+                ng_controls = self.window.descendants(control_type="Window")
+                for ctrl in ng_controls:
+                    try:
+                        if ctrl.is_visible():
+                            text = ctrl.window_text()
+                            if "NG" in str(text):
+                                logging.warning(f"NG control detected: {text}")
+                                is_ng = True
+                                break
+                    except:
+                        continue
+            except:
+                pass
+        
+        return is_ng
+
+    def check_lbl_error_popup(self, reply=True):
+        """Check if lblError popup or NG dialog is visible and send OK/NG accordingly (reply=False: record only)"""
+        detect_start = time.time()
+        try:
+            is_ng = self.detect_ng()
+            self.metrics.observe("result", time.time() - detect_start)
             if not is_ng:
-                try:
-                    # Try to find controls with "NG" in class name or control type
-                    ng_controls = self.window.descendants(control_type="Window")
-                    for ctrl in ng_controls:
-                        try:
-                            if ctrl.is_visible():
-                                text = ctrl.window_text()
-                                if "NG" in str(text):
-                                    logging.warning(f"NG control detected: {text}")
-                                    is_ng = True
-                                    break
-                        except:
-                            continue
-                except:
-                    pass
-            
-            # Send result
-            if is_ng:
-                self.send_ng_to_serial()
-            else:
-                logging.info("No NG indicators found - sending OK")
-                self.send_ok_to_serial()
-                
+                logging.info("No NG indicators found" + (" - sending OK" if reply else ""))
         except Exception as e:
             # If can't determine, check the error message for common NG indicators
             error_msg = str(e).lower()
-            if "ng" in error_msg or "error" in error_msg or "fail" in error_msg:
+            is_ng = "ng" in error_msg or "error" in error_msg or "fail" in error_msg
+            if is_ng:
                 logging.warning(f"Exception suggests NG: {e}")
-                self.send_ng_to_serial()
             else:
                 logging.info(f"Cannot determine status (assuming OK): {e}")
-                self.send_ok_to_serial()
+        self.last_result_ok = not is_ng
+        if reply:
+            self.send_result_to_serial(not is_ng)
 
     def list_running_windows(self):
         """List running windows"""
@@ -341,11 +754,9 @@ class SerialToWinForms:
             logging.error(f"Failed to search by partial title: {e}")
         return None
 
-    def start(self):
-        # For testing purposes, allow to continue even if serial connection fails
-        serial_connected = self.connect_serial()
-        if not serial_connected:
-            logging.warning("Serial connection failed, but continuing to test WinForms connection...")
+    def connect_winforms(self):
+        """Attach to Shop-Flow and resolve the target textbox; True on success"""
+        import pywinauto
         
         # Display running windows list
         self.list_running_windows()
@@ -370,7 +781,6 @@ class SerialToWinForms:
                         logging.info("Connected using process name")
                     except:
                         # Method 4: Connect to any window with "Shop" or "Indonesia" in title
-                        import pywinauto
                         desktop = pywinauto.Desktop(backend=self.backend)
                         for window in desktop.windows():
                             try:
@@ -442,25 +852,228 @@ class SerialToWinForms:
                             continue
                 except Exception as ctrl_e:
                     logging.error(f"Failed to list controls: {ctrl_e}")
-                return
+                return False
             logging.info("WinForms app connection and textbox discovery successful")
+            return True
         except Exception as e:
             logging.error(f"WinForms app connection failed: {e}")
             logging.error(f"Make sure the application '{self.target_app_title}' is running")
-            return
+            return False
+
+    def start(self):
+        """
+        Connect serial + Shop-Flow and start the reader thread.
+        Returns a StartupReport; ready_event is set as soon as it is known.
+        """
+        self.ready_event.clear()
+        self.startup_report = None
+        start_time = time.monotonic()
+        self.started_at = start_time
+        serial_connected = False
+        winforms_connected = False
+        serial_time = winforms_time = 0.0
+        try:
+            # For testing purposes, allow to continue even if serial connection fails
+            serial_connected = self.connect_serial()
+            serial_time = time.monotonic() - start_time
+            if not serial_connected:
+                logging.warning("Serial connection failed, but continuing to test WinForms connection...")
+            
+            winforms_start = time.monotonic()
+            winforms_connected = self.connect_winforms()
+            winforms_time = time.monotonic() - winforms_start
+            if winforms_connected:
+                self.start_reader()
+        finally:
+            self.startup_report = StartupReport(
+                serial_ok=serial_connected and self.serial_conn is not None and self.serial_conn.is_open,
+                winforms_ok=winforms_connected and self.window is not None and self.textbox is not None,
+                serial_seconds=serial_time,
+                winforms_seconds=winforms_time,
+                total_seconds=time.monotonic() - start_time)
+            logging.info(f"Startup finished in {self.startup_report.total_seconds:.3f}s "
+                         f"(serial: {'OK' if self.startup_report.serial_ok else 'FAILED'} {serial_time:.3f}s, "
+                         f"Shop-Flow: {'OK' if self.startup_report.winforms_ok else 'FAILED'} {winforms_time:.3f}s)")
+            self.ready_event.set()
+        return self.startup_report
+
+    def wait_ready(self, timeout=None):
+        """Block until start() has finished; returns the StartupReport (None on timeout)"""
+        if self.ready_event.wait(timeout):
+            return self.startup_report
+        return None
+
+    def start_reader(self):
+        """Start the background serial reader thread"""
         self.running = True
+        if self.profile_on_start:
+            self.profile_hook.request(self.profile_seconds)
+        self.metrics.register_gauge("serial_queue_depth", "Bytes waiting in the serial input buffer", self.get_queue_depth)
+        self.metrics.register_gauge("framing_errors", "Frames dropped for a bad checksum, length or end byte",
+                                    self.get_framing_errors)
+        if self.journal and not self.replayer:
+            self.replayer = JournalReplayer(self, self.journal, self.replay_rate)
+            self.replayer.start()
+            self.metrics.register_gauge("journal_pending", "Frames waiting in the journal for Shop-Flow",
+                                        self.journal.pending_count)
         self.thread = threading.Thread(target=self.read_serial_data)
         self.thread.daemon = True
         self.thread.start()
         logging.info("Background process started")
 
+    def reconnect_serial(self, timeout=REOPEN_TIMEOUT):
+        """
+        Close and re-open the serial port; True on success.
+        While the reader thread runs it does the swap itself between two reads,
+        so the port is never closed under a blocked readline().
+        """
+        reader = self.thread
+        if not (self.running and reader and reader.is_alive()) or reader is threading.current_thread():
+            return self.reopen_serial()
+        reply = queue.Queue(maxsize=1)
+        self.reopen_requests.put(reply)
+        try:
+            return reply.get(timeout=timeout)
+        except queue.Empty:
+            logging.error(f"🔌 Serial port {self.port} not reopened: reader thread busy for {timeout:.0f}s")
+            return False
+
+    def serve_reopen_requests(self):
+        """Reader thread: re-open the port for pending reconnect_serial() calls"""
+        while True:
+            try:
+                reply = self.reopen_requests.get_nowait()
+            except queue.Empty:
+                return
+            reply.put(self.reopen_serial())
+
+    def reopen_serial(self):
+        """Close and re-open the serial port (caller owns the port); True on success"""
+        logging.info(f"🔌 Reopening serial port {self.port}...")
+        old_conn, self.serial_conn = self.serial_conn, None
+        if old_conn:
+            try:
+                old_conn.close()
+            except Exception:
+                pass
+        if not self.connect_serial():
+            return False
+        self.read_errors = 0
+        return True
+
+    def reattach_winforms(self):
+        """Re-attach to Shop-Flow and re-resolve the textbox; True on success"""
+        logging.info("🔗 Re-attaching to Shop-Flow...")
+        with self.ui_lock:
+            self.window = None
+            self.textbox = None
+            ok = self.connect_winforms()
+        if ok:
+            self.consecutive_failures = 0
+            if not self.running and not self.stop_requested:
+                self.start_reader()
+        return ok
+
+    def apply_config(self, config):
+        """
+        Apply a reloaded config.json without a restart; returns the changed keys.
+        Only the affected component is touched: serial port for port/baudrate,
+        Shop-Flow discovery for the window/textbox keys, nothing for the rest.
+        """
+        reload_start = time.monotonic()
+        new = {
+            'port': config.get('port', self.port),
+            'baudrate': int(config.get('baudrate', self.baudrate)),
+            'target_app_title': config.get('target_app_title', self.target_app_title),
+            'textbox_auto_id': config.get('textbox_auto_id', self.textbox_auto_id),
+            'backend': config.get('backend', self.backend),
+            'profile_on_start': config.get('profile_on_start', self.profile_on_start),
+            'profile_seconds': int(config.get('profile_seconds', self.profile_seconds)),
+            'submit_mode': config.get('submit_mode', self.submit_mode),
+            'item_timeout': float(config.get('item_timeout', self.item_timeout)),
+            'item_poll_interval': float(config.get('item_poll_interval', self.item_poll_interval)),
+        }
+        if new['submit_mode'] not in SUBMIT_MODES:
+            logging.error(f"Invalid submit_mode '{new['submit_mode']}' in config, keeping '{self.submit_mode}'")
+            new['submit_mode'] = self.submit_mode
+        changed = [key for key, value in new.items() if getattr(self, key) != value]
+        if config.get('transforms') != self.transforms:
+            changed.append('transforms')
+        if config.get('framing') != self.framing_config:
+            changed.append('framing')
+        if not changed:
+            return changed
+        for key in changed:
+            if key in new:
+                setattr(self, key, new[key])
+        if {'transforms', 'target_app_title'} & set(changed):
+            self.transforms = config.get('transforms')
+            self.transform = self.compile_transforms(self.transforms, self.transform)
+        if 'framing' in changed:
+            self.framing_config = config.get('framing')
+            framing = self.load_framing(self.framing_config, self.framing)
+            if framing is not self.framing:
+                # Partial bytes of the old format are dropped; the deframer is swapped in one step
+                self.deframer = Deframer(framing)
+                self.framing = framing
+        started = self.ready_event.is_set() and not self.stop_requested
+
+        if started and 'port' in changed:
+            t = time.monotonic()
+            ok = self.reconnect_serial()
+            logging.info(f"♻️ Serial port → {self.port} @ {self.baudrate}: "
+                         f"{'OK' if ok else 'FAILED'} in {(time.monotonic() - t) * 1000:.0f} ms")
+        elif started and 'baudrate' in changed:
+            t = time.monotonic()
+            try:
+                # pyserial re-configures an open port in place
+                self.serial_conn.baudrate = self.baudrate
+                ok = True
+            except Exception:
+                ok = self.reconnect_serial()
+            logging.info(f"♻️ Baudrate → {self.baudrate}: "
+                         f"{'OK' if ok else 'FAILED'} in {(time.monotonic() - t) * 1000:.0f} ms")
+
+        if started and {'target_app_title', 'textbox_auto_id', 'backend'} & set(changed):
+            t = time.monotonic()
+            ok = self.reattach_winforms()
+            logging.info(f"♻️ Shop-Flow → '{self.target_app_title}' / {self.textbox_auto_id}: "
+                         f"{'OK' if ok else 'FAILED'} in {(time.monotonic() - t) * 1000:.0f} ms")
+
+        logging.info(f"♻️ config.json reloaded: {', '.join(changed)} "
+                     f"applied in {(time.monotonic() - reload_start) * 1000:.0f} ms")
+        return changed
+
+    def get_queue_depth(self):
+        """Bytes waiting in the serial input buffer (None if port closed)"""
+        if self.serial_conn and self.serial_conn.is_open:
+            return self.serial_conn.in_waiting
+        return None
+
     def stop(self):
+        self.stop_requested = True
         self.running = False
+        self.metrics.unregister_gauge("serial_queue_depth")
+        self.metrics.unregister_gauge("framing_errors")
+        replayer, self.replayer = self.replayer, None
+        if replayer:
+            replayer.stop(JOURNAL_STOP_TIMEOUT)
+            self.metrics.unregister_gauge("journal_pending")
         if self.serial_conn:
             self.serial_conn.close()
+        index, self.serial_index = self.serial_index, None
+        if index:
+            index.close()  # saves the Bloom filter for a fast next start
+        journal, self.journal = self.journal, None
+        if journal:
+            journal.close()  # pending frames stay in the file and are replayed after the next Start
         logging.info("Process stopped")
 
 if __name__ == "__main__":
+    import pystray
+    from PIL import Image, ImageDraw
+
+    setup_logging()
     print(f"Process ID: {os.getpid()}")
     handler = SerialToWinForms()
     handler.start()
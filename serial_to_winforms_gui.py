@@ -1,24 +1,26 @@
 import tkinter as tk
 from tkinter import ttk, scrolledtext, messagebox, filedialog
 import threading
-import logging
-from datetime import datetime, timedelta
+import time
+from datetime import datetime
 import os
 import sys
 import json
-from serial_to_winforms_bk6 import SerialToWinForms
-import pystray
-from PIL import Image, ImageDraw
-import time
-import urllib.request
-import subprocess
-from ftplib import FTP
+from serial_to_winforms_bk6 import SerialToWinForms, setup_logging
+from bridge_metrics import metrics, MetricsServer
+from profiler import ThreadProfileHook, DEFAULT_PROFILE_SECONDS
+from gui_log import BatchedLogView, GUILogHandler
+from health_check import HealthChecker
+from supervisor import BridgeSupervisor, CONNECTING, READY, DEGRADED, RECOVERING, IDLE
+from tray_icon import TrayIconCache, tray_state
+from config_watcher import ConfigWatcher
 import ctypes
 from ctypes import wintypes
 
 # Mutex for single instance
 MUTEX_NAME = "Global\\SerialToWinFormsBK6_SingleInstance_Mutex"
 mutex_handle = None
+ALREADY_RUNNING_EXIT_CODE = 3  # update_script does not roll back on this code
 
 def check_single_instance():
     """Check if another instance is already running"""
@@ -58,6 +60,21 @@ def release_mutex():
         kernel32.CloseHandle(mutex_handle)
         mutex_handle = None
 
+# Refresh interval of the performance panel (ms)
+PERF_REFRESH_MS = 2000
+
+# How often a staged update checks for an idle line (ms)
+UPDATE_SWAP_CHECK_MS = 30000
+
+# Status colors of the supervisor states
+STATE_COLORS = {
+    CONNECTING: "orange",
+    READY: "green",
+    DEGRADED: "orange",
+    RECOVERING: "red",
+    IDLE: "blue",
+}
+
 # Default settings - will be loaded from settings.json
 class AppSettings:
     def __init__(self):
@@ -76,6 +93,16 @@ class AppSettings:
         self.max_disconnect_tolerance = 20
         self.auto_reset = False  # Auto reset before sending data to Shop-Flow
         
+        # Metrics endpoint (localhost only, opt-in)
+        self.metrics_enabled = False
+        self.metrics_port = 9108
+        
+        # Background update pre-staging (opt-in)
+        self.update_prestage_enabled = False
+        self.update_check_interval_minutes = 60
+        self.update_swap_idle_minutes = 10
+        self.update_rate_limit_kbps = 0
+        
     def to_dict(self):
         return {
             'program_directory': self.program_directory,
@@ -88,7 +115,13 @@ class AppSettings:
             'max_consecutive_errors': self.max_consecutive_errors,
             'connection_grace_period': self.connection_grace_period,
             'max_disconnect_tolerance': self.max_disconnect_tolerance,
-            'auto_reset': self.auto_reset
+            'auto_reset': self.auto_reset,
+            'metrics_enabled': self.metrics_enabled,
+            'metrics_port': self.metrics_port,
+            'update_prestage_enabled': self.update_prestage_enabled,
+            'update_check_interval_minutes': self.update_check_interval_minutes,
+            'update_swap_idle_minutes': self.update_swap_idle_minutes,
+            'update_rate_limit_kbps': self.update_rate_limit_kbps
         }
     
     def from_dict(self, data):
@@ -103,6 +136,12 @@ class AppSettings:
         self.connection_grace_period = data.get('connection_grace_period', self.connection_grace_period)
         self.max_disconnect_tolerance = data.get('max_disconnect_tolerance', self.max_disconnect_tolerance)
         self.auto_reset = data.get('auto_reset', self.auto_reset)
+        self.metrics_enabled = data.get('metrics_enabled', self.metrics_enabled)
+        self.metrics_port = data.get('metrics_port', self.metrics_port)
+        self.update_prestage_enabled = data.get('update_prestage_enabled', self.update_prestage_enabled)
+        self.update_check_interval_minutes = data.get('update_check_interval_minutes', self.update_check_interval_minutes)
+        self.update_swap_idle_minutes = data.get('update_swap_idle_minutes', self.update_swap_idle_minutes)
+        self.update_rate_limit_kbps = data.get('update_rate_limit_kbps', self.update_rate_limit_kbps)
 
 # Global settings instance
 app_settings = AppSettings()
@@ -114,12 +153,6 @@ def get_program_directory():
 def get_update_script_executable():
     return os.path.join(app_settings.program_directory, "update_script.exe")
 
-def get_ftp_base_url():
-    return f"ftp://{app_settings.ftp_user}:{app_settings.ftp_password}@{app_settings.ftp_server}/{app_settings.ftp_directory}"
-
-def get_version_url():
-    return get_ftp_base_url() + "version.txt"
-
 def get_current_version_file():
     return os.path.join(app_settings.program_directory, "version.txt")
 
@@ -130,27 +163,36 @@ def get_current_version():
             return file.read().strip()
     return "0.0.0"
 
+_version_checker = None
+
+def get_version_checker():
+    """Shared VersionChecker for the FTP server in settings (rebuilt when they change)"""
+    global _version_checker
+    from update_client import FTPUpdateClient  # ftplib/ssl/zipfile: loaded on the first update check
+    from version_check import VersionChecker
+    target = (app_settings.ftp_server, app_settings.ftp_user, app_settings.ftp_password, app_settings.ftp_directory)
+    client = _version_checker.client if _version_checker else None
+    if client is None or (client.server, client.user, client.password, client.directory) != target:
+        _version_checker = VersionChecker(FTPUpdateClient(*target))
+    return _version_checker
+
 def get_latest_version():
     try:
-        version_url = get_version_url()
-        with urllib.request.urlopen(version_url) as response:
-            latest_version = response.read().decode('utf-8').strip()
-        return latest_version
+        return get_version_checker().latest()
     except Exception as e:
         print(f"Không thể lấy phiên bản mới nhất: {e}")
         return None
 
 def check_for_updates():
-    current_version = get_current_version()
-    latest_version = get_latest_version()
-    
-    if latest_version and latest_version > current_version:
+    from version_check import is_newer
+    if is_newer(get_latest_version(), get_current_version()):
         initiate_update()
 
 def initiate_update():
+    import subprocess
     print("Đang chuẩn bị cập nhật và khởi động lại chương trình...")
     update_script = get_update_script_executable()
-    process = subprocess.Popen([update_script])
+    process = subprocess.Popen([update_script, "--wait-pid", str(os.getpid())])
     print(f"Đã khởi chạy {update_script}, PID: {process.pid}")
     sys.exit()
 
@@ -160,7 +202,7 @@ class SerialToWinFormsGUI:
         self.root = root
         version = get_current_version()
         self.root.title("Serial To WinForms - Control Panel v"+version)
-        self.root.geometry("800x600")
+        self.root.geometry("800x760")
         self.root.resizable(True, True)
         
         # Load settings first
@@ -168,12 +210,19 @@ class SerialToWinFormsGUI:
         
         # Serial handler
         self.serial_handler = None
+        self.health_checker = None
+        self.supervisor = None
+        self.config_watcher = None
         self.running = False
         
         # System tray
         self.tray_icon = None
+        self.tray_images = TrayIconCache()
         self.is_hidden = False
         
+        # Profiler for the Tk (UI) thread
+        self.ui_profile_hook = ThreadProfileHook("ui_thread")
+        
         # Setup menu bar
         self.setup_menu()
         
@@ -186,6 +235,21 @@ class SerialToWinFormsGUI:
         # Setup system tray
         self.setup_tray_icon()
         
+        # Optional metrics endpoint for monitoring
+        self.metrics_server = None
+        self.start_metrics_server()
+        
+        # Periodic refresh of the performance panel
+        self.refresh_perf_panel()
+        
+        # Download updates in the background, install when the line is idle
+        self.update_stager = None
+        self.start_update_stager()
+        
+        # Profile from startup when requested in config.json
+        if self.profile_on_start:
+            self.start_profiling(self.profile_seconds)
+        
         # Handle window close
         self.root.protocol("WM_DELETE_WINDOW", self.hide_to_tray)
     
@@ -222,6 +286,88 @@ class SerialToWinFormsGUI:
             messagebox.showerror("Error", f"Failed to save settings: {e}")
             return False
     
+    def start_metrics_server(self):
+        """Start the localhost metrics endpoint if enabled in settings"""
+        if not app_settings.metrics_enabled:
+            return
+        try:
+            self.metrics_server = MetricsServer(port=int(app_settings.metrics_port))
+            self.metrics_server.start()
+            self.log_message(f"Metrics endpoint: http://127.0.0.1:{self.metrics_server.port}/metrics", "INFO")
+        except Exception as e:
+            self.metrics_server = None
+            self.log_message(f"Failed to start metrics endpoint: {e}", "WARNING")
+    
+    def start_update_stager(self):
+        """Start background update pre-staging when enabled in settings.json"""
+        if not app_settings.update_prestage_enabled:
+            return
+        from update_client import FTPUpdateClient
+        from update_stager import UpdateStager
+        client = FTPUpdateClient(app_settings.ftp_server, app_settings.ftp_user,
+                                 app_settings.ftp_password, app_settings.ftp_directory)
+        self.update_stager = UpdateStager(
+            client, app_settings.program_directory, get_current_version,
+            check_interval=app_settings.update_check_interval_minutes * 60,
+            swap_idle_minutes=app_settings.update_swap_idle_minutes,
+            rate_limit_kbps=app_settings.update_rate_limit_kbps)
+        self.update_stager.start()
+        self.root.after(UPDATE_SWAP_CHECK_MS, self.check_update_swap)
+    
+    def line_idle_seconds(self):
+        """Seconds without scanned frames (journal backlog counts as busy)"""
+        handler = self.serial_handler
+        if not (self.running and handler):
+            return float('inf')
+        if handler.journal and handler.journal.pending_count():
+            return 0.0
+        return time.monotonic() - (handler.last_frame_time or handler.started_at)
+    
+    def check_update_swap(self):
+        """Install a staged update once the line has been idle long enough"""
+        stager = self.update_stager
+        if stager and stager.ready_to_swap(self.line_idle_seconds()):
+            self.swap_to_staged_update()
+            return
+        self.root.after(UPDATE_SWAP_CHECK_MS, self.check_update_swap)
+    
+    def swap_to_staged_update(self):
+        """Hand the staged update to update_script and exit; downtime is the restart"""
+        import subprocess
+        stager = self.update_stager
+        version = stager.staged['version']
+        update_script = get_update_script_executable()
+        self.log_message(f"🚀 Line idle - installing staged update {version}", "WARNING")
+        try:
+            # update_script renames the release only after this process has exited
+            subprocess.Popen([update_script, "--staged", stager.staging_dir, "--wait-pid", str(os.getpid())])
+        except Exception as e:
+            self.log_message(f"Failed to start {update_script}: {e}", "ERROR")
+            stager.staged = None
+            self.root.after(UPDATE_SWAP_CHECK_MS, self.check_update_swap)
+            return
+        stager.stop()
+        self.quit_app()
+    
+    def rollback_update(self):
+        """Switch back to the version kept in versions/ by update_script"""
+        import subprocess
+        from update_client import read_active
+        previous = read_active(get_program_directory())['previous']
+        if not previous:
+            messagebox.showinfo("Rollback", "No previous version is kept.")
+            return
+        if not messagebox.askyesno("Rollback", f"Stop the bridge and switch back to version {previous}?"):
+            return
+        update_script = get_update_script_executable()
+        self.log_message(f"⏪ Rolling back to {previous}", "WARNING")
+        try:
+            subprocess.Popen([update_script, "--rollback", "--wait-pid", str(os.getpid())])
+        except Exception as e:
+            self.log_message(f"Failed to start {update_script}: {e}", "ERROR")
+            return
+        self.quit_app()
+    
     def setup_menu(self):
         """Setup menu bar"""
         menubar = tk.Menu(self.root)
@@ -234,6 +380,12 @@ class SerialToWinFormsGUI:
         file_menu.add_separator()
         file_menu.add_command(label="Exit", command=self.quit_app)
         
+        # Tools menu
+        tools_menu = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Tools", menu=tools_menu)
+        tools_menu.add_command(label=f"Profile Handler ({DEFAULT_PROFILE_SECONDS}s)", command=self.start_profiling)
+        tools_menu.add_command(label="Roll Back Update...", command=self.rollback_update)
+        
         # Help menu
         help_menu = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Help", menu=help_menu)
@@ -249,7 +401,7 @@ class SerialToWinFormsGUI:
         self.root.columnconfigure(0, weight=1)
         self.root.rowconfigure(0, weight=1)
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(5, weight=1)
+        main_frame.rowconfigure(6, weight=1)
         
         # Title
         title_label = ttk.Label(main_frame, text="Serial To WinForms Control Panel v"+version, 
@@ -304,6 +456,11 @@ class SerialToWinFormsGUI:
         self.winforms_status_text = ttk.Label(status_frame, text="Disconnected", foreground="red")
         self.winforms_status_text.grid(row=1, column=2, sticky=tk.W, padx=5, pady=5)
         
+        # Supervisor State
+        ttk.Label(status_frame, text="State:").grid(row=0, column=3, sticky=tk.W, padx=(40, 5), pady=5)
+        self.state_label = ttk.Label(status_frame, text="Stopped", font=('Arial', 10, 'bold'), foreground="gray")
+        self.state_label.grid(row=0, column=4, sticky=tk.W, padx=5, pady=5)
+        
         # Last Data Received
         ttk.Label(status_frame, text="Last Data:").grid(row=2, column=0, sticky=tk.W, padx=5, pady=5)
         self.last_data_label = ttk.Label(status_frame, text="N/A", foreground="gray")
@@ -350,9 +507,30 @@ class SerialToWinFormsGUI:
                                              font=('Arial', 12, 'bold'), foreground="red")
         self.error_counter_label.grid(row=0, column=5, padx=5)
         
+        # Performance Frame (rolling latency percentiles)
+        perf_frame = ttk.LabelFrame(main_frame, text="Performance (last 5 min)", padding="5")
+        perf_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=5)
+        
+        for col, header in enumerate(["Stage", "p50", "p95", "p99"]):
+            ttk.Label(perf_frame, text=header, font=('Arial', 9, 'bold')).grid(row=0, column=col, padx=10, sticky=tk.W)
+        
+        self.perf_vars = {}
+        perf_stages = [("read", "Read"), ("inject", "Inject"), ("result", "Result detect"), ("end_to_end", "End-to-end")]
+        for row, (stage, label) in enumerate(perf_stages, start=1):
+            ttk.Label(perf_frame, text=label).grid(row=row, column=0, padx=10, sticky=tk.W)
+            for col, q in enumerate((0.5, 0.95, 0.99), start=1):
+                var = tk.StringVar(value="-")
+                self.perf_vars[(stage, q)] = var
+                ttk.Label(perf_frame, textvariable=var, width=10).grid(row=row, column=col, padx=10, sticky=tk.W)
+        
+        ttk.Label(perf_frame, text="Frames/min:", font=('Arial', 9, 'bold')).grid(row=0, column=4, padx=(30, 5), sticky=tk.W)
+        self.frames_per_min_var = tk.StringVar(value="0")
+        ttk.Label(perf_frame, textvariable=self.frames_per_min_var, font=('Arial', 12, 'bold'), 
+                  foreground="blue").grid(row=1, column=4, padx=(30, 5), sticky=tk.W)
+        
         # Log Frame
         log_frame = ttk.LabelFrame(main_frame, text="Activity Log", padding="5")
-        log_frame.grid(row=5, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        log_frame.grid(row=6, column=0, columnspan=2, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
         
@@ -370,24 +548,31 @@ class SerialToWinFormsGUI:
         self.data_count = 0
         self.success_count = 0
         self.error_count = 0
-        
-        # Auto-stop tracking
-        self.last_data_time = None
-        self.consecutive_errors = 0
+        self.last_data_text = "N/A"
         
         # Apply settings to instance variables
         self.max_log_lines = app_settings.max_log_lines
+        
+        # Log lines and counters are rendered in batches from the Tk thread
+        self.log_view = BatchedLogView(self.root, self.log_text, max_lines=self.max_log_lines)
+        self.log_view.bind(lambda: self.data_count, lambda v: self.data_counter_var.set(str(v)))
+        self.log_view.bind(lambda: self.success_count, lambda v: self.success_counter_var.set(str(v)))
+        self.log_view.bind(lambda: self.error_count, lambda v: self.error_counter_var.set(str(v)))
+        self.log_view.bind(lambda: self.last_data_text, lambda v: self.last_data_label.config(text=v))
+        self.log_view.start()
+        
+        # Single long-lived logging -> GUI bridge, attached while the handler runs
+        self.gui_log_handler = GUILogHandler(self)
         self.idle_timeout_minutes = app_settings.idle_timeout_minutes
         self.max_consecutive_errors = app_settings.max_consecutive_errors
         self.connection_grace_period = app_settings.connection_grace_period
         
-        # Connection loss tracking
-        self.serial_disconnect_count = 0
-        self.winforms_disconnect_count = 0
         self.max_disconnect_tolerance = app_settings.max_disconnect_tolerance
         
     def load_config(self):
         """Load configuration from config.json"""
+        self.profile_on_start = False
+        self.profile_seconds = DEFAULT_PROFILE_SECONDS
         try:
             app_dir = self.get_app_directory()
             config_path = os.path.join(app_dir, 'config.json')
@@ -399,6 +584,8 @@ class SerialToWinFormsGUI:
                 self.baudrate_var.set(str(config.get('baudrate', 9600)))
                 self.target_app_var.set(config.get('target_app_title', 'Shop-Flow System From Vietnam(Pack)'))
                 self.textbox_id_var.set(config.get('textbox_auto_id', 'GIFTBOX_AUTO'))
+                self.profile_on_start = config.get('profile_on_start', False)
+                self.profile_seconds = int(config.get('profile_seconds', DEFAULT_PROFILE_SECONDS))
                 self.log_message("Config loaded successfully", "SUCCESS")
             else:
                 self.log_message("Config file not found, using defaults", "WARNING")
@@ -412,13 +599,22 @@ class SerialToWinFormsGUI:
             app_dir = self.get_app_directory()
             config_path = os.path.join(app_dir, 'config.json')
             
-            config = {
+            # Keep advanced keys that are not editable in the GUI
+            config = {}
+            if os.path.exists(config_path):
+                try:
+                    with open(config_path, 'r', encoding='utf-8') as f:
+                        config = json.load(f)
+                except Exception:
+                    config = {}
+            
+            config.update({
                 'port': self.port_var.get(),
                 'baudrate': int(self.baudrate_var.get()),
                 'target_app_title': self.target_app_var.get(),
                 'textbox_auto_id': self.textbox_id_var.get(),
-                'backend': 'win32'
-            }
+                'backend': config.get('backend', 'win32')
+            })
             with open(config_path, 'w', encoding='utf-8') as f:
                 json.dump(config, f, indent=4, ensure_ascii=False)
             
@@ -428,6 +624,52 @@ class SerialToWinFormsGUI:
             self.log_message(f"Failed to save config: {e}", "ERROR")
             messagebox.showerror("Error", f"Failed to save config: {e}")
     
+    def on_config_reloaded(self, config):
+        """config.json changed on disk (watcher thread): apply to the running handler"""
+        handler = self.serial_handler
+        if handler and handler.apply_config(config):
+            self.root.after(0, lambda: self.show_config(handler))
+    
+    def show_config(self, handler):
+        """Reflect the handler's live config in the Configuration fields"""
+        self.port_var.set(handler.port)
+        self.baudrate_var.set(str(handler.baudrate))
+        self.target_app_var.set(handler.target_app_title)
+        self.textbox_id_var.set(handler.textbox_auto_id)
+    
+    def on_settings_reloaded(self, data):
+        """settings.json changed on disk (watcher thread): re-apply on the Tk thread"""
+        def apply():
+            start = time.perf_counter()
+            app_settings.from_dict(data)
+            changed = self.apply_monitoring_settings()
+            if changed:
+                elapsed_ms = (time.perf_counter() - start) * 1000
+                self.log_message(f"♻️ settings.json reloaded: {', '.join(changed)} applied in {elapsed_ms:.1f} ms", "INFO")
+        self.root.after(0, apply)
+    
+    def apply_monitoring_settings(self):
+        """Push app_settings thresholds to the GUI, supervisor and handler; returns the changed keys"""
+        changed = []
+        for key in ('max_log_lines', 'idle_timeout_minutes', 'max_consecutive_errors',
+                    'connection_grace_period', 'max_disconnect_tolerance'):
+            value = getattr(app_settings, key)
+            if getattr(self, key) != value:
+                setattr(self, key, value)
+                changed.append(key)
+        self.log_view.max_lines = self.max_log_lines
+        
+        # Thresholds are read by the supervisor on its next tick
+        if self.supervisor:
+            self.supervisor.apply_settings(app_settings.to_dict())
+        
+        handler = self.serial_handler
+        if handler and handler.auto_reset != app_settings.auto_reset:
+            handler.auto_reset = app_settings.auto_reset
+            changed.append('auto_reset')
+            self.log_message(f"Auto Reset updated: {'Enabled' if app_settings.auto_reset else 'Disabled'}", "INFO")
+        return changed
+    
     def toggle_start_stop(self):
         """Start or stop the serial handler"""
         if not self.running:
@@ -456,23 +698,38 @@ class SerialToWinFormsGUI:
                 self.log_message(f"Warning: Could not save config: {save_err}", "WARNING")
             
             # Create handler instance with auto_reset setting
-            self.serial_handler = SerialToWinForms(auto_reset=app_settings.auto_reset)
+            app_dir = self.get_app_directory()
+            config_path = os.path.join(app_dir, 'config.json')
+            self.serial_handler = SerialToWinForms(auto_reset=app_settings.auto_reset, config_path=config_path)
+            
+            # Connection probes run off the UI thread; monitor_status reads the snapshot
+            self.health_checker = HealthChecker(self.serial_handler, bridge_metrics=metrics)
+            self.health_checker.start()
+            
+            # Supervisor re-attaches serial / Shop-Flow on its own instead of auto-stopping
+            self.supervisor = BridgeSupervisor(
+                self.serial_handler, self.health_checker,
+                idle_timeout_minutes=self.idle_timeout_minutes,
+                max_consecutive_errors=self.max_consecutive_errors,
+                connection_grace_period=self.connection_grace_period,
+                max_disconnect_tolerance=self.max_disconnect_tolerance,
+                bridge_metrics=metrics)
+            self.supervisor.start()
+            
+            # Edits to config.json / settings.json are applied without Stop/Start
+            self.config_watcher = ConfigWatcher()
+            self.config_watcher.watch(config_path, self.on_config_reloaded)
+            self.config_watcher.watch(os.path.join(app_dir, 'settings.json'), self.on_settings_reloaded)
+            self.config_watcher.start()
             
-            # Setup custom logging to GUI
-            self.setup_gui_logging()
+            # Forward log records to the GUI (no-op if already attached)
+            self.gui_log_handler.attach()
             
             # Start in background thread
             self.running = True
             self.thread = threading.Thread(target=self.run_handler, daemon=True)
             self.thread.start()
             
-            # Reset auto-stop tracking
-            self.last_data_time = datetime.now()
-            self.consecutive_errors = 0
-            self.start_time = datetime.now()  # Track when handler started
-            self.serial_disconnect_count = 0  # Reset disconnect counters
-            self.winforms_disconnect_count = 0
-            
             # Update UI
             self.start_stop_btn.config(text="Stop")
             self.log_message("Starting Serial To WinForms handler...", "INFO")
@@ -489,14 +746,26 @@ class SerialToWinFormsGUI:
         """Stop the serial handler"""
         try:
             self.running = False
+            if self.config_watcher:
+                self.config_watcher.stop()
+                self.config_watcher = None
+            if self.supervisor:
+                self.log_supervisor_summary()
+                self.supervisor.stop()
+                self.supervisor = None
+            if self.health_checker:
+                self.health_checker.stop()
+                self.health_checker = None
             if self.serial_handler:
-                self.serial_handler.running = False
+                self.serial_handler.stop()
                 self.serial_handler = None
+            self.gui_log_handler.detach()
             
             # Update UI
             self.start_stop_btn.config(text="Start")
             self.update_status("serial", False)
             self.update_status("winforms", False)
+            self.state_label.config(text="Stopped", foreground="gray")
             
             # Update tray icon to gray (stopped state)
             self.update_tray_icon()
@@ -515,163 +784,83 @@ class SerialToWinFormsGUI:
     def run_handler(self):
         """Run the serial handler in background thread"""
         try:
-            self.serial_handler.start()
-            
-            # Wait longer for connections to establish properly
-            time.sleep(3)
-            
-            # Check if both connections are successful
-            serial_ok = self.serial_handler.serial_conn is not None and self.serial_handler.serial_conn.is_open
-            winforms_ok = self.serial_handler.window is not None and self.serial_handler.textbox is not None
-            
-            if not serial_ok:
-                self.log_message("❌ Failed to connect to Serial Port", "ERROR")
-                self.root.after(0, lambda: messagebox.showerror("Connection Failed", 
-                    f"Cannot connect to Serial Port: {self.port_var.get()}\n\nPlease check:\n• COM port exists and is available\n• Port not in use by another program\n• Baudrate is correct ({self.baudrate_var.get()})"))
-                self.root.after(0, self.stop_handler)
-                return
-            
-            if not winforms_ok:
-                self.log_message("❌ Failed to connect to Shop-Flow", "ERROR")
-                self.root.after(0, lambda: messagebox.showerror("Connection Failed", 
-                    f"Cannot connect to Shop-Flow!\n\nPlease check:\n• Shop-Flow application is running\n• Target App title: {self.target_app_var.get()}\n• Textbox ID: {self.textbox_id_var.get()}"))
-                self.root.after(0, self.stop_handler)
-                return
-            
-            # Both connections OK
-            self.log_message("✅ All connections established successfully", "SUCCESS")
-            
+            report = self.serial_handler.start()
         except Exception as e:
-            self.log_message(f"Handler error: {e}", "ERROR")
-            self.root.after(0, self.stop_handler)
-    
-    def setup_gui_logging(self):
-        """Setup logging to output to GUI"""
-        class GUIHandler(logging.Handler):
-            def __init__(self, gui):
-                super().__init__()
-                self.gui = gui
-                
-            def emit(self, record):
-                msg = self.format(record)
-                level = record.levelname
-                
-                # Determine tag based on level
-                if level == "ERROR":
-                    tag = "ERROR"
-                    self.gui.error_count += 1
-                    self.gui.consecutive_errors += 1  # Track consecutive errors
-                    self.gui.root.after(0, lambda: self.gui.error_counter_var.set(str(self.gui.error_count)))
-                    
-                    # Check for too many consecutive errors
-                    if self.gui.consecutive_errors >= self.gui.max_consecutive_errors:
-                        self.gui.root.after(0, lambda: self.gui.auto_stop_due_to_errors())
-                        
-                elif level == "WARNING":
-                    tag = "WARNING"
-                elif "successful" in msg.lower() or "connected" in msg.lower():
-                    tag = "SUCCESS"
-                    self.gui.success_count += 1
-                    self.gui.consecutive_errors = 0  # Reset on success
-                    self.gui.root.after(0, lambda: self.gui.success_counter_var.set(str(self.gui.success_count)))
-                else:
-                    tag = "INFO"
-                    self.gui.consecutive_errors = 0  # Reset on normal info
-                
-                # Check for data received
-                if "Raw serial data received:" in msg:
-                    self.gui.data_count += 1
-                    self.gui.last_data_time = datetime.now()  # Update last data time
-                    self.gui.consecutive_errors = 0  # Reset on data received
-                    self.gui.root.after(0, lambda: self.gui.data_counter_var.set(str(self.gui.data_count)))
-                    # Extract and display last data
-                    try:
-                        data = msg.split("Raw serial data received:")[1].split("(")[0].strip()
-                        self.gui.root.after(0, lambda d=data: self.gui.last_data_label.config(text=d[:50]))
-                    except:
-                        pass
-                
-                self.gui.root.after(0, lambda: self.gui.log_message(msg, tag))
+            # No dialog and no stop: the supervisor keeps retrying (status shows the state)
+            self.log_message(f"Handler error: {e} - retrying in the background", "ERROR")
+            return
         
-        # Add GUI handler to root logger
-        gui_handler = GUIHandler(self)
-        gui_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', 
-                                                   datefmt='%H:%M:%S'))
-        logging.getLogger().addHandler(gui_handler)
+        # React as soon as startup outcome is known
+        health_checker = self.health_checker
+        if health_checker:
+            health_checker.check_now()
+        
+        if not report.serial_ok:
+            self.log_message(f"❌ Serial Port {self.port_var.get()} not connected - check the COM port exists, "
+                             f"is not used by another program and the baudrate ({self.baudrate_var.get()}); "
+                             f"retrying in the background", "ERROR")
+        if not report.winforms_ok:
+            self.log_message(f"❌ Shop-Flow not connected - check it is running, Target App title "
+                             f"'{self.target_app_var.get()}' and Textbox ID '{self.textbox_id_var.get()}'; "
+                             f"retrying in the background", "ERROR")
+        if report.serial_ok and report.winforms_ok:
+            self.log_message(f"✅ All connections established successfully in {report.total_seconds:.2f}s", "SUCCESS")
     
     def monitor_status(self):
-        """Monitor connection status"""
+        """Refresh status indicators from the health snapshot and supervisor state"""
         if self.running and self.serial_handler:
-            # Debug log every 10 seconds
-            time_since_start = (datetime.now() - self.start_time).total_seconds() if hasattr(self, 'start_time') else 999
-            # if int(time_since_start) % 10 == 0:
-                # self.log_message(f"Monitor check at {int(time_since_start)}s", "INFO")
-            
-            # Check serial connection
-            serial_connected = self.serial_handler.serial_conn is not None and self.serial_handler.serial_conn.is_open
-            self.update_status("serial", serial_connected)
-            
-            # Check winforms connection - use lightweight check
-            winforms_connected = False
-            if self.serial_handler.window is not None and self.serial_handler.textbox is not None:
-                try:
-                    # Only check if window exists (lightweight, doesn't wait for response)
-                    winforms_connected = self.serial_handler.window.exists(timeout=0.1)
-                except Exception as e:
-                    # Any exception means window is not accessible (likely closed)
-                    winforms_connected = False
-                    
-            self.update_status("winforms", winforms_connected)
+            # Read the cached health snapshot (probes run on the HealthChecker thread)
+            status = self.health_checker.status
+            self.update_status("serial", status.serial_ok)
+            self.update_status("winforms", status.winforms_ok)
             
-            # Only check for disconnection after grace period (to allow initial connection time)
-            time_since_start = (datetime.now() - self.start_time).total_seconds() if hasattr(self, 'start_time') else 999
-            
-            if time_since_start > self.connection_grace_period:
-                # Check serial connection with tolerance
-                if not serial_connected:
-                    self.serial_disconnect_count += 1
-                    if self.serial_disconnect_count >= self.max_disconnect_tolerance:
-                        self.log_message(f"⚠️ Serial Port disconnected ({self.serial_disconnect_count} times) - stopping handler", "ERROR")
-                        messagebox.showerror("Connection Lost", f"Serial Port disconnected {self.serial_disconnect_count} times!\nHandler will be stopped.")
-                        self.stop_handler()
-                        return
-                    else:
-                        self.log_message(f"⚠️ Serial Port disconnect detected ({self.serial_disconnect_count}/{self.max_disconnect_tolerance})", "WARNING")
-                else:
-                    # Reset counter if connection is back
-                    if self.serial_disconnect_count > 0:
-                        self.log_message(f"✅ Serial Port reconnected (reset counter)", "SUCCESS")
-                    self.serial_disconnect_count = 0
-                
-                # Check Shop-Flow connection with tolerance
-                if not winforms_connected:
-                    self.winforms_disconnect_count += 1
-                    if self.winforms_disconnect_count >= self.max_disconnect_tolerance:
-                        self.log_message(f"⚠️ Shop-Flow disconnected ({self.winforms_disconnect_count} times) - stopping handler", "ERROR")
-                        messagebox.showerror("Connection Lost", f"Shop-Flow connection lost {self.winforms_disconnect_count} times!\nHandler will be stopped.")
-                        self.stop_handler()
-                        return
-                    else:
-                        self.log_message(f"⚠️ Shop-Flow disconnect detected ({self.winforms_disconnect_count}/{self.max_disconnect_tolerance})", "WARNING")
-                else:
-                    # Reset counter if connection is back
-                    if self.winforms_disconnect_count > 0:
-                        self.log_message(f"✅ Shop-Flow reconnected (reset counter)", "SUCCESS")
-                    self.winforms_disconnect_count = 0
+            # Recovery decisions (idle, errors, disconnects) are made by the supervisor
+            state = self.supervisor.state
+            self.state_label.config(text=state.capitalize(), foreground=STATE_COLORS.get(state, "gray"))
             
             # Update tray icon
             self.update_tray_icon()
             
-            # Check for idle timeout (no data received for too long)
-            if self.last_data_time and time_since_start > self.connection_grace_period:
-                idle_duration = datetime.now() - self.last_data_time
-                if idle_duration > timedelta(minutes=self.idle_timeout_minutes):
-                    self.auto_stop_due_to_idle()
-                    return  # Don't schedule next check
-            
             # Schedule next check
             self.root.after(1000, self.monitor_status)
     
+    def log_supervisor_summary(self):
+        """Log time spent per supervisor state for availability reporting"""
+        times = self.supervisor.state_times()
+        summary = ", ".join(f"{state} {seconds:.0f}s" for state, seconds in times.items() if seconds >= 1)
+        self.log_message(f"Session states: {summary or 'n/a'} (availability {self.supervisor.availability() * 100:.1f}%)", "INFO")
+    
+    def refresh_perf_panel(self):
+        """Refresh latency percentiles from the rolling histograms (throttled)"""
+        if not self.is_hidden:
+            summary = metrics.latency_summary()
+            for (stage, q), var in self.perf_vars.items():
+                value = summary[stage][q]
+                var.set("-" if value is None else f"{value * 1000:.0f} ms")
+            self.frames_per_min_var.set(str(metrics.frames_per_minute()))
+        self.root.after(PERF_REFRESH_MS, self.refresh_perf_panel)
+    
+    def start_profiling(self, seconds=DEFAULT_PROFILE_SECONDS):
+        """Capture a time-boxed profile of the reader thread and the UI thread"""
+        if self.ui_profile_hook.armed:
+            self.log_message("Profiling already in progress", "WARNING")
+            return
+        if self.serial_handler and self.running:
+            self.serial_handler.profile_hook.request(seconds)
+        else:
+            self.log_message("Handler not running - profiling UI thread only", "WARNING")
+        self.ui_profile_hook.request(seconds)
+        self.poll_ui_profiler()
+        self.log_message(f"🔬 Profiling for {seconds}s - results will be written to the log folder", "INFO")
+    
+    def poll_ui_profiler(self):
+        """Drive the UI thread profiler from the Tk event loop"""
+        self.ui_profile_hook.poll()
+        if self.ui_profile_hook.armed:
+            self.root.after(500, self.poll_ui_profiler)
+        elif self.ui_profile_hook.last_result:
+            self.log_message(f"🔬 UI profile saved: {self.ui_profile_hook.last_result[1]}", "SUCCESS")
+    
     def update_status(self, status_type, connected):
         """Update status indicators"""
         if status_type == "serial":
@@ -690,55 +879,28 @@ class SerialToWinFormsGUI:
                 self.winforms_status_text.config(text="Disconnected", foreground="red")
     
     def log_message(self, message, tag="INFO"):
-        """Add message to log text area"""
+        """Queue message for the log text area (safe from any thread)"""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        self.log_text.insert(tk.END, f"[{timestamp}] {message}\n", tag)
-        self.log_text.see(tk.END)  # Auto-scroll to bottom
-        
-        # Limit log lines to max_log_lines
-        lines = int(self.log_text.index('end-1c').split('.')[0])
-        if lines > self.max_log_lines:
-            # Delete oldest lines
-            excess_lines = lines - self.max_log_lines
-            self.log_text.delete('1.0', f'{excess_lines}.0')
+        self.log_view.append(f"[{timestamp}] {message}\n", tag)
     
     def clear_log(self):
         """Clear the log text area"""
-        self.log_text.delete(1.0, tk.END)
+        self.log_view.clear()
         self.log_message("Log cleared", "INFO")
     
-    def auto_stop_due_to_idle(self):
-        """Auto-stop handler due to no data timeout"""
-        self.log_message(f"⚠️ AUTO-STOP: No data received for {self.idle_timeout_minutes} minutes", "WARNING")
-        messagebox.showwarning("Auto-Stop", 
-                              f"Handler stopped automatically:\nNo data received for {self.idle_timeout_minutes} minutes")
-        self.stop_handler()
-    
-    def auto_stop_due_to_errors(self):
-        """Auto-stop handler due to too many consecutive errors"""
-        self.log_message(f"⚠️ AUTO-STOP: Too many consecutive errors ({self.consecutive_errors})", "ERROR")
-        messagebox.showerror("Auto-Stop", 
-                            f"Handler stopped automatically:\nToo many consecutive errors ({self.consecutive_errors})")
-        self.stop_handler()
-    
-    def create_tray_image(self):
-        """Create icon for system tray"""
-        # Create a simple icon image
-        width = 64
-        height = 64
-        color1 = "green" if self.running else "gray"
-        
-        image = Image.new('RGB', (width, height), color1)
-        dc = ImageDraw.Draw(image)
-        dc.rectangle(
-            (width // 4, height // 4, width * 3 // 4, height * 3 // 4),
-            fill="white")
-        
-        return image
+    def current_tray_state(self):
+        """Tray state from the supervisor state and the health snapshot"""
+        if not (self.running and self.serial_handler):
+            return tray_state(False)
+        supervisor_state = self.supervisor.state if self.supervisor else None
+        health = self.health_checker.status if self.health_checker else None
+        return tray_state(True, supervisor_state, health)
     
     def setup_tray_icon(self):
-        """Setup system tray icon"""
+        """Setup system tray icon (pystray and its platform backend load here)"""
         try:
+            import pystray
+            
             # Create menu
             menu = pystray.Menu(
                 pystray.MenuItem("Show", self.show_window, default=True),
@@ -749,9 +911,11 @@ class SerialToWinFormsGUI:
                 pystray.MenuItem("Exit", self.quit_app)
             )
             
-            # Create icon
-            image = self.create_tray_image()
-            self.tray_icon = pystray.Icon("SerialToWinForms", image, "Serial To WinForms", menu)
+            # Create icon - all state images are drawn once up front
+            self.tray_images.preload()
+            state = self.current_tray_state()
+            self.tray_icon = pystray.Icon("SerialToWinForms", self.tray_images.image(state), "Serial To WinForms", menu)
+            self.tray_images.state = state
             
             # Run icon in separate thread
             threading.Thread(target=self.tray_icon.run, daemon=True).start()
@@ -760,10 +924,10 @@ class SerialToWinFormsGUI:
             self.log_message(f"Failed to create system tray icon: {e}", "WARNING")
     
     def update_tray_icon(self):
-        """Update tray icon image based on status"""
+        """Update tray icon image on state changes only"""
         if self.tray_icon:
             try:
-                self.tray_icon.icon = self.create_tray_image()
+                self.tray_images.apply(self.tray_icon, self.current_tray_state())
             except:
                 pass
     
@@ -797,6 +961,12 @@ class SerialToWinFormsGUI:
         if self.tray_icon:
             self.tray_icon.stop()
         
+        if self.metrics_server:
+            self.metrics_server.stop()
+        
+        if self.update_stager:
+            self.update_stager.stop()
+        
         # Destroy window
         self.root.after(0, self.root.destroy)
     
@@ -1106,6 +1276,33 @@ class SettingsDialog:
                             padx=15, pady=7, relief=tk.FLAT, cursor="hand2")
         test_btn.pack()
         self.add_hover_effect(test_btn)
+        
+        # Background Update Section
+        section3 = tk.LabelFrame(scrollable_frame, text="  🚀 Background Update  ", 
+                                font=('Arial', 10, 'bold'), bg="white", fg="#1e3a8a",
+                                relief=tk.GROOVE, borderwidth=2)
+        section3.pack(fill=tk.X, padx=10, pady=(0, 15))
+        
+        inner3 = tk.Frame(section3, bg="white", padx=15, pady=10)
+        inner3.pack(fill=tk.BOTH)
+        
+        self.update_prestage_var = tk.BooleanVar(value=self.temp_settings.update_prestage_enabled)
+        tk.Checkbutton(inner3, text="Download new versions in the background",
+                       variable=self.update_prestage_var, font=('Arial', 9, 'bold'),
+                       bg="white", fg="#1f2937", activebackground="white",
+                       selectcolor="white", cursor="hand2").pack(anchor=tk.W)
+        
+        idle_frame = tk.Frame(inner3, bg="white")
+        idle_frame.pack(fill=tk.X, pady=(8, 5))
+        tk.Label(idle_frame, text="Install when idle for (minutes):", font=('Arial', 9), 
+                bg="white", fg="#374151").pack(side=tk.LEFT)
+        self.update_swap_idle_var = tk.IntVar(value=self.temp_settings.update_swap_idle_minutes)
+        tk.Spinbox(idle_frame, from_=1, to=240, textvariable=self.update_swap_idle_var,
+                   font=('Arial', 10), width=8, relief=tk.SOLID, borderwidth=1,
+                   justify=tk.CENTER).pack(side=tk.RIGHT)
+        
+        tk.Label(inner3, text="💡 The update is installed only when no data was scanned for this long (restart required)", 
+                font=('Arial', 8), bg="white", fg="#9ca3af").pack(anchor=tk.W)
     
     def setup_monitoring_tab(self, parent):
         """Setup monitoring settings tab"""
@@ -1138,13 +1335,13 @@ class SettingsDialog:
             ("📝 Max Log Lines:", "max_log_lines", 10, 1000, 
              "Maximum number of lines to keep in activity log"),
             ("⏱️ Idle Timeout (minutes):", "idle_timeout", 1, 180, 
-             "Auto-stop if no data received for this duration"),
+             "Mark station idle if no data received for this duration"),
             ("❌ Max Consecutive Errors:", "max_errors", 1, 100, 
-             "Auto-stop after this many consecutive errors"),
+             "Re-attach Shop-Flow after this many failed frames in a row"),
             ("⏳ Connection Grace Period (sec):", "grace_period", 1, 60, 
              "Wait time before checking for disconnections"),
             ("🔌 Max Disconnect Tolerance:", "disconnect_tolerance", 1, 100, 
-             "Number of disconnect checks before auto-stop")
+             "Number of failed checks before automatic recovery")
         ]
         
         for i, (label_text, var_name, min_val, max_val, desc) in enumerate(settings):
@@ -1252,7 +1449,7 @@ class SettingsDialog:
                 font=('Arial', 10, 'bold'), bg="#eff6ff", fg="#1e40af").pack(anchor=tk.W, pady=(0, 8))
         
         info_text = [
-            "• Lower values = more aggressive auto-stop",
+            "• Lower values = faster automatic recovery",
             "• Higher values = more tolerance for temporary issues",
             "• Changes take effect immediately for new connections",
             "• Restart required for some monitoring parameters"
@@ -1288,6 +1485,7 @@ class SettingsDialog:
             
             # Test connection in thread
             def test():
+                from ftplib import FTP
                 try:
                     ftp = FTP(self.ftp_server_var.get())
                     ftp.login(self.ftp_user_var.get(), self.ftp_password_var.get())
@@ -1322,6 +1520,8 @@ class SettingsDialog:
             self.max_errors_var.set(default_settings.max_consecutive_errors)
             self.grace_period_var.set(default_settings.connection_grace_period)
             self.disconnect_tolerance_var.set(default_settings.max_disconnect_tolerance)
+            self.update_prestage_var.set(default_settings.update_prestage_enabled)
+            self.update_swap_idle_var.set(default_settings.update_swap_idle_minutes)
             
             messagebox.showinfo("Reset Complete", "All settings have been reset to default values.")
     
@@ -1348,6 +1548,10 @@ class SettingsDialog:
             messagebox.showerror("Validation Error", "Max disconnect tolerance must be at least 1")
             return False
         
+        if self.update_swap_idle_var.get() < 1:
+            messagebox.showerror("Validation Error", "Update idle time must be at least 1 minute")
+            return False
+        
         # Validate FTP settings
         if not self.ftp_server_var.get().strip():
             messagebox.showerror("Validation Error", "FTP server cannot be empty")
@@ -1376,20 +1580,13 @@ class SettingsDialog:
         app_settings.connection_grace_period = self.grace_period_var.get()
         app_settings.max_disconnect_tolerance = self.disconnect_tolerance_var.get()
         app_settings.auto_reset = self.auto_reset_var.get()
+        app_settings.update_prestage_enabled = self.update_prestage_var.get()
+        app_settings.update_swap_idle_minutes = self.update_swap_idle_var.get()
         
         # Save to file
         if self.app.save_settings():
-            # Update app instance variables
-            self.app.max_log_lines = app_settings.max_log_lines
-            self.app.idle_timeout_minutes = app_settings.idle_timeout_minutes
-            self.app.max_consecutive_errors = app_settings.max_consecutive_errors
-            self.app.connection_grace_period = app_settings.connection_grace_period
-            self.app.max_disconnect_tolerance = app_settings.max_disconnect_tolerance
-            
-            # Update auto_reset in serial handler if it exists
-            if hasattr(self.app, 'serial_handler') and self.app.serial_handler:
-                self.app.serial_handler.auto_reset = app_settings.auto_reset
-                self.app.log_message(f"Auto Reset updated: {'Enabled' if app_settings.auto_reset else 'Disabled'}", "INFO")
+            # Update app instance variables, running supervisor and handler
+            self.app.apply_monitoring_settings()
             
             messagebox.showinfo("Success", "Settings saved successfully!\n\nNote: Some settings may require restarting the application to take full effect.")
             self.top.destroy()
@@ -1399,7 +1596,9 @@ class SettingsDialog:
 def main():
     # Check for single instance before creating GUI
     if not check_single_instance():
-        sys.exit(1)
+        sys.exit(ALREADY_RUNNING_EXIT_CODE)
+    
+    setup_logging()
     
     root = tk.Tk()
     app = SerialToWinFormsGUI(root)
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Headless service mode - runs the Serial → Shop-Flow bridge without Tk or tray.
+
+Usage:
+    python serial_to_winforms_service.py --config config.json --settings settings.json
+    python serial_to_winforms_service.py --log-format json --metrics-port 9108
+
+Exit codes:
+    0  stopped normally (Ctrl+C / SIGTERM)
+    1  unexpected error
+    2  config / settings file missing or invalid
+    3  serial port could not be opened at startup
+    4  Shop-Flow window or textbox not found at startup
+"""
+
+import argparse
+import json
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+
+# Taken before the bridge modules are imported so time-to-ready includes them
+PROCESS_START = time.monotonic()
+
+from serial_to_winforms_bk6 import SerialToWinForms, setup_logging
+from health_check import HealthChecker
+from supervisor import BridgeSupervisor
+from bridge_metrics import metrics, MetricsServer
+from config_watcher import ConfigWatcher
+
+EXIT_OK = 0
+EXIT_ERROR = 1
+EXIT_CONFIG = 2
+EXIT_SERIAL = 3
+EXIT_WINFORMS = 4
+
+# Monitoring defaults - same keys and values as the GUI's settings.json
+DEFAULT_SETTINGS = {
+    'idle_timeout_minutes': 30,
+    'max_consecutive_errors': 10,
+    'connection_grace_period': 5,
+    'max_disconnect_tolerance': 20,
+    'auto_reset': False,
+    'metrics_enabled': False,
+    'metrics_port': 9108,
+}
+
+
+def load_json(path, required):
+    if not os.path.exists(path):
+        if required:
+            raise FileNotFoundError(f"{path} not found")
+        return {}
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def rss_mb():
+    """Resident memory of this process in MB (None if unavailable)"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    except ImportError:
+        pass
+    try:
+        import resource
+        # ru_maxrss is KB on Linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    except ImportError:
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Serial To WinForms - headless service mode")
+    parser.add_argument('--config', default='config.json', help="bridge config (port, baudrate, target app)")
+    parser.add_argument('--settings', default='settings.json', help="monitoring thresholds (optional)")
+    parser.add_argument('--log-dir', default='log')
+    parser.add_argument('--log-format', choices=['text', 'json'], default='text')
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="serve /metrics on 127.0.0.1:PORT (overrides settings.json)")
+    parser.add_argument('-v', '--verbose', action='store_true')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    setup_logging(args.log_dir, args.log_format, args.verbose)
+
+    try:
+        load_json(args.config, required=True)
+        settings = dict(DEFAULT_SETTINGS)
+        settings.update(load_json(args.settings, required=False))
+    except (OSError, ValueError) as e:
+        logging.error(f"Config error: {e}")
+        return EXIT_CONFIG
+
+    handler = SerialToWinForms(auto_reset=settings['auto_reset'], config_path=args.config, show_dialogs=False)
+    report = handler.start()
+    memory = rss_mb()
+    logging.info(f"Time to ready: {time.monotonic() - PROCESS_START:.3f}s"
+                 + (f", RSS {memory:.1f} MB" if memory is not None else ""))
+
+    if not report.serial_ok:
+        logging.error(f"Cannot open serial port {handler.port} - exiting")
+        handler.stop()
+        return EXIT_SERIAL
+    if not report.winforms_ok:
+        logging.error(f"Cannot attach to Shop-Flow '{handler.target_app_title}' - exiting")
+        handler.stop()
+        return EXIT_WINFORMS
+
+    health_checker = HealthChecker(handler, bridge_metrics=metrics)
+    health_checker.start()
+    supervisor = BridgeSupervisor(
+        handler, health_checker,
+        idle_timeout_minutes=settings['idle_timeout_minutes'],
+        max_consecutive_errors=settings['max_consecutive_errors'],
+        connection_grace_period=settings['connection_grace_period'],
+        max_disconnect_tolerance=settings['max_disconnect_tolerance'],
+        bridge_metrics=metrics)
+    supervisor.start()
+
+    def reload_settings(data):
+        start = time.monotonic()
+        changed = supervisor.apply_settings(data)
+        if data.get('auto_reset', handler.auto_reset) != handler.auto_reset:
+            handler.auto_reset = data['auto_reset']
+            changed.append('auto_reset')
+        if changed:
+            logging.info(f"♻️ settings.json reloaded: {', '.join(changed)} "
+                         f"applied in {(time.monotonic() - start) * 1000:.1f} ms")
+
+    # config.json / settings.json are re-applied without a restart
+    watcher = ConfigWatcher()
+    watcher.watch(args.config, handler.apply_config)
+    watcher.watch(args.settings, reload_settings)
+    watcher.start()
+
+    metrics_server = None
+    metrics_port = args.metrics_port
+    if metrics_port is None and settings['metrics_enabled']:
+        metrics_port = int(settings['metrics_port'])
+    if metrics_port is not None:
+        try:
+            metrics_server = MetricsServer(port=metrics_port)
+            metrics_server.start()
+        except OSError as e:
+            logging.warning(f"Failed to start metrics endpoint: {e}")
+            metrics_server = None
+
+    stop_event = threading.Event()
+
+    def request_stop(signum, frame):
+        logging.info(f"Signal {signum} received - stopping")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, request_stop)
+    signal.signal(signal.SIGTERM, request_stop)
+    if hasattr(signal, 'SIGBREAK'):  # Ctrl+Break on Windows consoles
+        signal.signal(signal.SIGBREAK, request_stop)
+
+    logging.info("Headless bridge running")
+    while not stop_event.wait(1.0):
+        pass
+
+    times = supervisor.state_times()
+    logging.info("Session states: " + ", ".join(f"{state} {seconds:.0f}s" for state, seconds in times.items())
+                 + f" (availability {supervisor.availability() * 100:.1f}%)")
+    watcher.stop()
+    supervisor.stop()
+    health_checker.stop()
+    if metrics_server:
+        metrics_server.stop()
+    handler.stop()
+    return EXIT_OK
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except SystemExit:
+        raise
+    except Exception as e:
+        logging.exception(f"Unexpected error: {e}")
+        sys.exit(EXIT_ERROR)
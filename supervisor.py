@@ -0,0 +1,201 @@
+"""
+Self-healing supervisor for a running SerialToWinForms handler.
+
+Replaces the old auto-stop behaviour (idle timeout, consecutive errors,
+disconnect tolerance) with an explicit state machine that re-opens the
+serial port and re-attaches to Shop-Flow on its own:
+
+    connecting -> ready <-> idle
+                    |  ^
+                    v  |
+                 degraded -> recovering -> ready / degraded
+
+Time spent in each state is accumulated so availability can be reported.
+"""
+
+import logging
+import threading
+import time
+
+CONNECTING = "connecting"
+READY = "ready"
+DEGRADED = "degraded"
+RECOVERING = "recovering"
+IDLE = "idle"
+STATES = (CONNECTING, READY, DEGRADED, RECOVERING, IDLE)
+
+TICK_SECONDS = 1.0
+MIN_RETRY_SECONDS = 2.0
+MAX_RETRY_SECONDS = 60.0
+
+# settings.json keys read by the supervisor
+THRESHOLD_KEYS = ('idle_timeout_minutes', 'max_consecutive_errors', 'connection_grace_period',
+                  'max_disconnect_tolerance')
+
+
+class BridgeSupervisor:
+    def __init__(self, handler, health_checker, idle_timeout_minutes=30, max_consecutive_errors=10,
+                 connection_grace_period=5, max_disconnect_tolerance=20, on_state_change=None,
+                 bridge_metrics=None):
+        self.handler = handler
+        self.health = health_checker
+        self.idle_timeout_minutes = idle_timeout_minutes
+        self.max_consecutive_errors = max_consecutive_errors
+        self.connection_grace_period = connection_grace_period
+        self.max_disconnect_tolerance = max_disconnect_tolerance
+        self.on_state_change = on_state_change
+        self.metrics = bridge_metrics
+
+        self.state = CONNECTING
+        self.state_since = time.monotonic()
+        self.state_seconds = dict.fromkeys(STATES, 0.0)
+        self.lock = threading.Lock()
+
+        self.serial_down_checks = 0
+        self.winforms_down_checks = 0
+        self.retry_delay = MIN_RETRY_SECONDS
+        self.next_retry = 0.0
+        self.recoveries = 0
+
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    # ----- lifecycle -----
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="BridgeSupervisor", daemon=True)
+        self.thread.start()
+        if self.metrics:
+            for state in STATES:
+                self.metrics.register_gauge(f"state_seconds_{state}", f"Seconds spent in the '{state}' state",
+                                            lambda state=state: round(self.state_times()[state], 3))
+            self.metrics.register_gauge("availability_ratio", "Share of time spent ready or idle", self.availability)
+
+    def stop(self):
+        self.stop_event.set()
+        if self.metrics:
+            for state in STATES:
+                self.metrics.unregister_gauge(f"state_seconds_{state}")
+            self.metrics.unregister_gauge("availability_ratio")
+
+    def apply_settings(self, settings):
+        """Update thresholds in place (takes effect on the next tick); returns the changed keys"""
+        changed = []
+        for key in THRESHOLD_KEYS:
+            if key in settings and settings[key] != getattr(self, key):
+                setattr(self, key, settings[key])
+                changed.append(key)
+        return changed
+
+    def run(self):
+        while not self.stop_event.wait(TICK_SECONDS):
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"Supervisor error: {type(e).__name__} - {e}")
+
+    # ----- state accounting -----
+
+    def set_state(self, state, reason=""):
+        with self.lock:
+            if state == self.state:
+                return
+            now = time.monotonic()
+            self.state_seconds[self.state] += now - self.state_since
+            previous = self.state
+            self.state = state
+            self.state_since = now
+        logging.info(f"🛡️ Supervisor: {previous} → {state}" + (f" ({reason})" if reason else ""))
+        if self.on_state_change:
+            self.on_state_change(previous, state, reason)
+
+    def state_times(self):
+        """Seconds spent in each state, including the current one"""
+        with self.lock:
+            times = dict(self.state_seconds)
+            times[self.state] += time.monotonic() - self.state_since
+        return times
+
+    def availability(self):
+        times = self.state_times()
+        total = sum(times.values())
+        return round((times[READY] + times[IDLE]) / total, 4) if total else 0.0
+
+    # ----- decisions -----
+
+    def tick(self):
+        handler = self.handler
+        if not handler.ready_event.is_set():
+            self.set_state(CONNECTING, "startup in progress")
+            return
+
+        now = time.monotonic()
+        status = self.health.status
+        in_grace = now - handler.started_at < self.connection_grace_period
+
+        self.serial_down_checks = 0 if status.serial_ok else self.serial_down_checks + 1
+        self.winforms_down_checks = 0 if status.winforms_ok else self.winforms_down_checks + 1
+        too_many_errors = handler.consecutive_failures >= self.max_consecutive_errors
+        read_errors = handler.read_errors >= self.max_consecutive_errors
+
+        if in_grace and not (status.serial_ok and status.winforms_ok):
+            self.set_state(CONNECTING, "grace period")
+            return
+
+        needs_serial = self.serial_down_checks >= self.max_disconnect_tolerance or read_errors
+        needs_winforms = self.winforms_down_checks >= self.max_disconnect_tolerance or too_many_errors
+
+        if needs_serial or needs_winforms:
+            if now >= self.next_retry:
+                reason = []
+                if needs_serial:
+                    reason.append(f"{handler.read_errors} serial read errors" if read_errors
+                                  else f"serial down {self.serial_down_checks} checks")
+                if needs_winforms:
+                    reason.append(f"{handler.consecutive_failures} failed frames" if too_many_errors
+                                  else f"Shop-Flow down {self.winforms_down_checks} checks")
+                self.set_state(RECOVERING, ", ".join(reason))
+                self.recover(needs_serial, needs_winforms)
+            return
+
+        if not (status.serial_ok and status.winforms_ok):
+            down = [name for name, ok in (("serial", status.serial_ok), ("Shop-Flow", status.winforms_ok)) if not ok]
+            self.set_state(DEGRADED, f"{', '.join(down)} not responding")
+            return
+
+        # Healthy again: reset the retry backoff
+        self.retry_delay = MIN_RETRY_SECONDS
+        self.next_retry = 0.0
+
+        idle_seconds = now - (handler.last_frame_time or handler.started_at)
+        if idle_seconds > self.idle_timeout_minutes * 60:
+            self.set_state(IDLE, f"no data for {int(idle_seconds // 60)} min")
+        else:
+            self.set_state(READY)
+
+    def recover(self, serial=False, winforms=False):
+        """Re-open / re-attach the failing components, with exponential backoff"""
+        self.recoveries += 1
+        ok = True
+        for component, needed, reconnect in (("serial", serial, self.handler.reconnect_serial),
+                                             ("winforms", winforms, self.handler.reattach_winforms)):
+            if not needed:
+                continue
+            if reconnect():
+                if self.metrics:
+                    self.metrics.inc_reconnect(component)  # successful reconnects only
+            else:
+                ok = False
+
+        if ok:
+            self.serial_down_checks = 0
+            self.winforms_down_checks = 0
+            self.retry_delay = MIN_RETRY_SECONDS
+            logging.info("🛡️ Recovery successful")
+        else:
+            logging.warning(f"🛡️ Recovery failed, next attempt in {self.retry_delay:.0f}s")
+            self.retry_delay = min(self.retry_delay * 2, MAX_RETRY_SECONDS)
+        self.next_retry = time.monotonic() + self.retry_delay
+        self.health.check_now()
+        self.set_state(DEGRADED, "waiting for health check")
@@ -0,0 +1,8 @@
+import os
+import sys
+
+# The bridge modules are flat top-level files in the repository root; the
+# Shop-Flow / scanner stand-ins live with the benchmarks
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(1, os.path.join(REPO_DIR, "benchmarks"))
@@ -0,0 +1,99 @@
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from bridge_metrics import BridgeMetrics, MetricsServer, METRIC_PREFIX
+
+
+@pytest.fixture
+def server():
+    bridge_metrics = BridgeMetrics()
+    server = MetricsServer(port=0, bridge_metrics=bridge_metrics)
+    server.start()
+    yield server
+    server.stop()
+
+
+def scrape(server, path="/metrics"):
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}{path}", timeout=5) as response:
+        return response.headers["Content-Type"], response.read().decode('utf-8')
+
+
+def test_scrape_counters_and_histograms(server):
+    m = server.metrics
+    for _ in range(3):
+        m.inc_frames()
+    m.inc_ok()
+    m.inc_ng()
+    m.inc_reconnect("serial")
+    m.observe("read", 0.003)
+    m.observe("end_to_end", 0.4)
+
+    content_type, body = scrape(server)
+
+    assert content_type.startswith("text/plain; version=0.0.4")
+    p = METRIC_PREFIX
+    lines = body.splitlines()
+    assert f"{p}_frames_received_total 3" in lines
+    assert f"{p}_frames_ok_total 1" in lines
+    assert f"{p}_frames_ng_total 1" in lines
+    assert f'{p}_reconnects_total{{component="serial"}} 1' in lines
+    assert f'{p}_reconnects_total{{component="winforms"}} 0' in lines
+    assert f'{p}_stage_latency_seconds_bucket{{stage="read",le="0.005"}} 1' in lines
+    assert f'{p}_stage_latency_seconds_bucket{{stage="end_to_end",le="0.25"}} 0' in lines
+    assert f'{p}_stage_latency_seconds_bucket{{stage="end_to_end",le="0.5"}} 1' in lines
+    assert f'{p}_stage_latency_seconds_count{{stage="inject"}} 0' in lines
+
+
+def test_gauges_read_at_scrape_time(server):
+    depth = [5]
+    server.metrics.register_gauge("serial_queue_depth", "Bytes waiting", lambda: depth[0])
+    server.metrics.register_gauge("port_closed", "Not reported while None", lambda: None)
+    assert f"{METRIC_PREFIX}_serial_queue_depth 5" in scrape(server)[1].splitlines()
+    depth[0] = 0
+    body = scrape(server)[1]
+    assert f"{METRIC_PREFIX}_serial_queue_depth 0" in body.splitlines()
+    assert "port_closed" not in body
+    server.metrics.unregister_gauge("serial_queue_depth")
+    assert "serial_queue_depth" not in scrape(server)[1]
+
+
+def test_unknown_path_is_404(server):
+    with pytest.raises(urllib.error.HTTPError) as error:
+        scrape(server, "/debug")
+    assert error.value.code == 404
+
+
+class SlowPort:
+    """Serial port that is idle for `idle` seconds, then delivers one line"""
+    def __init__(self, line, idle):
+        self.data = bytearray(line)
+        self.idle = idle
+
+    def read(self, size=1):
+        if self.idle:
+            time.sleep(self.idle)
+            self.idle = 0
+        chunk = bytes(self.data[:size])
+        del self.data[:size]
+        return chunk
+
+    def readline(self):
+        end = self.data.index(b"\n") + 1
+        line = bytes(self.data[:end])
+        del self.data[:end]
+        return line
+
+
+def test_read_latency_excludes_idle_wait(tmp_path):
+    pytest.importorskip("serial")
+    from serial_to_winforms_bk6 import SerialToWinForms
+
+    handler = SerialToWinForms(config_path=str(tmp_path / "config.json"), show_dialogs=False)
+    handler.serial_conn = SlowPort(b"A01;A02\n", idle=0.2)
+    before = time.perf_counter()
+    assert handler.read_frames() == ["A01;A02"]
+    assert handler.frame_arrived_at - before >= 0.2
+    assert time.perf_counter() - handler.frame_arrived_at < 0.1
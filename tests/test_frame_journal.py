@@ -0,0 +1,112 @@
+import json
+import time
+
+import pytest
+
+pytest.importorskip("serial")
+from serial_to_winforms_bk6 import SerialToWinForms
+from frame_journal import JournalReplayer, DELIVERED, PENDING
+from shopflow_standin import ShopFlowStandIn
+
+
+class RecordingPort:
+    """Serial port that keeps what the bridge writes"""
+    def __init__(self):
+        self.written = bytearray()
+        self.is_open = True
+
+    def write(self, data):
+        self.written += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+@pytest.fixture
+def handler(tmp_path):
+    config = {"journal_enabled": True, "journal_path": "frames.db", "serial_index_enabled": False,
+              "submit_mode": "items", "item_timeout": 1.0, "item_poll_interval": 0.001}
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    handler = SerialToWinForms(config_path=str(path), show_dialogs=False)
+    handler.serial_conn = RecordingPort()
+    yield handler
+    handler.stop()
+
+
+def scan(handler, data):
+    now = time.perf_counter()
+    handler.process_frame(data, now, now)
+
+
+def statuses(handler):
+    return [status for (status,) in handler.journal.db.execute("SELECT status FROM frames ORDER BY id")]
+
+
+def test_journaled_frame_answered_at_scan_and_replayed_silently(handler):
+    scan(handler, "A01;A02")  # Shop-Flow not attached
+    assert bytes(handler.serial_conn.written) == b"NG\n"
+    assert statuses(handler) == [PENDING]
+
+    shopflow = ShopFlowStandIn()
+    handler.window, handler.textbox = shopflow.window, shopflow.textbox
+    handler.serial_conn.written.clear()
+    assert JournalReplayer(handler, handler.journal, rate=None).drain() == 1
+    assert shopflow.submitted == 2
+    assert bytes(handler.serial_conn.written) == b""
+    assert statuses(handler) == [DELIVERED]
+
+
+def test_frame_behind_backlog_answered_at_scan(handler):
+    handler.queued_response = "QUEUED"
+    scan(handler, "A01")
+    shopflow = ShopFlowStandIn()
+    handler.window, handler.textbox = shopflow.window, shopflow.textbox
+    scan(handler, "A02")  # Shop-Flow is back, but A01 is still pending
+    assert bytes(handler.serial_conn.written) == b"QUEUED\nQUEUED\n"
+    assert shopflow.submitted == 0
+    assert JournalReplayer(handler, handler.journal, rate=None).drain() == 2
+    assert statuses(handler) == [DELIVERED, DELIVERED]
+
+    handler.serial_conn.written.clear()
+    scan(handler, "A03")  # no backlog: typed and answered live
+    assert bytes(handler.serial_conn.written) == b"OK\n"
+
+
+def test_replay_does_not_hold_the_delivery_lock_while_typing(handler):
+    scan(handler, "A01")
+    shopflow = ShopFlowStandIn()
+    handler.window, handler.textbox = shopflow.window, shopflow.textbox
+    deliver_frame = handler.deliver_frame
+    lock_free = []
+
+    def checked_deliver(data, frame_id=None, reply=True):
+        lock_free.append(handler.delivery_lock.acquire(blocking=False))
+        if lock_free[-1]:
+            handler.delivery_lock.release()
+        return deliver_frame(data, frame_id, reply)
+
+    handler.deliver_frame = checked_deliver
+    JournalReplayer(handler, handler.journal, rate=None).drain()
+    assert lock_free == [True]
+    assert not handler.delivering
+
+
+def test_stop_closes_the_journal_and_keeps_pending_frames(handler, tmp_path):
+    scan(handler, "A01;A02")  # Shop-Flow not attached
+    handler.start_reader()
+    journal = handler.journal
+    handler.stop()
+    assert handler.journal is None and handler.replayer is None
+    with pytest.raises(Exception):
+        journal.pending_count()  # connection closed
+
+    restarted = SerialToWinForms(config_path=str(tmp_path / "config.json"), show_dialogs=False)
+    try:
+        assert restarted.journal.pending_count() == 1
+    finally:
+        restarted.stop()
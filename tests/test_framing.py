@@ -0,0 +1,150 @@
+import json
+import random
+
+import pytest
+
+from framing import (PROFILES, CHECKSUMS, FramingProfile, Deframer, crc16_modbus, crc16_ccitt, xor8, lrc8, sum8,
+                     load_framing)
+
+CHECK_INPUT = b"123456789"
+
+
+@pytest.mark.parametrize("function, expected", [
+    (crc16_modbus, 0x4B37),
+    (crc16_ccitt, 0x29B1),
+    (CHECKSUMS["crc32"].function, 0xCBF43926),
+    (xor8, 0x31),
+    (sum8, 0xDD),
+    (lrc8, 0x23),
+])
+def test_checksum_check_values(function, expected):
+    assert function(CHECK_INPUT) == expected
+
+
+def crc16_bitwise(data, poly, reflected, crc=0xFFFF):
+    for byte in data:
+        if reflected:
+            crc ^= byte
+            for _ in range(8):
+                crc = (crc >> 1) ^ poly if crc & 1 else crc >> 1
+        else:
+            crc ^= byte << 8
+            for _ in range(8):
+                crc = ((crc << 1) ^ poly) & 0xFFFF if crc & 0x8000 else (crc << 1) & 0xFFFF
+    return crc
+
+
+def test_table_crcs_match_bitwise():
+    rng = random.Random(48)
+    for size in (0, 1, 2, 7, 64, 1000):
+        data = bytes(rng.randrange(256) for _ in range(size))
+        assert crc16_modbus(data) == crc16_bitwise(data, 0xA001, True)
+        assert crc16_ccitt(data) == crc16_bitwise(data, 0x1021, False)
+        xor = 0
+        for byte in data:
+            xor ^= byte
+        assert xor8(data) == xor
+
+
+SPECS = list(PROFILES) + [{"profile": "stx_etx", "checksum": "crc32", "checksum_format": "hex"},
+                          {"profile": "length_crc16", "length_bytes": 1, "end": 0x03}]
+PAYLOADS = ["A01;A02", "01462008114854321I44HK24AZCK5240DKR00009.00;" * 5, "Đ-ü", "OK"]
+
+
+@pytest.mark.parametrize("spec", SPECS, ids=str)
+def test_round_trip(spec):
+    profile = load_framing(spec)
+    deframer = Deframer(profile)
+    wire = b"".join(profile.encode(payload) for payload in PAYLOADS)
+    received = []
+    for at in range(0, len(wire), 5):  # split across reads
+        payloads, errors = deframer.feed(wire[at:at + 5])
+        assert errors == []
+        received += payloads
+    assert received == [payload.strip() for payload in PAYLOADS]
+    assert deframer.buffer == bytearray()
+
+
+@pytest.mark.parametrize("name", [name for name, spec in PROFILES.items() if spec.get("checksum")])
+def test_corrupted_frame_dropped_and_resynced(name):
+    profile = FramingProfile(name)
+    deframer = Deframer(profile)
+    bad = bytearray(profile.encode("A01;A02;A03"))
+    bad[len(bad) // 2] ^= 0x01
+    payloads, errors = deframer.feed(b"noise" + bytes(bad) + profile.encode("B01;B02"))
+    assert payloads == ["B01;B02"]
+    assert errors and deframer.corrupted + deframer.malformed >= 1
+    assert deframer.frames == 1
+
+
+def test_invalid_profiles_raise():
+    for spec in ("nope", {"profile": "stx_etx", "checksum": "md5"}, {"start": 2}, 7):
+        with pytest.raises(ValueError):
+            load_framing(spec)
+
+
+class RecordingPort:
+    """Serial port fed with `data`, keeping what the bridge writes"""
+    def __init__(self, data=b""):
+        self.data = bytearray(data)
+        self.written = bytearray()
+        self.is_open = True
+
+    @property
+    def in_waiting(self):
+        return len(self.data)
+
+    def read(self, size=1):
+        chunk = bytes(self.data[:size])
+        del self.data[:size]
+        return chunk
+
+    def write(self, data):
+        self.written += data
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        self.is_open = False
+
+
+@pytest.fixture
+def make_handler(tmp_path):
+    pytest.importorskip("serial")
+    from serial_to_winforms_bk6 import SerialToWinForms
+    handlers = []
+
+    def make(framing):
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps({"framing": framing}), encoding="utf-8")
+        handler = SerialToWinForms(config_path=str(path), show_dialogs=False)
+        handlers.append(handler)
+        return handler
+    yield make
+    for handler in handlers:
+        handler.stop()
+
+
+@pytest.mark.parametrize("name", list(PROFILES))
+def test_responses_use_the_active_profile(make_handler, name):
+    handler = make_handler(name)
+    handler.serial_conn = RecordingPort()
+    handler.send_ok_to_serial()
+    handler.send_ng_to_serial()
+    profile = FramingProfile(name)
+    assert bytes(handler.serial_conn.written) == profile.encode("OK") + profile.encode("NG")
+    if name == "ascii":
+        assert bytes(handler.serial_conn.written) == b"OK\nNG\n"
+
+
+def test_dropped_frame_is_counted_not_answered(make_handler):
+    handler = make_handler("stx_etx_crc16")
+    profile = handler.framing
+    bad = bytearray(profile.encode("A01;A02"))
+    bad[3] ^= 0x01
+    handler.serial_conn = RecordingPort(bytes(bad) + profile.encode("B01;B02"))
+    assert handler.read_frames() == ["B01;B02"]
+    assert handler.get_framing_errors() == 1
+    assert bytes(handler.serial_conn.written) == b""
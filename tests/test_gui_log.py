@@ -0,0 +1,55 @@
+import logging
+import types
+
+import pytest
+
+from gui_log import GUILogHandler
+
+
+def make_gui():
+    """Bare object with the attributes GUILogHandler touches"""
+    gui = types.SimpleNamespace(error_count=0, success_count=0, data_count=0, last_data_text="N/A", lines=[])
+    gui.log_message = lambda msg, tag="INFO": gui.lines.append((msg, tag))
+    return gui
+
+
+def gui_handlers(logger):
+    return [h for h in logger.handlers if isinstance(h, GUILogHandler)]
+
+
+@pytest.fixture
+def logger(request):
+    logger = logging.getLogger(f"test_gui_log.{request.node.name}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    yield logger
+    for handler in gui_handlers(logger):
+        logger.removeHandler(handler)
+
+
+def test_restarts_deliver_each_record_once(logger):
+    gui = make_gui()
+    handler = GUILogHandler(gui, logger=logger)
+    for cycle in range(50):
+        handler.attach()  # Start
+        handler.attach()  # a second Start without Stop changes nothing
+        assert gui_handlers(logger) == [handler]
+        logger.info(f"Raw serial data received: A{cycle:02d};B (Read time: 0.010s)")
+        handler.detach()  # Stop
+        assert gui_handlers(logger) == []
+    assert gui.data_count == 50
+    assert len(gui.lines) == 50
+    logger.info("Raw serial data received: after stop (Read time: 0.010s)")
+    assert gui.data_count == 50
+
+
+def test_tags_and_counters(logger):
+    gui = make_gui()
+    GUILogHandler(gui, logger=logger).attach()
+    logger.error("Serial port connection failed")
+    logger.warning("lblError popup detected - sending NG")
+    logger.info("Serial port COM7 connected successfully")
+    logger.info("Raw serial data received: STXA01;A02ETX (Read time: 0.012s)")
+    assert [tag for _, tag in gui.lines] == ["ERROR", "WARNING", "SUCCESS", "INFO"]
+    assert (gui.error_count, gui.success_count, gui.data_count) == (1, 1, 1)
+    assert gui.last_data_text == "STXA01;A02ETX"
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from item_submit import ItemSubmitter, TIMEOUT
+from shopflow_standin import ShopFlowStandIn
+
+
+class CountingChecks:
+    """NG checks against the Shop-Flow stand-in, counting each kind"""
+    def __init__(self, shopflow):
+        self.shopflow = shopflow
+        self.full = 0
+        self.quick = 0
+
+    def detect_ng(self):
+        self.full += 1
+        return self.shopflow.ng_visible
+
+    def quick_ng(self):
+        self.quick += 1
+        return self.shopflow.ng_visible
+
+
+def submitter(shopflow, checks, timeout=1.0):
+    return ItemSubmitter(shopflow.textbox, checks.detect_ng, checks.quick_ng, timeout=timeout, poll_interval=0.001)
+
+
+def test_full_ng_check_once_per_frame():
+    shopflow = ShopFlowStandIn()
+    checks = CountingChecks(shopflow)
+    result = submitter(shopflow, checks).submit([f"ID{n:02d}" for n in range(20)])
+    assert result.ok and len(result.results) == 20
+    assert checks.full == 1
+    assert checks.quick >= 20
+
+
+def test_ng_item_stops_the_frame():
+    shopflow = ShopFlowStandIn(ng_items={"ID03"})
+    checks = CountingChecks(shopflow)
+    result = submitter(shopflow, checks).submit(["ID01", "ID02", "ID03", "ID04"])
+    assert not result.ok
+    assert [r.reason for r in result.results] == ["", "", "NG"]
+    assert checks.full == 0  # lblError already decided it
+
+
+def test_timeout_reclassified_by_the_frame_check():
+    shopflow = ShopFlowStandIn()
+    checks = CountingChecks(shopflow)
+    checks.quick_ng = lambda: False  # an NG dialog without lblError
+    shopflow.textbox.type_keys = lambda keys, pause=0.05, **kwargs: None  # item never taken
+    result = submitter(shopflow, checks, timeout=0.05).submit(["ID01", "ID02"])
+    assert [r.reason for r in result.results] == [TIMEOUT]
+
+    def show_dialog(keys, pause=0.05, **kwargs):
+        shopflow.ng_visible = True  # the dialog blocks the textbox
+    shopflow.textbox.type_keys = show_dialog
+    result = submitter(shopflow, checks, timeout=0.05).submit(["ID01", "ID02"])
+    assert [r.reason for r in result.results] == ["NG"]
+    assert checks.full == 2
+
+
+def test_handler_times_result_apart_from_inject(tmp_path):
+    pytest.importorskip("serial")
+    import json
+    from serial_to_winforms_bk6 import SerialToWinForms
+    from bench_e2e import RecordingMetrics
+
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"submit_mode": "items", "item_poll_interval": 0.001}), encoding="utf-8")
+    handler = SerialToWinForms(config_path=str(path), show_dialogs=False)
+    handler.metrics = RecordingMetrics()
+    shopflow = ShopFlowStandIn()
+    handler.window, handler.textbox = shopflow.window, shopflow.textbox
+    slow_scan = handler.detect_ng
+
+    def detect_ng(lbl_timeout=None):
+        time.sleep(0.05)  # children() walk over UI Automation
+        return slow_scan(lbl_timeout)
+    handler.detect_ng = detect_ng
+    try:
+        assert handler.input_items_to_winforms("ID01;ID02;ID03", reply=False)
+    finally:
+        handler.stop()
+    samples = handler.metrics.samples
+    assert len(samples["result"]) == 1 and samples["result"][0] >= 0.05
+    assert len(samples["inject"]) == 1 and samples["inject"][0] < 0.05
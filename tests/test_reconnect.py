@@ -0,0 +1,83 @@
+import threading
+import time
+import types
+
+import pytest
+
+serial = pytest.importorskip("serial")
+from serial_to_winforms_bk6 import SerialToWinForms
+
+
+class IdlePort:
+    """Serial port with no traffic; remembers which thread closed it"""
+    def __init__(self):
+        self.is_open = True
+        self.closed_by = None
+        self.in_waiting = 0
+
+    def read(self, size=1):
+        time.sleep(0.02)  # the port timeout
+        return b""
+
+    def close(self):
+        self.closed_by = threading.current_thread()
+        self.is_open = False
+
+
+@pytest.fixture
+def handler(tmp_path):
+    handler = SerialToWinForms(config_path=str(tmp_path / "config.json"), show_dialogs=False)
+    yield handler
+    handler.stop()
+
+
+def test_reader_thread_swaps_the_port(handler):
+    old_port = handler.serial_conn = IdlePort()
+    opened_by = []
+
+    def connect_serial():
+        opened_by.append(threading.current_thread())
+        handler.serial_conn = IdlePort()
+        return True
+
+    handler.connect_serial = connect_serial
+    handler.start_reader()
+    assert handler.reconnect_serial(timeout=5.0)
+    assert old_port.closed_by is handler.thread
+    assert opened_by == [handler.thread]
+    assert handler.serial_conn is not old_port and handler.serial_conn.is_open
+
+
+def test_reopens_directly_without_a_reader(handler):
+    old_port = handler.serial_conn = IdlePort()
+    handler.connect_serial = lambda: False
+    assert not handler.reconnect_serial(timeout=5.0)
+    assert old_port.closed_by is threading.current_thread()
+    assert handler.serial_conn is None
+
+
+class BrokenPort(IdlePort):
+    """Unplugged adapter: every read fails"""
+    def read(self, size=1):
+        raise serial.SerialException("ClearCommError failed (device disconnected)")
+
+
+def test_read_errors_back_off_and_reopen_the_serial_port(handler, monkeypatch):
+    import serial_to_winforms_bk6
+    from supervisor import BridgeSupervisor, RECOVERING
+    monkeypatch.setattr(serial_to_winforms_bk6, "READ_ERROR_BACKOFF", 0.05)
+    handler.serial_conn = BrokenPort()
+    handler.ready_event.set()
+    handler.start_reader()
+    time.sleep(0.3)
+    assert 2 <= handler.read_errors <= 8  # backs off instead of spinning
+    assert handler.consecutive_failures == 0
+
+    health = types.SimpleNamespace(status=types.SimpleNamespace(serial_ok=True, winforms_ok=True),
+                                   check_now=lambda: None)
+    supervisor = BridgeSupervisor(handler, health, max_consecutive_errors=2, connection_grace_period=0)
+    recovered = []
+    supervisor.recover = lambda serial=False, winforms=False: recovered.append((serial, winforms))
+    supervisor.tick()
+    assert supervisor.state == RECOVERING
+    assert recovered == [(True, False)]
@@ -0,0 +1,91 @@
+import random
+
+import pytest
+
+from transform import compile_transforms, check_recorded
+from bench_transform import CHAIN, RECORDED, make_payload
+
+# Payload and record stages interleaved, so fused and unfused stages both run
+MIXED = [
+    {"op": "strip"},
+    {"op": "trim"},
+    {"op": "drop_empty"},
+    {"op": "replace", "old": "DKR", "new": "DKS"},
+    {"op": "map_prefix", "map": {"01": "X1", "0146": "9146"}},
+    {"op": "fields", "keep": ["model", "serial"]},
+    {"op": "upper"},
+    {"op": "prefix", "text": "ST01:"},
+]
+
+
+def reference(payload):
+    """MIXED written out by hand, one step at a time"""
+    payload = payload.strip()
+    records = [record.strip() for record in payload.split(";")]
+    payload = ";".join(record for record in records if record)
+    payload = payload.replace("DKR", "DKS")
+    records = []
+    for record in payload.split(";"):
+        if record.startswith("0146"):
+            record = "9146" + record[4:]
+        elif record.startswith("01"):
+            record = "X1" + record[2:]
+        records.append(record)
+    records = [record[17:28] + record[:17] if len(record) == 43 else record for record in records]
+    return "ST01:" + ";".join(records).upper()
+
+
+def payloads(count=300):
+    rng = random.Random(46)
+    for _ in range(count):
+        payload = make_payload(rng)
+        if rng.random() < 0.3:
+            payload = " " + payload.replace(";", " ; ", 3) + ";;"
+        if rng.random() < 0.2:
+            payload = payload.replace("0146", "0199", 1)
+        yield payload
+
+
+def test_compiled_chain_matches_reference():
+    pipeline = compile_transforms(MIXED)
+    assert len(pipeline) == len(MIXED)
+    for payload in payloads():
+        expected = reference(payload)
+        assert pipeline(payload) == expected
+        assert pipeline.timed(payload)[0] == expected
+
+
+@pytest.mark.parametrize("payload, expected", RECORDED)
+def test_recorded_payloads(payload, expected):
+    pipeline = compile_transforms(CHAIN)
+    assert pipeline(payload) == expected
+    result, costs = pipeline.timed(payload)
+    assert result == expected
+    assert [name for name, _ in costs] == [spec["op"] for spec in CHAIN]
+
+
+def test_check_recorded_reports_mismatches():
+    lines = [f"{payload}\t{expected}\n" for payload, expected in RECORDED] + ["RESETX\tRESETX\n", "\n"]
+    results, mismatches, totals = check_recorded(compile_transforms(CHAIN), lines)
+    assert len(results) == 4
+    assert mismatches == [(4, "RESETX", "RESETX", "RESETX;ST01")]
+    assert set(totals) == {spec["op"] for spec in CHAIN}
+
+
+def test_per_target_selection():
+    transforms = {"Shop-Flow A": [{"op": "prefix", "text": "A:"}], "*": [{"op": "upper"}]}
+    assert compile_transforms(transforms, "Shop-Flow A")("x") == "A:x"
+    assert compile_transforms(transforms, "Other")("x") == "X"
+    assert compile_transforms({"Shop-Flow A": []}, "Other")("x") == "x"
+    assert compile_transforms(None)("x") == "x"
+
+
+@pytest.mark.parametrize("chain, message", [
+    ([{"op": "nope"}], "unknown op"),
+    ([{"op": "append"}], "missing 'text'"),
+    ([{"op": "fields", "keep": ["colour"]}], "unknown giftbox field"),
+    (["trim"], "unknown op"),
+])
+def test_invalid_chain_raises(chain, message):
+    with pytest.raises(ValueError, match=message):
+        compile_transforms(chain)
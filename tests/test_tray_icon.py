@@ -0,0 +1,46 @@
+import collections
+import types
+
+from tray_icon import TrayIconCache, tray_state, TRAY_STATES, RUNNING, STOPPED, DEGRADED, ERROR
+
+Health = collections.namedtuple('Health', ['serial_ok', 'winforms_ok'])
+
+
+def counting_cache():
+    drawn = []
+
+    def draw(state):
+        drawn.append(state)
+        return f"image-{state}"
+
+    return TrayIconCache(draw=draw), drawn
+
+
+def test_images_drawn_once_per_state():
+    cache, drawn = counting_cache()
+    cache.preload()
+    for _ in range(100):
+        for state in TRAY_STATES:
+            assert cache.image(state) == f"image-{state}"
+    assert sorted(drawn) == sorted(TRAY_STATES)
+
+
+def test_icon_pushed_on_transitions_only():
+    cache, _ = counting_cache()
+    icon = types.SimpleNamespace(icon=None)
+    ticks = [RUNNING] * 50 + [DEGRADED] * 10 + [RUNNING] * 50 + [STOPPED]
+    pushed = [cache.apply(icon, state) for state in ticks]
+    assert sum(pushed) == 4
+    assert cache.updates == 4
+    assert icon.icon == "image-stopped"
+    assert not cache.apply(None, ERROR)
+
+
+def test_tray_state_mapping():
+    assert tray_state(False, "ready") == STOPPED
+    assert tray_state(True, "recovering") == ERROR
+    assert tray_state(True, "connecting") == DEGRADED
+    assert tray_state(True, "degraded") == DEGRADED
+    assert tray_state(True, "ready", Health(True, False)) == DEGRADED
+    assert tray_state(True, "ready", Health(True, True)) == RUNNING
+    assert tray_state(True, "idle") == RUNNING
@@ -0,0 +1,61 @@
+import json
+import zipfile
+
+from update_client import build_manifest, plan_delta, is_local, prepare_version, activate, rollback
+
+
+def write(path, text):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def test_manifest_leaves_out_station_files(tmp_path):
+    release = tmp_path / "release"
+    write(release / "SerialToWinForms.exe", "exe")
+    write(release / "_internal" / "base.dll", "dll")
+    write(release / "config.json", '{"port": "COM1"}')
+    write(release / "settings.json", "{}")
+    write(release / "log" / "serial_to_winforms.log", "")
+    write(release / "journal" / "frames.db", "")
+    manifest = build_manifest(str(release), "1.0.5")
+    assert sorted(manifest["files"]) == ["SerialToWinForms.exe", "_internal/base.dll"]
+
+
+def test_delta_ignores_station_files_on_the_server(tmp_path):
+    install = tmp_path / "install"
+    write(install / "SerialToWinForms.exe", "old")
+    write(install / "config.json", '{"port": "COM7"}')
+    manifest = {"version": "1.0.5", "files": {
+        "SerialToWinForms.exe": {"size": 3, "sha256": "0" * 64},
+        "config.json": {"size": 17, "sha256": "0" * 64},
+        "Settings.json": {"size": 2, "sha256": "0" * 64},
+    }}
+    assert plan_delta(manifest, str(install)) == ["SerialToWinForms.exe"]
+    assert is_local("journal/frames.db") and not is_local("_internal/config.json")
+
+
+def test_zip_update_keeps_station_config(tmp_path):
+    install = tmp_path / "install"
+    write(install / "SerialToWinForms.exe", "exe 1.0.4")
+    write(install / "version.txt", "1.0.4")
+    write(install / "config.json", '{"port": "COM7"}')
+    write(install / "settings.json", '{"auto_reset": false}')
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    with zipfile.ZipFile(staging / "update.zip", "w") as zip_ref:
+        zip_ref.writestr("SerialToWinForms.exe", "exe 1.0.5")
+        zip_ref.writestr("version.txt", "1.0.5")
+        zip_ref.writestr("config.json", '{"port": "COM1"}')  # the build machine's
+        zip_ref.writestr("settings.json", "{}")
+    (staging / "staged.json").write_text(json.dumps({"version": "1.0.5", "kind": "zip", "files": []}))
+
+    version = prepare_version(str(install), str(staging))
+    assert not (install / "versions" / version / "config.json").exists()
+    activate(str(install), version)
+    assert (install / "SerialToWinForms.exe").read_text() == "exe 1.0.5"
+    assert (install / "config.json").read_text() == '{"port": "COM7"}'
+    assert (install / "settings.json").read_text() == '{"auto_reset": false}'
+
+    assert rollback(str(install))[0] == "1.0.4"
+    assert (install / "SerialToWinForms.exe").read_text() == "exe 1.0.4"
+    assert (install / "config.json").read_text() == '{"port": "COM7"}'
@@ -0,0 +1,27 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+
+update_script = pytest.importorskip("update_script")  # needs tkinter
+
+
+def start_sleeper(seconds):
+    process = subprocess.Popen([sys.executable, "-c", f"import time; time.sleep({seconds})"])
+    threading.Thread(target=process.wait, daemon=True).start()  # reap it, like the real parent does
+    return process
+
+
+def test_waits_for_the_old_process_to_exit():
+    process = start_sleeper(0.5)
+    assert update_script.process_exited(process.pid, 10)
+    assert process.poll() is not None
+
+
+def test_gives_up_on_a_process_that_keeps_running():
+    process = start_sleeper(30)
+    try:
+        assert not update_script.process_exited(process.pid, 0.2)
+    finally:
+        process.kill()
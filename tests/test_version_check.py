@@ -0,0 +1,70 @@
+import pytest
+
+from version_check import VersionChecker, version_key, is_newer
+
+
+@pytest.mark.parametrize("latest, current", [
+    ("1.0.10", "1.0.9"),
+    ("1.1", "1.0.99"),
+    ("2.0.0", "1.9.9"),
+    ("1.2.0", "1.2.0-rc1"),
+    ("1.2.0-rc2", "1.2.0-rc1"),
+    ("1.0.1", "1.0"),
+    ("v1.0.5", "1.0.4"),
+    ("1.0.4\n", "1.0.3"),
+    ("1.0.0", None),
+])
+def test_newer(latest, current):
+    assert is_newer(latest, current)
+    if current:
+        assert not is_newer(current, latest)
+
+
+@pytest.mark.parametrize("a, b", [("1.2", "1.2.0"), ("1.2.0", "1.2.0.0"), ("v1.0.4", "1.0.4 "), ("0", "0.0.0")])
+def test_equal_versions(a, b):
+    assert version_key(a) == version_key(b)
+    assert not is_newer(a, b) and not is_newer(b, a)
+
+
+def test_unknown_latest_is_never_newer():
+    assert not is_newer(None, "1.0.0")
+    assert not is_newer("", "1.0.0")
+
+
+def test_sorts_numerically():
+    versions = ["1.0.10", "1.0.9", "1.0.0-beta", "1.0", "1.0.2", "0.9"]
+    assert sorted(versions, key=version_key) == ["0.9", "1.0.0-beta", "1.0", "1.0.2", "1.0.9", "1.0.10"]
+
+
+class FakeClient:
+    """FTP client with version.txt and its SIZE/MDTM"""
+    def __init__(self, version, mdtm="20260101120000"):
+        self.version, self.mdtm = version, mdtm
+        self.reads = 0
+
+    def session(self):
+        return self
+
+    def sendcmd(self, command):
+        return f"213 {self.mdtm}"
+
+    def size(self, name):
+        return len(self.version)
+
+    def read_bytes(self, name):
+        self.reads += 1
+        return self.version.encode("utf-8")
+
+    def close(self):
+        pass
+
+
+def test_unchanged_stamp_skips_the_read():
+    client = FakeClient("1.0.4")
+    checker = VersionChecker(client, ttl=0)
+    assert checker.newer_than("1.0.3") == "1.0.4"
+    assert checker.newer_than("1.0.4") is None
+    assert (client.reads, checker.metadata_hits) == (1, 1)
+    client.version, client.mdtm = "1.0.10", "20260102120000"
+    assert checker.newer_than("1.0.4") == "1.0.10"
+    assert client.reads == 2
@@ -0,0 +1,238 @@
+"""
+Declarative transforms applied to a frame right before it is typed into
+Shop-Flow (the journal and the duplicate check keep the scanned payload).
+
+config.json, one chain for every target:
+
+    "transforms": [
+        {"op": "trim"},
+        {"op": "strip_weight"},
+        {"op": "map_prefix", "map": {"I44": "J44"}},
+        {"op": "append", "text": ";ST01"}
+    ]
+
+or one chain per target window title, "*" for any other:
+
+    "transforms": {"Shop-Flow System From Vietnam(Pack)": [...], "*": [...]}
+
+Payload stages:  strip, upper, replace {old, new}, prefix {text}, append {text}
+Record stages (per ';'-separated record):
+                 trim, drop_empty, map_prefix {map}, strip_weight,
+                 fields {keep: ["model", "serial", ...]}  (reorder / drop giftbox fields)
+
+The chain is compiled once into a single callable; consecutive record
+stages share one split/join. Pipeline.timed() runs stage by stage and
+returns the cost of each. Check a chain against recorded payloads:
+
+    python transform.py config.json recorded.txt    (lines: payload[<TAB>expected])
+"""
+
+import sys
+import time
+
+from giftbox import DEFAULT_RECORD_LAYOUT, FIELDS
+
+SEPARATOR = ';'
+ANY_TARGET = '*'
+
+
+def _strip(spec, layout):
+    return lambda payload: payload.strip()
+
+
+def _upper(spec, layout):
+    return lambda payload: payload.upper()
+
+
+def _replace(spec, layout):
+    old, new = str(spec['old']), str(spec.get('new', ''))
+    return lambda payload: payload.replace(old, new)
+
+
+def _prefix(spec, layout):
+    text = str(spec['text'])
+    return lambda payload: text + payload
+
+
+def _append(spec, layout):
+    text = str(spec['text'])
+    return lambda payload: payload + text
+
+
+def _trim(spec, layout):
+    return lambda records: [record.strip() for record in records]
+
+
+def _drop_empty(spec, layout):
+    return lambda records: [record for record in records if record]
+
+
+def _map_prefix(spec, layout):
+    mapping = {str(old): str(new) for old, new in spec['map'].items()}
+    # Longest prefix wins
+    prefixes = sorted(mapping, key=len, reverse=True)
+
+    def map_prefix(records):
+        result = []
+        for record in records:
+            for old in prefixes:
+                if record.startswith(old):
+                    record = mapping[old] + record[len(old):]
+                    break
+            result.append(record)
+        return result
+    return map_prefix
+
+
+def _fields(spec, layout):
+    keep = list(spec['keep'])
+    unknown = [name for name in keep if name not in FIELDS]
+    if unknown:
+        raise ValueError(f"unknown giftbox field(s) {unknown}, expected {list(FIELDS)}")
+    slices = [layout.slices[name] for name in keep]
+    width = layout.record_width
+
+    # Records that are not full giftbox records pass through unchanged
+    def fields(records):
+        return [''.join([record[s] for s in slices]) if len(record) == width else record for record in records]
+    return fields
+
+
+def _strip_weight(spec, layout):
+    return _fields({'keep': [name for name, _ in layout.layout if name != 'weight']}, layout)
+
+
+PAYLOAD_OPS = {'strip': _strip, 'upper': _upper, 'replace': _replace, 'prefix': _prefix, 'append': _append}
+RECORD_OPS = {'trim': _trim, 'drop_empty': _drop_empty, 'map_prefix': _map_prefix,
+              'fields': _fields, 'strip_weight': _strip_weight}
+
+
+def _records_stage(functions):
+    """payload -> payload running record functions inside one split/join"""
+    if len(functions) == 1:
+        only = functions[0]
+        return lambda payload: SEPARATOR.join(only(payload.split(SEPARATOR)))
+
+    def run(payload):
+        records = payload.split(SEPARATOR)
+        for function in functions:
+            records = function(records)
+        return SEPARATOR.join(records)
+    return run
+
+
+def _chain(functions):
+    if not functions:
+        return lambda payload: payload
+    if len(functions) == 1:
+        return functions[0]
+
+    def run(payload):
+        for function in functions:
+            payload = function(payload)
+        return payload
+    return run
+
+
+class Pipeline:
+    def __init__(self, specs=(), layout=DEFAULT_RECORD_LAYOUT):
+        self.names = []
+        self.stages = []  # (name, payload -> payload), one split/join each
+        fused = []
+        pending_records = []
+        for i, spec in enumerate(specs):
+            op = spec.get('op') if isinstance(spec, dict) else None
+            try:
+                if op in RECORD_OPS:
+                    function = RECORD_OPS[op](spec, layout)
+                    pending_records.append(function)
+                    self.stages.append((op, _records_stage([function])))
+                elif op in PAYLOAD_OPS:
+                    function = PAYLOAD_OPS[op](spec, layout)
+                    if pending_records:
+                        fused.append(_records_stage(pending_records))
+                        pending_records = []
+                    fused.append(function)
+                    self.stages.append((op, function))
+                else:
+                    raise ValueError(f"unknown op {op!r}")
+            except (KeyError, TypeError, AttributeError, ValueError) as e:
+                detail = f"missing '{e.args[0]}'" if isinstance(e, KeyError) else str(e)
+                raise ValueError(f"transforms[{i}] ({op}): {detail}")
+            self.names.append(op)
+        if pending_records:
+            fused.append(_records_stage(pending_records))
+        self.run = _chain(fused)
+
+    def __call__(self, payload):
+        return self.run(payload)
+
+    def __len__(self):
+        return len(self.stages)
+
+    def __str__(self):
+        return " → ".join(self.names) or "none"
+
+    def timed(self, payload):
+        """Run stage by stage; returns (result, [(op, seconds), ...])"""
+        costs = []
+        for name, function in self.stages:
+            start = time.perf_counter()
+            payload = function(payload)
+            costs.append((name, time.perf_counter() - start))
+        return payload, costs
+
+
+def select_chain(transforms, target):
+    """The list of stage specs that applies to a target window title"""
+    if not transforms:
+        return []
+    if isinstance(transforms, dict):
+        return transforms.get(target, transforms.get(ANY_TARGET, []))
+    return transforms
+
+
+def compile_transforms(transforms, target=None, layout=DEFAULT_RECORD_LAYOUT):
+    """Pipeline for config.json "transforms"; raises ValueError on an invalid chain"""
+    return Pipeline(select_chain(transforms, target), layout)
+
+
+def check_recorded(pipeline, lines):
+    """Run recorded payloads through a pipeline; returns (results, mismatches, per-stage seconds)"""
+    results = []
+    mismatches = []
+    totals = {}
+    for number, line in enumerate(lines, 1):
+        line = line.rstrip('\r\n')
+        if not line:
+            continue
+        payload, _, expected = line.partition('\t')
+        result = pipeline(payload)
+        timed_result, costs = pipeline.timed(payload)
+        if timed_result != result:
+            raise AssertionError(f"line {number}: stage-by-stage result differs from the compiled chain")
+        for name, seconds in costs:
+            totals[name] = totals.get(name, 0.0) + seconds
+        results.append(result)
+        if expected and result != expected:
+            mismatches.append((number, payload, expected, result))
+    return results, mismatches, totals
+
+
+if __name__ == "__main__":
+    import json
+    if len(sys.argv) != 3:
+        print("Usage: python transform.py <config.json> <recorded.txt>")
+        sys.exit(2)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    pipeline = compile_transforms(config.get('transforms'), config.get('target_app_title'))
+    with open(sys.argv[2], 'r', encoding='utf-8') as f:
+        results, mismatches, totals = check_recorded(pipeline, f.readlines())
+    print(f"Chain: {pipeline}")
+    for name, seconds in totals.items():
+        print(f"  {name:14s} {seconds / max(len(results), 1) * 1e6:8.2f} µs per payload")
+    for number, payload, expected, result in mismatches:
+        print(f"line {number}: expected {expected!r}, got {result!r}")
+    print(f"{len(results)} payloads, {len(mismatches)} mismatches")
+    sys.exit(1 if mismatches else 0)
@@ -0,0 +1,78 @@
+"""
+State-keyed system tray icon.
+
+The tray shows one of four states. Each image is drawn once and cached; the
+icon is pushed to the tray only when the state changes, so a quiet bridge
+costs no image work and no shell notifications per monitor tick.
+"""
+
+import logging
+
+RUNNING = "running"
+STOPPED = "stopped"
+DEGRADED = "degraded"
+ERROR = "error"
+TRAY_STATES = (RUNNING, STOPPED, DEGRADED, ERROR)
+
+TRAY_COLORS = {
+    RUNNING: "green",
+    STOPPED: "gray",
+    DEGRADED: "orange",
+    ERROR: "red",
+}
+
+ICON_SIZE = 64
+
+
+def draw_tray_image(state):
+    """Draw the tray image of a state (PIL is only needed here)"""
+    from PIL import Image, ImageDraw
+
+    image = Image.new('RGB', (ICON_SIZE, ICON_SIZE), TRAY_COLORS[state])
+    dc = ImageDraw.Draw(image)
+    dc.rectangle(
+        (ICON_SIZE // 4, ICON_SIZE // 4, ICON_SIZE * 3 // 4, ICON_SIZE * 3 // 4),
+        fill="white")
+    return image
+
+
+def tray_state(running, supervisor_state=None, health=None):
+    """Map handler / supervisor / health snapshot to a tray state"""
+    if not running:
+        return STOPPED
+    if supervisor_state == "recovering":
+        return ERROR
+    if supervisor_state in ("connecting", "degraded"):
+        return DEGRADED
+    if health is not None and not (health.serial_ok and health.winforms_ok):
+        return DEGRADED
+    return RUNNING
+
+
+class TrayIconCache:
+    def __init__(self, draw=draw_tray_image):
+        self.draw = draw
+        self.images = {}
+        self.state = None   # state currently shown in the tray
+        self.updates = 0    # icon pushes since creation
+
+    def image(self, state):
+        """Cached image of a state (drawn on first use)"""
+        image = self.images.get(state)
+        if image is None:
+            image = self.images[state] = self.draw(state)
+        return image
+
+    def preload(self):
+        for state in TRAY_STATES:
+            self.image(state)
+
+    def apply(self, icon, state):
+        """Push the image to the tray if the state changed; True if pushed"""
+        if icon is None or state == self.state:
+            return False
+        icon.icon = self.image(state)
+        self.state = state
+        self.updates += 1
+        logging.debug(f"Tray icon → {state}")
+        return True
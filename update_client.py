@@ -0,0 +1,507 @@
+"""
+FTP update client shared by update_script.py and the GUI.
+
+Delta updates: the update directory on the server holds, next to the
+classic update.zip,
+
+    manifest.json   {"version": "1.0.4",
+                     "files": {"SerialToWinForms.exe": {"size": 123, "sha256": "..."}, ...}}
+    files/<path>    the release files themselves
+
+Only files whose size or SHA-256 differ from the local install are
+downloaded; each one is verified before anything is replaced.
+
+Build a manifest for a release folder (upload it together with files/):
+
+    python update_client.py manifest <release_dir> <version>
+
+Downloads resume after a dropped connection (REST offset into a .part
+file) and are verified against the manifest or <name>.sha256 before use:
+
+    python update_client.py checksum update.zip   -> update.zip.sha256
+
+Installs are side by side: a staged update is built into
+versions/<version>/ next to the active install, verified, and activated by
+renaming the release entries (exe, _internal, ...) into place. The
+replaced release moves to versions/<old>/, so rollback is the same rename
+switch in reverse. versions/active.json records current and previous;
+config.json, settings.json, logs and the journal are never touched.
+They belong to the station: a manifest never lists them, and entries with
+those names on the server are ignored.
+"""
+
+import collections
+import hashlib
+import io
+import json
+import os
+import shutil
+import sys
+import time
+import zipfile
+from ftplib import FTP, error_perm, error_reply, error_temp
+
+MANIFEST_NAME = "manifest.json"
+FILES_DIR = "files"
+ZIP_NAME = "update.zip"
+VERSION_NAME = "version.txt"
+STAGED_INFO = "staged.json"
+VERSIONS_DIR = "versions"
+ACTIVE_INFO = "active.json"
+RELEASE_INFO = "release.json"
+CHECKSUM_SUFFIX = ".sha256"
+PART_SUFFIX = ".part"
+BLOCK_SIZE = 64 * 1024
+HASH_CHUNK = 1024 * 1024
+MAX_RETRIES = 5
+RETRY_DELAY = 1.0          # seconds, grows with each retry
+PROGRESS_INTERVAL = 0.1    # max 10 progress updates per second
+# Top-level entries owned by the station, never shipped or replaced by an update
+LOCAL_ENTRIES = ("config.json", "settings.json", "log", "journal")
+
+UpdateStats = collections.namedtuple(
+    'UpdateStats',
+    ['version', 'files_changed', 'files_total', 'bytes_transferred', 'bytes_total', 'seconds'])
+
+
+class UpdateError(Exception):
+    pass
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_local(rel):
+    """True for release paths under a station-owned entry (LOCAL_ENTRIES)"""
+    return rel.split('/')[0].lower() in LOCAL_ENTRIES
+
+
+def release_files(manifest):
+    """Manifest entries an update may install (station-owned entries dropped)"""
+    return {rel: info for rel, info in manifest['files'].items() if not is_local(rel)}
+
+
+def build_manifest(directory, version):
+    """Manifest dict for every file under `directory` (paths use '/'), local entries excluded"""
+    files = {}
+    for base, _, names in os.walk(directory):
+        for name in names:
+            path = os.path.join(base, name)
+            rel = os.path.relpath(path, directory).replace(os.sep, '/')
+            if not is_local(rel):
+                files[rel] = {'size': os.path.getsize(path), 'sha256': file_sha256(path)}
+    return {'version': version, 'files': dict(sorted(files.items()))}
+
+
+def local_path(base, rel):
+    """Local path of a manifest entry; refuses paths that leave `base`"""
+    parts = rel.split('/')
+    if rel.startswith('/') or '..' in parts or ':' in rel:
+        raise UpdateError(f"Invalid path in manifest: {rel}")
+    return os.path.join(base, *parts)
+
+
+def plan_delta(manifest, local_dir):
+    """Relative paths from the manifest that are missing or different locally"""
+    changed = []
+    for rel, info in release_files(manifest).items():
+        path = local_path(local_dir, rel)
+        # Size first: a different size never needs hashing
+        if not os.path.isfile(path) or os.path.getsize(path) != info['size']:
+            changed.append(rel)
+        elif file_sha256(path) != info['sha256']:
+            changed.append(rel)
+    return changed
+
+
+class FTPUpdateClient:
+    def __init__(self, server, user, password, directory, port=21, timeout=30, retries=MAX_RETRIES,
+                 retry_delay=RETRY_DELAY, block_size=BLOCK_SIZE):
+        self.server = server
+        self.user = user
+        self.password = password
+        self.directory = directory
+        self.port = port
+        self.timeout = timeout
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.block_size = block_size
+        self.ftp = None
+        self.manifest_bytes = 0  # size of the last manifest read
+        self.reconnects = 0
+
+    def connect(self):
+        """(Re)open the FTP session in the update directory"""
+        self.close()
+        ftp = FTP()
+        ftp.connect(self.server, self.port, timeout=self.timeout)
+        ftp.login(self.user, self.password)
+        if self.directory:
+            ftp.cwd(self.directory)
+        self.ftp = ftp
+        return ftp
+
+    def session(self):
+        return self.ftp or self.connect()
+
+    def close(self):
+        ftp, self.ftp = self.ftp, None
+        if ftp:
+            try:
+                ftp.quit()
+            except Exception:
+                ftp.close()
+
+    def read_bytes(self, name):
+        """Download a small file into memory"""
+        buffer = io.BytesIO()
+        self.session().retrbinary(f"RETR {name}", buffer.write)
+        return buffer.getvalue()
+
+    def fetch_manifest(self):
+        """Parsed manifest.json, or None if the server has no manifest"""
+        try:
+            raw = self.read_bytes(MANIFEST_NAME)
+        except error_perm as e:
+            if str(e).startswith('550'):
+                return None
+            raise
+        self.manifest_bytes = len(raw)
+        return json.loads(raw.decode('utf-8'))
+
+    def fetch_checksum(self, name):
+        """SHA-256 published next to a file as <name>.sha256, None if missing"""
+        try:
+            raw = self.read_bytes(name + CHECKSUM_SUFFIX)
+        except error_perm as e:
+            if str(e).startswith('550'):
+                return None
+            raise
+        return raw.decode('ascii').split()[0].lower()
+
+    def download(self, remote, path, expected_size=None, expected_sha256=None, progress=None):
+        """
+        Download `remote` to `path`, resuming from `path`.part with REST after a
+        dropped connection (up to `retries` reconnects). The file only appears
+        at `path` once size and SHA-256 match. progress(bytes) is called per block.
+        Returns the number of bytes received.
+        """
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        part = path + PART_SUFFIX
+        received = 0
+        attempt = 0
+        while True:
+            offset = os.path.getsize(part) if os.path.exists(part) else 0
+            if expected_size is not None and offset > expected_size:
+                os.remove(part)  # stale partial of another build
+                offset = 0
+            try:
+                if expected_size is None or offset < expected_size:
+                    with open(part, 'ab') as f:
+                        def callback(data):
+                            nonlocal received
+                            f.write(data)
+                            received += len(data)
+                            if progress:
+                                progress(len(data))
+                        self.session().retrbinary(f"RETR {remote}", callback, self.block_size, rest=offset or None)
+                break
+            except (OSError, EOFError, error_temp, error_reply) as e:
+                attempt += 1
+                if attempt > self.retries:
+                    raise UpdateError(f"Download of {remote} failed after {self.retries} retries: {e}")
+                self.ftp = None  # the session is gone; reconnect and resume
+                self.reconnects += 1
+                time.sleep(min(self.retry_delay * attempt, 10))
+
+        size = os.path.getsize(part)
+        if expected_size is not None and size != expected_size:
+            os.remove(part)
+            raise UpdateError(f"Size mismatch for {remote}: {size} != {expected_size}")
+        if expected_sha256 and file_sha256(part) != expected_sha256.lower():
+            os.remove(part)
+            raise UpdateError(f"Checksum mismatch for {remote}")
+        os.replace(part, path)
+        return received
+
+    def stage_update(self, local_dir, staging_dir, progress=None, allow_zip=True):
+        """
+        Download and verify the server version into staging_dir without touching
+        local_dir: the changed files (manifest.json) or else update.zip.
+        staged.json is written last, so a staging dir without it is incomplete.
+        Returns the staged info dict, or None if there is nothing to stage.
+        progress(done_bytes, total_bytes) is called while downloading.
+        """
+        start = time.monotonic()
+        done = 0
+        # Whatever was staged before is incomplete until the new staged.json exists
+        if os.path.exists(os.path.join(staging_dir, STAGED_INFO)):
+            os.remove(os.path.join(staging_dir, STAGED_INFO))
+
+        def on_block(n):
+            nonlocal done
+            done += n
+            if progress:
+                progress(done, total)
+
+        try:
+            manifest = self.fetch_manifest()
+            if manifest is not None:
+                files = release_files(manifest)
+                changed = plan_delta(manifest, local_dir)
+                total = sum(files[rel]['size'] for rel in changed)
+                for rel in changed:
+                    entry = files[rel]
+                    self.download(f"{FILES_DIR}/{rel}", local_path(os.path.join(staging_dir, FILES_DIR), rel),
+                                  entry['size'], entry['sha256'], on_block)
+                info = {
+                    'version': manifest['version'], 'kind': 'delta', 'files': changed,
+                    'manifest': files, 'files_total': len(files),
+                    'bytes_total': sum(entry['size'] for entry in files.values()),
+                }
+                done += self.manifest_bytes
+            elif allow_zip:
+                version = self.read_bytes(VERSION_NAME).decode('utf-8').strip()
+                total = self.session().size(ZIP_NAME)
+                checksum = self.fetch_checksum(ZIP_NAME)
+                self.download(ZIP_NAME, os.path.join(staging_dir, ZIP_NAME), total, checksum, on_block)
+                info = {'version': version, 'kind': 'zip', 'files': [], 'files_total': 1,
+                        'bytes_total': total, 'verified': bool(checksum)}
+            else:
+                return None
+        finally:
+            self.close()
+
+        info['bytes_transferred'] = done
+        info['seconds'] = time.monotonic() - start
+        tmp = os.path.join(staging_dir, STAGED_INFO + ".tmp")
+        os.makedirs(staging_dir, exist_ok=True)
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=2)
+        os.replace(tmp, os.path.join(staging_dir, STAGED_INFO))
+        return info
+
+    def delta_update(self, target_dir, staging_dir, progress=None):
+        """
+        Bring target_dir up to the server manifest. Changed files are downloaded
+        to staging_dir and verified, then the new version is activated side by side.
+        Returns UpdateStats, or None if the server has no manifest.
+        """
+        info = self.stage_update(target_dir, staging_dir, progress, allow_zip=False)
+        if info is None:
+            return None
+        if info['files']:
+            apply_staged(staging_dir, target_dir)
+        else:
+            shutil.rmtree(staging_dir, ignore_errors=True)  # already up to date
+        return staged_stats(info)
+
+
+def read_staged(staging_dir):
+    """staged.json of a completely staged update, None if missing or unreadable"""
+    try:
+        with open(os.path.join(staging_dir, STAGED_INFO), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def staged_stats(info):
+    return UpdateStats(
+        version=info['version'],
+        files_changed=len(info['files']),
+        files_total=info['files_total'],
+        bytes_transferred=info['bytes_transferred'],
+        bytes_total=info['bytes_total'],
+        seconds=info['seconds'])
+
+
+def write_json(path, data):
+    """Write JSON next to `path` and rename it over `path`"""
+    tmp = path + ".tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def top_level(files):
+    """Top-level entries (files or folders) that hold the given release paths, local entries excluded"""
+    return sorted({rel.split('/')[0] for rel in files if not is_local(rel)})
+
+
+def read_active(program_dir):
+    """versions/active.json; derived from version.txt for installs that predate it"""
+    active = read_json(os.path.join(program_dir, VERSIONS_DIR, ACTIVE_INFO))
+    if active is None:
+        try:
+            with open(os.path.join(program_dir, VERSION_NAME), 'r', encoding='utf-8') as f:
+                current = f.read().strip() or "0.0.0"
+        except OSError:
+            current = "0.0.0"
+        active = {'current': current, 'previous': None, 'files': None}
+    return active
+
+
+def prepare_version(program_dir, staging_dir):
+    """
+    Build the staged update as a complete release in versions/<version>/ and
+    verify it; the active install is not touched. Unchanged files of a delta
+    update are copied from the active install. Returns the version.
+    """
+    info = read_staged(staging_dir)
+    if info is None:
+        raise UpdateError(f"No complete update staged in {staging_dir}")
+    version = info['version']
+    target = local_path(os.path.join(program_dir, VERSIONS_DIR), version)
+    building = target + ".tmp"
+    shutil.rmtree(building, ignore_errors=True)
+    os.makedirs(building)
+
+    if info['kind'] == 'zip':
+        with zipfile.ZipFile(os.path.join(staging_dir, ZIP_NAME), 'r') as zip_ref:
+            bad = zip_ref.testzip()
+            if bad:
+                raise UpdateError(f"Corrupt entry in {ZIP_NAME}: {bad}")
+            files = [name for name in zip_ref.namelist() if not name.endswith('/')]
+            for name in files:
+                local_path(building, name)  # refuse entries outside the release
+            files = [name for name in files if not is_local(name)]  # a zip built from a station folder
+            zip_ref.extractall(building, files)
+    else:
+        files = sorted(rel for rel in info['manifest'] if not is_local(rel))
+        changed = set(info['files'])
+        for rel in files:
+            path = local_path(building, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if rel in changed:
+                os.replace(local_path(os.path.join(staging_dir, FILES_DIR), rel), path)
+            else:
+                shutil.copy2(local_path(program_dir, rel), path)
+        # Changed files were verified on download; check the copies too
+        for rel in files:
+            entry = info['manifest'][rel]
+            path = local_path(building, rel)
+            if rel not in changed and (os.path.getsize(path) != entry['size'] or file_sha256(path) != entry['sha256']):
+                raise UpdateError(f"{rel} does not match the {version} manifest")
+
+    write_json(os.path.join(building, RELEASE_INFO), {'version': version, 'files': files})
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(building, target)  # a versions/<version> folder is always complete
+    shutil.rmtree(staging_dir, ignore_errors=True)
+    return version
+
+
+def activate(program_dir, version):
+    """
+    Make versions/<version>/ the active install by renaming its entries into
+    program_dir; the replaced entries move to versions/<old>/. Renames on one
+    volume are atomic and do not copy data, and a failed switch is undone.
+    Returns the switch time in milliseconds.
+    """
+    versions = os.path.join(program_dir, VERSIONS_DIR)
+    new_dir = local_path(versions, version)
+    release = read_json(os.path.join(new_dir, RELEASE_INFO))
+    if release is None:
+        raise UpdateError(f"Version {version} is not installed in {versions}")
+    active = read_active(program_dir)
+    old_version = active['current']
+    if old_version == version:
+        old_version += "~"  # reinstall of the same version
+    old_files = active['files']
+    if old_files is None:
+        # First side-by-side install: the old release is whatever the new one replaces
+        old_files = [rel for rel in release['files'] if os.path.exists(local_path(program_dir, rel))]
+    old_dir = local_path(versions, old_version)
+    shutil.rmtree(old_dir, ignore_errors=True)
+    os.makedirs(old_dir)
+
+    start = time.perf_counter()
+    moved = []
+    try:
+        for name in top_level(old_files):
+            if os.path.exists(os.path.join(program_dir, name)):
+                os.replace(os.path.join(program_dir, name), os.path.join(old_dir, name))
+                moved.append((os.path.join(program_dir, name), os.path.join(old_dir, name)))
+        for name in top_level(release['files']):
+            os.replace(os.path.join(new_dir, name), os.path.join(program_dir, name))
+            moved.append((os.path.join(new_dir, name), os.path.join(program_dir, name)))
+    except OSError as e:
+        for source, moved_to in reversed(moved):
+            os.replace(moved_to, source)
+        raise UpdateError(f"Activating {version} failed, previous version kept: {e}")
+    write_json(os.path.join(versions, ACTIVE_INFO),
+               {'current': version, 'previous': old_version, 'files': release['files']})
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    write_json(os.path.join(old_dir, RELEASE_INFO), {'version': old_version, 'files': old_files})
+    os.remove(os.path.join(new_dir, RELEASE_INFO))
+    shutil.rmtree(new_dir, ignore_errors=True)
+    # Keep only the version we can roll back to
+    for name in os.listdir(versions):
+        if name not in (old_version, ACTIVE_INFO) and os.path.isdir(os.path.join(versions, name)):
+            shutil.rmtree(os.path.join(versions, name), ignore_errors=True)
+    return elapsed_ms
+
+
+def rollback(program_dir):
+    """Switch back to the previous version; returns (version, milliseconds)"""
+    previous = read_active(program_dir)['previous']
+    if not previous or not os.path.isdir(os.path.join(program_dir, VERSIONS_DIR, previous)):
+        raise UpdateError("No previous version to roll back to")
+    return previous, activate(program_dir, previous)
+
+
+def apply_staged(staging_dir, target_dir):
+    """Install a staged update side by side and activate it; returns the version"""
+    version = prepare_version(target_dir, staging_dir)
+    activate(target_dir, version)
+    return version
+
+
+def throttled(callback, interval=PROGRESS_INTERVAL):
+    """Wrap progress(done, total) so it fires at most every `interval` seconds (and at 100%)"""
+    last = [0.0]
+
+    def progress(done, total):
+        now = time.monotonic()
+        if now - last[0] >= interval or done >= total:
+            last[0] = now
+            callback(done, total)
+    return progress
+
+
+def format_stats(stats):
+    return (f"{stats.files_changed}/{stats.files_total} files, "
+            f"{stats.bytes_transferred / 1024:.0f} KB of {stats.bytes_total / 1024:.0f} KB transferred "
+            f"in {stats.seconds:.1f}s")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "checksum":
+        path = sys.argv[2]
+        with open(path + CHECKSUM_SUFFIX, 'w', encoding='ascii') as f:
+            f.write(f"{file_sha256(path)}  {os.path.basename(path)}\n")
+        print(f"{path}{CHECKSUM_SUFFIX} written")
+        sys.exit(0)
+    if len(sys.argv) != 4 or sys.argv[1] != "manifest":
+        print("Usage: python update_client.py manifest <release_dir> <version>")
+        print("       python update_client.py checksum <file>")
+        sys.exit(2)
+    release_dir, version = sys.argv[2], sys.argv[3]
+    manifest = build_manifest(release_dir, version)
+    with open(MANIFEST_NAME, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"{MANIFEST_NAME}: version {version}, {len(manifest['files'])} files")
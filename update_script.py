@@ -1,13 +1,15 @@
 import os
 import sys
-import zipfile
+import shutil
 import subprocess
 import tkinter as tk
 from tkinter import ttk, messagebox
 import time
 import threading
-from ftplib import FTP
 import json
+from update_client import (FTPUpdateClient, format_stats, throttled, staged_stats, prepare_version, activate,
+                           rollback)
+from version_check import VersionChecker, is_newer
 
 def get_app_directory():
     """Get application directory (works for both .py and .exe)"""
@@ -46,8 +48,12 @@ settings = load_settings()
 PROGRAM_DIRECTORY = settings.get('program_directory', 'C:\\Serial_to_MES')
 CURRENT_VERSION_FILE = os.path.join(PROGRAM_DIRECTORY, "version.txt")
 MAIN_EXECUTABLE = os.path.join(PROGRAM_DIRECTORY, "SerialToWinForms.exe")
-UPDATE_ZIP_PATH = os.path.join(PROGRAM_DIRECTORY, "update.zip")
 VERSION_FLAG_FILE = os.path.join(PROGRAM_DIRECTORY, "version_flag.txt")
+UPDATE_STAGING_DIR = os.path.join(PROGRAM_DIRECTORY, "update_staging")
+STARTUP_CHECK_SECONDS = 5  # phiên bản mới thoát lỗi trong thời gian này -> rollback
+OLD_PROCESS_TIMEOUT = 60   # giây chờ chương trình cũ thoát (--wait-pid) trước khi đổi phiên bản
+ALREADY_RUNNING_EXIT_CODE = 3  # serial_to_winforms_gui: đã có instance khác đang chạy, không phải lỗi
+SYNCHRONIZE = 0x00100000
 
 # Đường dẫn tới FTP Server
 FTP_SERVER = settings.get('ftp_server', '10.62.102.5')
@@ -70,65 +76,123 @@ def update_version_file(new_version):
         file.write(new_version)
 
 def get_latest_version():
+    """Đọc version.txt trên server vào bộ nhớ (không ghi file tạm)"""
     try:
-        ftp = FTP(FTP_SERVER)
-        ftp.login(FTP_USER, FTP_PASS)
-        ftp.cwd(FTP_DIRECTORY)
-        with open("latest_version.txt", "wb") as file:
-            ftp.retrbinary("RETR version.txt", file.write)
-        ftp.quit()
-        with open("latest_version.txt", "r") as file:
-            latest_version = file.read().strip()
-        os.remove("latest_version.txt")
-        return latest_version
+        return VersionChecker(FTPUpdateClient(FTP_SERVER, FTP_USER, FTP_PASS, FTP_DIRECTORY)).latest()
     except Exception as e:
         print(f"Không thể lấy phiên bản mới nhất: {e}")
         return None
 
-def download_update(progress_var):
+def stage_update(progress_var):
+    """Tải bản cập nhật vào thư mục tạm: chỉ các file đã thay đổi (manifest.json) hoặc update.zip"""
+    client = FTPUpdateClient(FTP_SERVER, FTP_USER, FTP_PASS, FTP_DIRECTORY)
+    def progress(done, total):
+        # Chạy trên thread tải về: chuyển việc cập nhật UI sang Tk thread
+        root.after(0, progress_var.set, round(done * 100 / total) if total else 100)
     try:
-        ftp = FTP(FTP_SERVER)
-        ftp.login(FTP_USER, FTP_PASS)
-        ftp.cwd(FTP_DIRECTORY)
-        total_size = ftp.size("update.zip")
-        block_size = 8192
-        downloaded_size = 0
-        with open(os.path.join(PROGRAM_DIRECTORY, "update.zip"), 'wb') as file:
-            def callback(data):
-                nonlocal downloaded_size
-                file.write(data)
-                downloaded_size += len(data)
-                percent = round(downloaded_size * 100 / total_size)
-                progress_var.set(percent)
-                root.update_idletasks()
-            ftp.retrbinary("RETR update.zip", callback, block_size)
-        ftp.quit()
-        print("Tải bản cập nhật thành công.")
+        info = client.stage_update(PROGRAM_DIRECTORY, UPDATE_STAGING_DIR, throttled(progress))
     except Exception as e:
         print(f"Không thể tải bản cập nhật: {e}")
         messagebox.showerror("Lỗi", "Không thể tải bản cập nhật!. Kiểm tra kết nối mạng")
         close_window(root)
         sys.exit()
+    if info['kind'] == 'delta':
+        print(f"Cập nhật delta {info['version']}: {format_stats(staged_stats(info))}")
+    else:
+        if not info['verified']:
+            print("Cảnh báo: server không có update.zip.sha256, chỉ kiểm tra kích thước file")
+        print(f"Tải bản cập nhật thành công: {info['bytes_transferred'] / 1024:.0f} KB trong {info['seconds']:.1f}s"
+              f" ({client.reconnects} lần kết nối lại)")
+    return info
+
+def install_version(staged_dir, progress_var):
+    """Dựng phiên bản mới trong versions/<version>, kiểm tra, rồi kích hoạt bằng cách đổi tên"""
+    try:
+        root.after(0, progress_var.set, 50)
+        version = prepare_version(PROGRAM_DIRECTORY, staged_dir)
+        elapsed_ms = activate(PROGRAM_DIRECTORY, version)
+        root.after(0, progress_var.set, 100)
+        print(f"Đã kích hoạt phiên bản {version} trong {elapsed_ms:.1f} ms (giữ phiên bản cũ để rollback)")
+        return version
+    except Exception as e:
+        print(f"Lỗi khi cài bản cập nhật: {e}")
+        messagebox.showerror("Lỗi", "Không thể cài bản cập nhật! Phiên bản hiện tại được giữ nguyên.")
+        close_window(root)
+        sys.exit()
+
+def process_exited(pid, timeout):
+    """Chờ tiến trình `pid` thoát tối đa `timeout` giây; True nếu đã thoát"""
+    if sys.platform == 'win32':
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(SYNCHRONIZE, False, pid)
+        if not handle:
+            return True  # không còn tiến trình này
+        try:
+            return kernel32.WaitForSingleObject(handle, int(timeout * 1000)) == 0  # WAIT_OBJECT_0
+        finally:
+            kernel32.CloseHandle(handle)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            return True
+        except PermissionError:
+            pass  # vẫn còn chạy
+        if time.monotonic() >= deadline:
+            return False
+        time.sleep(0.1)
+
+def wait_for_old_program():
+    """Chờ chương trình chính (--wait-pid) thoát hẳn trước khi đổi file; thoát nếu quá thời gian"""
+    if "--wait-pid" not in sys.argv:
+        time.sleep(2)  # chạy tay, không biết PID
+        return
+    pid = int(sys.argv[sys.argv.index("--wait-pid") + 1])
+    start = time.monotonic()
+    if not process_exited(pid, OLD_PROCESS_TIMEOUT):
+        print(f"Chương trình cũ (PID {pid}) chưa thoát sau {OLD_PROCESS_TIMEOUT}s, hủy cập nhật")
+        messagebox.showerror("Lỗi", "Chương trình cũ chưa thoát, không thể cập nhật. Phiên bản hiện tại được giữ nguyên.")
+        close_window(root)
+        sys.exit()
+    print(f"Chương trình cũ (PID {pid}) đã thoát sau {time.monotonic() - start:.1f}s")
+
+def install_staged(staged_dir, progress_var):
+    """Cài bản cập nhật đã được tải sẵn (pre-staged) - không cần tải lại"""
+    wait_for_old_program()
+    return install_version(staged_dir, progress_var)
 
-def apply_update():
+def rollback_version():
+    """Quay lại phiên bản trước (đổi tên, không cần tải lại)"""
     try:
-        print("Đang giải nén file cập nhật...")
-        with zipfile.ZipFile(UPDATE_ZIP_PATH, "r") as zip_ref:
-            zip_ref.extractall(PROGRAM_DIRECTORY)
-        zip_ref.close()
-        os.remove(UPDATE_ZIP_PATH)
-        print("Cập nhật hoàn tất.")
+        version, elapsed_ms = rollback(PROGRAM_DIRECTORY)
+        set_current_version(version)
+        print(f"Đã quay lại phiên bản {version} trong {elapsed_ms:.1f} ms")
+        return version
     except Exception as e:
-        print(f"Lỗi khi thực hiện cập nhật: {e}")
-        messagebox.showerror("Lỗi", "Không thể giản nén bản cập nhật!")
+        print(f"Không thể quay lại phiên bản trước: {e}")
+        messagebox.showerror("Lỗi", f"Không thể quay lại phiên bản trước: {e}")
         close_window(root)
         sys.exit()
 
-def restart_program(root):
+def restart_program(root, rollback_on_crash=False):
     try:
         if os.path.exists(MAIN_EXECUTABLE):
             process = subprocess.Popen([MAIN_EXECUTABLE])
             print(f"Đã khởi chạy lại chương trình, PID: {process.pid}")
+            if rollback_on_crash:
+                try:
+                    code = process.wait(timeout=STARTUP_CHECK_SECONDS)
+                except subprocess.TimeoutExpired:
+                    code = None
+                if code == ALREADY_RUNNING_EXIT_CODE:
+                    print("Phiên bản mới báo đã có instance khác đang chạy, không rollback")
+                elif code:
+                    print(f"Phiên bản mới thoát với mã {code} khi khởi động, quay lại phiên bản trước")
+                    rollback_version()
+                    process = subprocess.Popen([MAIN_EXECUTABLE])
+                    print(f"Đã khởi chạy phiên bản trước, PID: {process.pid}")
             close_window(root)
             sys.exit()
         else:
@@ -179,28 +243,38 @@ if __name__ == "__main__":
             close_window(root)
             sys.exit()
 
-        download_update(progress_var)
-        new_version = "0.0.0"
-        try:
-            with zipfile.ZipFile(UPDATE_ZIP_PATH, 'r') as zip_ref:
-                new_version_file = zip_ref.open('version.txt')
-                new_version = new_version_file.read().decode('utf-8').strip()
-                new_version_file.close()
-        except Exception as e:
-            messagebox.showerror("Lỗi", "Không thể lấy thông tin phiên bản từ Server!")
-            close_window(root)
-            sys.exit()
-        
-        current_version = get_current_version()
-        latest_version = get_latest_version()
+        # Switch back to the version kept in versions/
+        if "--rollback" in sys.argv:
+            wait_for_old_program()
+            rollback_version()
+            restart_program(root)
+            return
+
+        # Update already downloaded and verified by the running program
+        if "--staged" in sys.argv:
+            version = install_staged(sys.argv[sys.argv.index("--staged") + 1], progress_var)
+            update_version_file(version)
+            set_current_version(version)
+            restart_program(root, rollback_on_crash=True)
+            return
 
-        if new_version > current_version:
-            time.sleep(2)
-            apply_update()
-            update_version_file(latest_version)
-            set_current_version(new_version)
+        # Nothing to download when the server version is not newer
+        latest_version = get_latest_version()
+        if latest_version and not is_newer(latest_version, get_current_version()):
+            messagebox.showinfo("Thông báo", "Chương trình đã được cập nhật phiên bản mới nhất.")
             restart_program(root)
+            return
+
+        # Delta update when the server publishes manifest.json, full update.zip otherwise
+        info = stage_update(progress_var)
+        if info['kind'] == 'zip' or info['files']:
+            wait_for_old_program()
+            version = install_version(UPDATE_STAGING_DIR, progress_var)
+            update_version_file(version)
+            set_current_version(version)
+            restart_program(root, rollback_on_crash=True)
         else:
+            shutil.rmtree(UPDATE_STAGING_DIR, ignore_errors=True)
             messagebox.showinfo("Thông báo", "Chương trình đã được cập nhật phiên bản mới nhất.")
             restart_program(root)
     
@@ -0,0 +1,107 @@
+"""
+Background pre-staging of updates.
+
+A low-priority thread polls the FTP server, and when a newer version is
+published downloads and verifies it into the staging directory while the
+bridge keeps running (optionally rate limited). The owner switches over
+only once the line has been idle long enough (`ready_to_swap`), so the
+downtime of an update is just the restart.
+
+An update staged before a restart is picked up again from staged.json.
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+
+from update_client import UpdateError, read_staged
+from version_check import VersionChecker, is_newer
+
+STAGING_DIR_NAME = "update_staging"
+DEFAULT_CHECK_INTERVAL = 3600  # seconds
+FIRST_CHECK_DELAY = 60         # let the bridge finish connecting first
+THREAD_PRIORITY_LOWEST = -2    # Windows SetThreadPriority value
+
+
+def lower_thread_priority():
+    """Best effort: run the calling thread below normal priority"""
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_PRIORITY_LOWEST)
+        else:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 10)
+    except Exception as e:
+        logging.debug(f"Could not lower update thread priority: {e}")
+
+
+class UpdateStager:
+    def __init__(self, client, program_dir, current_version, check_interval=DEFAULT_CHECK_INTERVAL,
+                 swap_idle_minutes=10, rate_limit_kbps=0, staging_dir=None):
+        self.client = client
+        self.program_dir = program_dir
+        self.current_version = current_version  # callable returning the installed version
+        self.check_interval = check_interval
+        self.swap_idle_seconds = swap_idle_minutes * 60
+        self.rate_limit = rate_limit_kbps * 1024  # bytes/s, 0 = unlimited
+        self.staging_dir = staging_dir or os.path.join(program_dir, STAGING_DIR_NAME)
+        # Every poll asks the server, but SIZE/MDTM spare the download when unchanged
+        self.versions = VersionChecker(client, ttl=0)
+        self.staged = read_staged(self.staging_dir)
+        if self.staged and not is_newer(self.staged['version'], self.current_version()):
+            self.staged = None  # already installed
+        self.stage_started = 0.0
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def start(self):
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self.run, name="UpdateStager", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def run(self):
+        lower_thread_priority()
+        delay = FIRST_CHECK_DELAY
+        while not self.stop_event.wait(delay):
+            try:
+                self.check()
+            except Exception as e:
+                logging.warning(f"📦 Update check failed: {type(e).__name__} - {e}")
+            delay = self.check_interval
+
+    def check(self):
+        """Stage the server version if it is newer; returns the staged info (or None)"""
+        latest = self.versions.newer_than(self.current_version())
+        if latest is None:
+            return None
+        if self.staged and self.staged['version'] == latest:
+            return self.staged
+
+        logging.info(f"📦 Update {latest} available - downloading in the background")
+        self.staged = None
+        self.stage_started = time.monotonic()
+        info = self.client.stage_update(self.program_dir, self.staging_dir, self.throttle)
+        self.staged = info
+        logging.info(f"📦 Update {info['version']} staged ({info['kind']}): "
+                     f"{info['bytes_transferred'] / 1024:.0f} KB in {info['seconds']:.1f}s, "
+                     f"waiting for {self.swap_idle_seconds // 60} idle minutes to install")
+        return info
+
+    def throttle(self, done, total):
+        """Progress hook: sleep to stay under rate_limit, abort on stop()"""
+        if self.stop_event.is_set():
+            raise UpdateError("update staging stopped")
+        if self.rate_limit:
+            ahead = done / self.rate_limit - (time.monotonic() - self.stage_started)
+            if ahead > 0:
+                self.stop_event.wait(ahead)
+
+    def ready_to_swap(self, idle_seconds):
+        """True once an update is staged and the line has been idle long enough"""
+        return self.staged is not None and idle_seconds >= self.swap_idle_seconds
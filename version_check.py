@@ -0,0 +1,98 @@
+"""
+Version check shared by update_script.py, the GUI and the update stager.
+
+version.txt on the FTP server is read into memory (no temp file). Before
+downloading it again, SIZE and MDTM are compared with the last read: if
+both are unchanged the cached version is reused without opening a data
+connection. Results are also cached for `ttl` seconds, and a full read is
+forced every `full_check_interval` seconds in case the server reports
+coarse modification times.
+
+Versions are compared numerically: 1.0.10 > 1.0.9, 1.2 == 1.2.0,
+1.2.0-rc1 < 1.2.0.
+"""
+
+import re
+import time
+from ftplib import error_perm
+
+from update_client import VERSION_NAME
+
+DEFAULT_TTL = 300                # seconds a version is reused without asking the server
+FULL_CHECK_INTERVAL = 3600       # seconds between reads even when SIZE/MDTM are unchanged
+
+_PART = re.compile(r'(\d*)(.*)')
+
+
+def version_key(version):
+    """Sort key for a version string"""
+    text = version.strip().lstrip('vV')
+    release, _, pre = text.partition('-')
+    parts = []
+    for part in release.split('.'):
+        digits, rest = _PART.match(part).groups()
+        parts.append((int(digits) if digits else -1, rest))
+    while parts and parts[-1] == (0, ''):
+        parts.pop()  # 1.2 == 1.2.0
+    # A pre-release sorts before the release itself
+    return tuple(parts), (0, pre) if pre else (1, '')
+
+
+def is_newer(latest, current):
+    """True if `latest` is a higher version than `current` (False if latest is None)"""
+    if not latest:
+        return False
+    return version_key(latest) > version_key(current or "0")
+
+
+class VersionChecker:
+    def __init__(self, client, ttl=DEFAULT_TTL, full_check_interval=FULL_CHECK_INTERVAL, name=VERSION_NAME):
+        self.client = client
+        self.ttl = ttl
+        self.full_check_interval = full_check_interval
+        self.name = name
+        self.version = None
+        self.stamp = None       # (size, mdtm) of the last read, None if the server has no MDTM
+        self.checked_at = None
+        self.read_at = None
+        self.reads = 0          # version.txt downloads
+        self.metadata_hits = 0  # checks answered by SIZE/MDTM
+        self.cache_hits = 0     # checks answered by the TTL cache
+
+    def remote_stamp(self, ftp):
+        """(size, modification time) of version.txt, None if MDTM is not supported"""
+        try:
+            mdtm = ftp.sendcmd(f"MDTM {self.name}").split()[-1]
+        except error_perm:
+            return None
+        try:
+            size = ftp.size(self.name)
+        except error_perm:
+            size = None
+        return size, mdtm
+
+    def latest(self, force=False):
+        """Server version string; raises on connection errors"""
+        now = time.monotonic()
+        if not force and self.version is not None and now - self.checked_at < self.ttl:
+            self.cache_hits += 1
+            return self.version
+        try:
+            stamp = self.remote_stamp(self.client.session())
+            if (not force and stamp is not None and stamp == self.stamp
+                    and now - self.read_at < self.full_check_interval):
+                self.metadata_hits += 1
+            else:
+                self.version = self.client.read_bytes(self.name).decode('utf-8').strip()
+                self.stamp = stamp
+                self.read_at = now
+                self.reads += 1
+        finally:
+            self.client.close()
+        self.checked_at = now
+        return self.version
+
+    def newer_than(self, current, force=False):
+        """The server version if it is newer than `current`, else None"""
+        latest = self.latest(force)
+        return latest if is_newer(latest, current) else None